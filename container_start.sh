@@ -3,7 +3,7 @@
 # Start nginx
 nginx
 
-# Navigate to the app and start gunicorn
+# Navigate to the app and start gunicorn (threaded workers so controllers can long-poll)
 cd memberportal
 
 # We should migrate on startup in case there's been any db changes
@@ -15,4 +15,4 @@ if [ ! -f /usr/src/data/setupcomplete ]; then
     touch /usr/src/data/setupcomplete
 fi
 
-exec gunicorn membermatters.wsgi:application --bind unix:/tmp/gunicorn.sock --access-logfile '/usr/src/logs/access.log' --error-logfile '/usr/src/logs/error.log' --workers 6
+exec gunicorn membermatters.wsgi:application --bind unix:/tmp/gunicorn.sock --access-logfile '/usr/src/logs/access.log' --error-logfile '/usr/src/logs/error.log' --workers 6 --threads 8
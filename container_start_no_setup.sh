@@ -3,10 +3,10 @@
 # Start nginx
 nginx
 
-# Navigate to the app and start gunicorn
+# Navigate to the app and start gunicorn (threaded workers so controllers can long-poll)
 cd memberportal
 
 # We should migrate on startup in case there's been any db changes
 python3 manage.py migrate
 
-exec gunicorn membermatters.wsgi:application --bind unix:/tmp/gunicorn.sock --access-logfile '/usr/src/logs/access.log' --error-logfile '/usr/src/logs/error.log' --workers 6
+exec gunicorn membermatters.wsgi:application --bind unix:/tmp/gunicorn.sock --access-logfile '/usr/src/logs/access.log' --error-logfile '/usr/src/logs/error.log' --workers 6 --threads 8
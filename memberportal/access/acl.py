@@ -0,0 +1,431 @@
+from collections import defaultdict
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Exists, F, OuterRef
+from api_general.models import SiteSession
+from profile.models import Profile
+from .models import (
+    AccessControlledDevice,
+    AuthorisedTag,
+    AuthorisedTagChange,
+    Doors,
+    Interlock,
+)
+
+logger = logging.getLogger(__name__)
+
+# an AuthorisedTagChange with this rfid only marks a version that didn't change
+# any tags (see bump_version), so every retained version has at least one row
+NO_TAG_CHANGE = ""
+
+
+def get_authorised_profiles(device):
+    """
+    Returns a queryset of the profiles that should be able to use the device.
+    :param device: a Doors or Interlock object
+    :return: QuerySet<Profile>
+    """
+    if isinstance(device, Interlock):
+        profiles = Profile.objects.filter(interlocks=device)
+    else:
+        profiles = Profile.objects.filter(doors=device)
+
+    profiles = profiles.filter(state="active").exclude(rfid=None).exclude(rfid="")
+
+    if not device.exempt_signin:
+        profiles = profiles.filter(
+            Exists(SiteSession.objects.filter(user=OuterRef("user"), signout_date=None))
+        )
+
+    return profiles
+
+
+def get_authorised_tags(device):
+    """
+    Returns a list of the rfid tags that are currently authorised on the device.
+    :param device: a Doors or Interlock object (or its id)
+    :return: [str]
+    """
+    return list(
+        AuthorisedTag.objects.filter(device=device)
+        .order_by("profile_id")
+        .values_list("rfid", flat=True)
+    )
+
+
+def get_tag_changes(device, since):
+    """
+    Returns the tags that were added to and removed from a device since the
+    specified version of its authorised tag list.
+    :param device: a Doors or Interlock object
+    :param since: the acl_version the controller currently has
+    :return: {"added": [str], "removed": [str]} or None if a full sync is needed
+    """
+    # version 0 means the controller doesn't have a list yet
+    if since == 0 or since > device.acl_version:
+        return None
+
+    if device.acl_version - since > settings.ACL_CHANGE_HISTORY:
+        return None
+
+    changes = AuthorisedTagChange.objects.filter(
+        device=device, version__gt=since, version__lte=device.acl_version
+    ).order_by("version", "id")
+
+    added = set()
+    removed = set()
+
+    versions = set()
+
+    for version, rfid, was_added in changes.values_list("version", "rfid", "added"):
+        versions.add(version)
+
+        if rfid == NO_TAG_CHANGE:
+            continue
+
+        if was_added:
+            added.add(rfid)
+            removed.discard(rfid)
+        else:
+            removed.add(rfid)
+            added.discard(rfid)
+
+    # if some of the history has been pruned we can't build an accurate delta
+    if len(versions) != device.acl_version - since:
+        return None
+
+    return {"added": sorted(added), "removed": sorted(removed)}
+
+
+def _record_changes(device_id, added, removed):
+    """
+    Bumps the device's acl_version and records what changed in that version.
+    Must be called inside a transaction.
+    """
+    AccessControlledDevice.objects.filter(pk=device_id).update(
+        acl_version=F("acl_version") + 1
+    )
+    version = AccessControlledDevice.objects.values_list("acl_version", flat=True).get(
+        pk=device_id
+    )
+
+    AuthorisedTagChange.objects.bulk_create(
+        [
+            AuthorisedTagChange(
+                device_id=device_id, version=version, rfid=rfid, added=False
+            )
+            for rfid in removed
+        ]
+        + [
+            AuthorisedTagChange(
+                device_id=device_id, version=version, rfid=rfid, added=True
+            )
+            for rfid in added
+        ]
+    )
+    AuthorisedTagChange.objects.filter(
+        device_id=device_id, version__lte=version - settings.ACL_CHANGE_HISTORY
+    ).delete()
+
+
+class VersionWatcher:
+    """
+    Watches the acl_version of the devices that controllers are long-polling
+    for. A single daemon thread per process checks all of them with one query
+    every ACL_LONG_POLL_INTERVAL seconds (or straight away when this process
+    changes a tag list) and wakes the waiting requests if any have changed, so
+    an idle controller doesn't cost us a query every interval.
+    """
+
+    def __init__(self):
+        self.changed = threading.Condition()
+        self.wake = threading.Event()
+        self.versions = {}
+        self.waiters = defaultdict(int)
+        self.thread = None
+
+    def start(self):
+        # threads don't survive a fork, so check it's still alive as well
+        with self.changed:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name="acl-version-watcher", daemon=True
+                )
+                self.thread.start()
+
+    def run(self):
+        while True:
+            self.wake.wait(settings.ACL_LONG_POLL_INTERVAL)
+            self.wake.clear()
+
+            with self.changed:
+                device_ids = list(self.waiters)
+
+            if not device_ids:
+                continue
+
+            try:
+                versions = dict(
+                    AccessControlledDevice.objects.filter(
+                        pk__in=device_ids
+                    ).values_list("pk", "acl_version")
+                )
+
+            except Exception:
+                logger.exception("Failed to check device acl versions.")
+                close_old_connections()
+                continue
+
+            with self.changed:
+                if any(self.versions.get(pk) != v for pk, v in versions.items()):
+                    self.versions.update(versions)
+                    self.changed.notify_all()
+
+    def wait(self, device_id, version, timeout):
+        """
+        Waits until the device's acl_version is no longer version.
+        :return: the device's latest acl_version that we know of
+        """
+        self.start()
+        deadline = time.monotonic() + timeout
+
+        with self.changed:
+            self.waiters[device_id] += 1
+            current = self.versions.get(device_id, version)
+            self.versions[device_id] = max(current, version)
+
+            try:
+                while self.versions[device_id] == version:
+                    remaining = deadline - time.monotonic()
+
+                    if remaining <= 0:
+                        break
+
+                    self.changed.wait(remaining)
+
+                return self.versions[device_id]
+
+            finally:
+                self.waiters[device_id] -= 1
+
+                if not self.waiters[device_id]:
+                    del self.waiters[device_id]
+                    del self.versions[device_id]
+
+
+watcher = VersionWatcher()
+
+
+def _notify_changed():
+    # check the versions now instead of waiting for the next interval
+    watcher.wake.set()
+
+
+def bump_version(device):
+    """
+    Bumps a device's acl_version without changing its tags, so controllers know
+    to fetch it again (ie when it's locked out).
+    :param device: a Doors or Interlock object
+    """
+    with transaction.atomic():
+        _record_changes(device.id, [], [NO_TAG_CHANGE])
+        transaction.on_commit(_notify_changed)
+
+
+def wait_for_change(device, version, timeout):
+    """
+    Waits until the device's acl_version is different to the one the controller
+    has. Changes made by this process wake us up straight away, changes made by
+    other workers are picked up every ACL_LONG_POLL_INTERVAL seconds by the
+    shared VersionWatcher.
+    :param device: a Doors or Interlock object with an up to date acl_version,
+        which is updated if it changes
+    :param version: the acl_version the controller currently has
+    :param timeout: the most we'll wait, in seconds
+    :return: True if the version changed
+    """
+    if device.acl_version == version:
+        device.acl_version = watcher.wait(device.pk, version, timeout)
+
+    return device.acl_version != version
+
+
+def _sync(existing, desired):
+    """
+    Updates the authorised tag index so it matches what we expect.
+    :param existing: {(device_id, profile_id): (tag_id, rfid)} of the current rows
+    :param desired: {(device_id, profile_id): rfid} of the rows that should exist
+    """
+    removed = []
+    added = []
+    changes = defaultdict(lambda: ([], []))
+
+    for (device_id, profile_id), (tag_id, rfid) in existing.items():
+        if desired.get((device_id, profile_id)) != rfid:
+            removed.append(tag_id)
+            changes[device_id][1].append(rfid)
+
+    for (device_id, profile_id), rfid in desired.items():
+        current = existing.get((device_id, profile_id))
+
+        if current is None or current[1] != rfid:
+            added.append(
+                AuthorisedTag(device_id=device_id, profile_id=profile_id, rfid=rfid)
+            )
+            changes[device_id][0].append(rfid)
+
+    if removed or added:
+        with transaction.atomic():
+            AuthorisedTag.objects.filter(pk__in=removed).delete()
+            AuthorisedTag.objects.bulk_create(added, ignore_conflicts=True)
+
+            for device_id, (device_added, device_removed) in changes.items():
+                _record_changes(device_id, device_added, device_removed)
+
+            transaction.on_commit(_notify_changed)
+
+
+def refresh_device(device):
+    """
+    Rebuilds the authorised tags for a single door or interlock.
+    :param device: a Doors or Interlock object
+    """
+    existing = {
+        (device.id, profile_id): (tag_id, rfid)
+        for tag_id, profile_id, rfid in AuthorisedTag.objects.filter(
+            device=device
+        ).values_list("id", "profile_id", "rfid")
+    }
+    desired = {
+        (device.id, profile_id): rfid
+        for profile_id, rfid in get_authorised_profiles(device).values_list(
+            "id", "rfid"
+        )
+    }
+
+    _sync(existing, desired)
+
+
+def refresh_profile(profile):
+    """
+    Rebuilds the authorised tags for a single member across every device.
+    :param profile: a Profile object
+    """
+    existing = {
+        (device_id, profile.id): (tag_id, rfid)
+        for tag_id, device_id, rfid in AuthorisedTag.objects.filter(
+            profile=profile
+        ).values_list("id", "device_id", "rfid")
+    }
+    desired = {}
+
+    if profile.state == "active" and profile.rfid:
+        signed_in = SiteSession.objects.filter(
+            user_id=profile.user_id, signout_date=None
+        ).exists()
+
+        for device in list(profile.doors.all()) + list(profile.interlocks.all()):
+            if signed_in or device.exempt_signin:
+                desired[(device.id, profile.id)] = profile.rfid
+
+    _sync(existing, desired)
+
+
+def rebuild_all():
+    """Rebuilds the authorised tags for every door and interlock."""
+    for device in list(Doors.objects.all()) + list(Interlock.objects.all()):
+        refresh_device(device)
+
+
+def _insert_access(through, device_field, device_id, profile_ids=None):
+    """
+    Gives members access to a device with a single INSERT ... SELECT over the
+    profiles, skipping anyone that already has it.
+    :param through: the m2m table between profiles and this type of device
+    :param device_field: the name of the device's field on the through model
+    :param device_id: the device's id
+    :param profile_ids: the profiles to grant access to, or None for everyone
+    :return: the number of rows that were actually inserted
+    """
+    ops = connection.ops
+    profile_ids = None if profile_ids is None else list(profile_ids)
+
+    if profile_ids == []:
+        return 0
+
+    sql = (
+        f"{ops.insert_statement(ignore_conflicts=True)} "
+        f"{ops.quote_name(through._meta.db_table)} "
+        f"({ops.quote_name(through._meta.get_field('profile').column)}, "
+        f"{ops.quote_name(through._meta.get_field(device_field).column)}) "
+        f"SELECT {ops.quote_name(Profile._meta.pk.column)}, %s "
+        f"FROM {ops.quote_name(Profile._meta.db_table)}"
+    )
+    params = [device_id]
+
+    # only new members are granted access one at a time, so the list is short
+    if profile_ids is not None:
+        sql += (
+            f" WHERE {ops.quote_name(Profile._meta.pk.column)} "
+            f"IN ({', '.join(['%s'] * len(profile_ids))})"
+        )
+        params += profile_ids
+
+    suffix = ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)
+
+    if suffix:
+        sql += f" {suffix}"
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def _grant_default_access(model, profile_ids=None):
+    """
+    Gives members access to every device of a type that has all_members set,
+    with one insert into the m2m table per device. That doesn't send
+    m2m_changed so we refresh the authorised tags of any devices that changed.
+    :param model: Doors or Interlock
+    :param profile_ids: the profiles to grant access to, or None for everyone
+    :return: the number of access permissions that were added
+    """
+    if model is Interlock:
+        through = Profile.interlocks.through
+        device_field = "interlock"
+    else:
+        through = Profile.doors.through
+        device_field = "doors"
+
+    added = 0
+
+    with transaction.atomic():
+        for device in model.objects.filter(all_members=True):
+            inserted = _insert_access(through, device_field, device.id, profile_ids)
+
+            if inserted:
+                refresh_device(device)
+                added += inserted
+
+    return added
+
+
+def grant_default_door_access(profile_ids=None):
+    """
+    Gives members access to every door that all members get by default.
+    :param profile_ids: the profiles to grant access to, or None for everyone
+    :return: the number of door permissions that were added
+    """
+    return _grant_default_access(Doors, profile_ids)
+
+
+def grant_default_interlock_access(profile_ids=None):
+    """
+    Gives members access to every interlock that all members get by default.
+    :param profile_ids: the profiles to grant access to, or None for everyone
+    :return: the number of interlock permissions that were added
+    """
+    return _grant_default_access(Interlock, profile_ids)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class AccessConfig(AppConfig):
+    name = "access"
+
+    def ready(self):
+        # connects the receivers that keep the authorised tag index up to date
+        from . import signals
@@ -0,0 +1,73 @@
+"""
+Builds the signed binary ACL bundle that door and interlock controllers can
+keep locally and check swipes against if they can't reach the portal. Every
+number is big endian:
+
+    header      magic (4s) "MMAB", format (B), flags (B), device id (I),
+                acl version (I), generated at (I, unix timestamp), tag count (I)
+    tags        tag count x rfid (Q), sorted so the controller can binary search
+    signature   HMAC-SHA256 of everything above keyed with API_SECRET_KEY (32s)
+
+Tags that aren't a number that fits in 64 bits can't be stored in the bundle and
+are left out (the controller will still check those with the portal).
+"""
+
+import hashlib
+import hmac
+import struct
+import time
+from constance import config
+from .acl import get_authorised_tags
+
+MAGIC = b"MMAB"
+FORMAT_VERSION = 1
+HEADER = struct.Struct(">4sBBIIII")
+TAG = struct.Struct(">Q")
+
+# bits in the flags byte of the header
+FLAG_LOCKED_OUT = 1
+FLAG_EXEMPT_SIGNIN = 2
+
+
+def sign_bundle(data):
+    return hmac.new(
+        config.API_SECRET_KEY.encode("utf-8"), data, hashlib.sha256
+    ).digest()
+
+
+def build_acl_bundle(device):
+    """
+    Builds the ACL bundle for a door or interlock.
+    :param device: a Doors or Interlock object
+    :return: bytes
+    """
+    tags = set()
+
+    for rfid in get_authorised_tags(device):
+        try:
+            tag = int(rfid)
+        except ValueError:
+            continue
+
+        if 0 <= tag < 2**64:
+            tags.add(tag)
+
+    flags = 0
+
+    if device.locked_out:
+        flags |= FLAG_LOCKED_OUT
+
+    if device.exempt_signin:
+        flags |= FLAG_EXEMPT_SIGNIN
+
+    data = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        flags,
+        device.id,
+        device.acl_version,
+        round(time.time()),
+        len(tags),
+    ) + b"".join(TAG.pack(tag) for tag in sorted(tags))
+
+    return data + sign_bundle(data)
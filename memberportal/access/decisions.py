@@ -0,0 +1,139 @@
+"""
+The access decision engine used when a member swipes at a door or interlock.
+
+The door strike is waiting on this answer, so the device comes from the device
+registry and everything else needed to make the decision is resolved in a
+single query. Nothing is written before we answer: the device check in and the
+member's last seen time go through the heartbeat buffer, the door log is
+written by the swipe worker and Discord notifications are queued on the
+Discord outbox. Decisions slower than settings.SWIPE_LATENCY_TARGET are logged.
+"""
+
+import logging
+import time
+from django.conf import settings
+from django.db.models import BooleanField, Exists, OuterRef, Value
+from django.utils import timezone
+from api_general.models import SiteSession
+from membermatters.background import BackgroundWorker
+from membermatters.heartbeats import record_heartbeat
+from profile.models import Profile
+from .models import AccessControlledDevice, DoorLog
+from . import registry
+
+logger = logging.getLogger(__name__)
+swipe_worker = BackgroundWorker("swipe-side-effects")
+
+# possible results of a swipe
+GRANTED = "granted"
+DENIED = "denied"
+NOT_SIGNED_IN = "not_signed_in"
+LOCKED_OUT = "locked_out"
+UNKNOWN_MEMBER = "unknown_member"
+UNKNOWN_DEVICE = "unknown_device"
+
+
+def resolve_swipe(model, rfid, device_id=None, ip_address=None):
+    """
+    Works out if the owner of an rfid tag is allowed to use a door or interlock.
+    :param model: Doors or Interlock
+    :param rfid: the rfid tag that was swiped
+    :param device_id: the id of the device, if None we look it up by ip_address
+    :param ip_address: the IP address of the device
+    :return: {"result": str, "profile": {} or None, "device": {} or None}
+    """
+    started = time.monotonic()
+    device = registry.get_device(model, device_id, ip_address)
+
+    if device:
+        has_access = Exists(model.objects.filter(pk=device.id, profile=OuterRef("pk")))
+    else:
+        has_access = Value(False, output_field=BooleanField())
+
+    swipe = (
+        Profile.objects.filter(rfid=rfid)
+        .annotate(
+            has_access=has_access,
+            signed_in=Exists(
+                SiteSession.objects.filter(user=OuterRef("user"), signout_date=None)
+            ),
+        )
+        .values(
+            "id",
+            "user_id",
+            "state",
+            "first_name",
+            "last_name",
+            "screen_name",
+            "has_access",
+            "signed_in",
+        )
+        .first()
+    )
+
+    if swipe is None:
+        decision = {"result": UNKNOWN_MEMBER, "profile": None, "device": None}
+
+    elif device is None:
+        decision = {"result": UNKNOWN_DEVICE, "profile": swipe, "device": None}
+
+    else:
+        device = {
+            "id": device.id,
+            "name": device.name,
+            "locked_out": device.locked_out,
+            "exempt_signin": device.exempt_signin,
+            "play_theme": device.play_theme,
+        }
+
+        if swipe["state"] != "active":
+            result = DENIED
+        elif device["locked_out"]:
+            result = LOCKED_OUT
+        elif not swipe["has_access"]:
+            result = DENIED
+        elif not swipe["signed_in"] and not device["exempt_signin"]:
+            result = NOT_SIGNED_IN
+        else:
+            result = GRANTED
+
+        decision = {"result": result, "profile": swipe, "device": device}
+
+    elapsed = time.monotonic() - started
+    if elapsed > settings.SWIPE_LATENCY_TARGET:
+        logger.warning(
+            f"Swipe decision for {rfid} took {round(elapsed * 1000)}ms, "
+            f"target is {round(settings.SWIPE_LATENCY_TARGET * 1000)}ms."
+        )
+
+    return decision
+
+
+def record_swipe(decision, log_door_access=False):
+    """
+    Records the writes that go along with a swipe so they happen after we've
+    answered the controller.
+    :param decision: the result of resolve_swipe()
+    :param log_door_access: if a DoorLog entry should be created for the swipe
+    """
+    profile = decision["profile"]
+    device = decision["device"]
+
+    if device:
+        record_heartbeat(AccessControlledDevice, device["id"])
+
+    if profile:
+        record_heartbeat(Profile, profile["id"])
+
+    if log_door_access and profile and device:
+        swipe_worker.submit(
+            DoorLog.objects.create,
+            user_id=profile["user_id"],
+            door_id=device["id"],
+            date=timezone.now(),
+        )
+
+
+def defer(func, *args, **kwargs):
+    """Runs a swipe related side effect (ie playing a theme song) in the background."""
+    swipe_worker.submit(func, *args, **kwargs)
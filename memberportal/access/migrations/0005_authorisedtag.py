@@ -0,0 +1,70 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_authorised_tags(apps, schema_editor):
+    AuthorisedTag = apps.get_model("access", "AuthorisedTag")
+    Profile = apps.get_model("profile", "Profile")
+    SiteSession = apps.get_model("api_general", "SiteSession")
+
+    signed_in = set(
+        SiteSession.objects.filter(signout_date=None).values_list("user_id", flat=True)
+    )
+    profiles = (
+        Profile.objects.filter(state="active")
+        .exclude(rfid=None)
+        .exclude(rfid="")
+        .prefetch_related("doors", "interlocks")
+    )
+    tags = []
+
+    for profile in profiles:
+        for device in list(profile.doors.all()) + list(profile.interlocks.all()):
+            if profile.user_id in signed_in or device.exempt_signin:
+                tags.append(
+                    AuthorisedTag(
+                        device_id=device.id, profile_id=profile.id, rfid=profile.rfid
+                    )
+                )
+
+    AuthorisedTag.objects.bulk_create(tags, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profile", "0007_auto_20211005_0015"),
+        ("access", "0004_auto_20211005_0015"),
+        ("api_general", "0003_auto_20211005_0015"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuthorisedTag",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                ("rfid", models.CharField(max_length=20, verbose_name="RFID Tag")),
+                (
+                    "device",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="authorised_tags",
+                        to="access.accesscontrolleddevice",
+                    ),
+                ),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="profile.profile",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("device", "profile")},
+            },
+        ),
+        migrations.RunPython(build_authorised_tags, migrations.RunPython.noop),
+    ]
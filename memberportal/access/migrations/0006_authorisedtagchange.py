@@ -0,0 +1,44 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access", "0005_authorisedtag"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accesscontrolleddevice",
+            name="acl_version",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Version of the authorised tag list"
+            ),
+        ),
+        migrations.CreateModel(
+            name="AuthorisedTagChange",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                ("version", models.PositiveIntegerField()),
+                ("rfid", models.CharField(max_length=20, verbose_name="RFID Tag")),
+                ("added", models.BooleanField()),
+                (
+                    "device",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tag_changes",
+                        to="access.accesscontrolleddevice",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="authorisedtagchange",
+            index=models.Index(
+                fields=["device", "version"], name="access_auth_device__dcc7bd_idx"
+            ),
+        ),
+    ]
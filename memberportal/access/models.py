@@ -2,11 +2,13 @@ from django.db import models
 from datetime import timedelta
 from django.utils import timezone
 from membermatters.helpers import log_event
+from membermatters.heartbeats import record_heartbeat
 from django.contrib.auth import get_user_model
 import pytz
 from django.conf import settings
 from django.contrib import auth
 import uuid
+from functools import lru_cache
 
 User = auth.get_user_model()
 utc = pytz.UTC
@@ -29,10 +31,25 @@ class AccessControlledDevice(models.Model):
     hidden = models.BooleanField(
         "Hidden from members in their access permissions screen", default=False
     )
+    acl_version = models.PositiveIntegerField(
+        "Version of the authorised tag list", default=0
+    )
+
+    def save(self, *args, **kwargs):
+        # acl_version and last_seen are only changed with queryset updates, so
+        # don't overwrite them with whatever we happened to load
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in ("acl_version", "last_seen")
+            ]
+
+        super().save(*args, **kwargs)
 
     def checkin(self):
-        self.last_seen = timezone.now()
-        self.save()
+        self.last_seen = record_heartbeat(AccessControlledDevice, self.pk)
 
     def get_unavailable(self):
         if self.last_seen:
@@ -213,6 +230,80 @@ class InterlockLog(models.Model):
     session_complete = models.BooleanField(default=False)
 
     def heartbeat(self):
-        self.last_heartbeat = timezone.now()
-        self.interlock.checkin()
-        self.save()
+        self.last_heartbeat = (
+            InterlockLog.heartbeat_session(self.pk) or self.last_heartbeat
+        )
+
+    @staticmethod
+    def heartbeat_session(session_id):
+        """
+        Updates the last heartbeat of a session that is still running. This is a
+        single conditional update of the last_heartbeat column, the interlock's
+        last_seen goes through the heartbeat buffer.
+        :param session_id: the id of the InterlockLog
+        :return: the time of the heartbeat, or None if the session has ended
+        """
+        now = timezone.now()
+        updated = InterlockLog.objects.filter(
+            pk=session_id, session_complete=False
+        ).update(last_heartbeat=now)
+
+        if not updated:
+            # raises DoesNotExist if there's no such session
+            InterlockLog.objects.filter(pk=session_id).values("pk").get()
+            return None
+
+        record_heartbeat(AccessControlledDevice, _session_interlock(session_id))
+
+        return now
+
+
+@lru_cache(maxsize=1024)
+def _session_interlock(session_id):
+    # a session's interlock never changes so we only need to look it up once
+    return InterlockLog.objects.values_list("interlock_id", flat=True).get(
+        pk=session_id
+    )
+
+
+class AuthorisedTag(models.Model):
+    """
+    A materialised row for every RFID tag that is currently allowed to use a
+    device. It's kept up to date by the receivers in access/signals.py so that
+    controllers can fetch their tag list with a single indexed read.
+    """
+
+    id = models.AutoField(primary_key=True)
+    device = models.ForeignKey(
+        AccessControlledDevice, on_delete=models.CASCADE, related_name="authorised_tags"
+    )
+    profile = models.ForeignKey("profile.Profile", on_delete=models.CASCADE)
+    rfid = models.CharField("RFID Tag", max_length=20)
+
+    class Meta:
+        unique_together = ("device", "profile")
+
+    def __str__(self):
+        return f"{self.rfid} on {self.device_id}"
+
+
+class AuthorisedTagChange(models.Model):
+    """
+    A record of a tag being added to or removed from a device's authorised tag
+    list. Controllers use these to sync only what has changed since the version
+    they last saw.
+    """
+
+    id = models.AutoField(primary_key=True)
+    device = models.ForeignKey(
+        AccessControlledDevice, on_delete=models.CASCADE, related_name="tag_changes"
+    )
+    version = models.PositiveIntegerField()
+    rfid = models.CharField("RFID Tag", max_length=20)
+    added = models.BooleanField()
+
+    class Meta:
+        indexes = [models.Index(fields=["device", "version"])]
+
+    def __str__(self):
+        return f"{'+' if self.added else '-'}{self.rfid} on {self.device_id} (v{self.version})"
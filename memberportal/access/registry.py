@@ -0,0 +1,68 @@
+"""
+A cached registry of every device (doors, interlocks, memberbucks devices and
+kiosks) so the device facing endpoints can find the device making a request
+without a database query. It's invalidated by the receivers in signals.py.
+"""
+
+import copy
+from api_general.models import Kiosk
+from membermatters.snapshots import Snapshot
+from .models import Doors, Interlock, MemberbucksDevice
+
+MODELS = (Doors, Interlock, MemberbucksDevice, Kiosk)
+
+
+def load_devices():
+    registry = {}
+
+    for model in MODELS:
+        by_id = {}
+        by_ip = {}
+
+        for device in model.objects.all():
+            by_id[device.id] = device
+
+            if device.ip_address:
+                by_ip[device.ip_address] = device
+
+        registry[model] = (by_id, by_ip)
+
+    # kiosks identify themselves with their kiosk_id
+    registry["kiosk_id"] = {
+        kiosk.kiosk_id: kiosk for kiosk in registry[Kiosk][0].values()
+    }
+
+    return registry
+
+
+devices = Snapshot("devices", load_devices)
+
+
+def get_device(model, device_id=None, ip_address=None):
+    """
+    Finds a device by its id, or its IP address if no id is given.
+    :param model: Doors, Interlock, MemberbucksDevice or Kiosk
+    :param device_id: the id of the device
+    :param ip_address: the IP address of the device
+    :return: a copy of the device, or None if it doesn't exist
+    """
+    by_id, by_ip = devices.get()[model]
+
+    if device_id is not None:
+        device = by_id.get(device_id)
+    else:
+        device = by_ip.get(ip_address)
+
+    # hand out copies so requests can't change the cached object
+    return copy.copy(device) if device else None
+
+
+def get_kiosk(kiosk_id):
+    """
+    Finds a kiosk by its kiosk id.
+    :param kiosk_id: the kiosk_id of the kiosk
+    :return: a copy of the kiosk, or None if it doesn't exist
+    """
+    kiosk = devices.get()["kiosk_id"].get(kiosk_id)
+
+    return copy.copy(kiosk) if kiosk else None
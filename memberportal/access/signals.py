@@ -0,0 +1,92 @@
+from django.db.models.signals import post_init, post_save, post_delete, m2m_changed
+from django.db import transaction
+from django.dispatch import receiver
+from api_general.models import Kiosk, SiteSession
+from profile.models import Profile
+from .models import Doors, Interlock, MemberbucksDevice
+from . import acl, registry
+
+
+@receiver(post_init, sender=Profile)
+def remember_profile_access(sender, instance, **kwargs):
+    # use __dict__ so we don't trigger a query for deferred fields
+    instance._access_fields = (
+        instance.__dict__.get("state"),
+        instance.__dict__.get("rfid"),
+    )
+
+
+@receiver(post_save, sender=Profile)
+def profile_saved(sender, instance, created, **kwargs):
+    access_fields = (instance.state, instance.rfid)
+
+    # profiles are saved on every swipe, so only rebuild if something relevant changed
+    if created or access_fields != getattr(instance, "_access_fields", None):
+        acl.refresh_profile(instance)
+
+    instance._access_fields = access_fields
+
+
+@receiver(post_init, sender=Doors)
+@receiver(post_init, sender=Interlock)
+def remember_device_access(sender, instance, **kwargs):
+    instance._exempt_signin = instance.__dict__.get("exempt_signin")
+    instance._locked_out = instance.__dict__.get("locked_out")
+
+
+@receiver(post_save, sender=Doors)
+@receiver(post_save, sender=Interlock)
+def device_saved(sender, instance, created, **kwargs):
+    if not created:
+        if instance.exempt_signin != getattr(instance, "_exempt_signin", None):
+            acl.refresh_device(instance)
+
+        # the tags don't change, but controllers need to know about the lockout
+        if instance.locked_out != getattr(instance, "_locked_out", None):
+            acl.bump_version(instance)
+
+    instance._exempt_signin = instance.exempt_signin
+    instance._locked_out = instance.locked_out
+
+
+@receiver(m2m_changed, sender=Profile.doors.through)
+@receiver(m2m_changed, sender=Profile.interlocks.through)
+def device_access_changed(sender, instance, action, reverse, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    # reverse means the change was made from the device side (ie door.profile_set)
+    if reverse:
+        acl.refresh_device(instance)
+    else:
+        acl.refresh_profile(instance)
+
+
+def refresh_user(user_id):
+    profile = Profile.objects.filter(user_id=user_id).first()
+
+    if profile:
+        acl.refresh_profile(profile)
+
+
+@receiver(post_save, sender=SiteSession)
+def site_session_saved(sender, instance, **kwargs):
+    refresh_user(instance.user_id)
+
+
+@receiver(post_delete, sender=SiteSession)
+def site_session_deleted(sender, instance, **kwargs):
+    # wait for the commit in case the member is being deleted along with the session
+    transaction.on_commit(lambda: refresh_user(instance.user_id))
+
+
+@receiver(post_save, sender=Doors)
+@receiver(post_save, sender=Interlock)
+@receiver(post_save, sender=MemberbucksDevice)
+@receiver(post_save, sender=Kiosk)
+@receiver(post_delete, sender=Doors)
+@receiver(post_delete, sender=Interlock)
+@receiver(post_delete, sender=MemberbucksDevice)
+@receiver(post_delete, sender=Kiosk)
+def device_changed(sender, instance, **kwargs):
+    transaction.on_commit(registry.devices.invalidate)
@@ -0,0 +1,53 @@
+from datetime import timedelta
+from django.utils import timezone
+from membermatters.scheduler import periodic_task
+from services.discord import post_interlock_swipe_to_discord
+from .models import InterlockLog
+import humanize
+
+# how long an interlock can go without a heartbeat before we end its session
+INTERLOCK_SESSION_TIMEOUT = timedelta(minutes=2)
+
+
+@periodic_task(30)
+def timeout_interlock_sessions():
+    """
+    Ends any interlock sessions that haven't had a heartbeat in a while.
+    :return: the number of sessions that were ended
+    """
+    cutoff = timezone.now() - INTERLOCK_SESSION_TIMEOUT
+    timed_out = InterlockLog.objects.filter(
+        last_heartbeat__lt=cutoff, session_complete=False
+    )
+    sessions = list(timed_out.select_related("user__profile", "interlock"))
+
+    if not sessions:
+        return 0
+
+    ended = timed_out.filter(pk__in=[session.pk for session in sessions]).update(
+        session_complete=True
+    )
+
+    # a heartbeat may have come in between reading and updating the sessions
+    if ended != len(sessions):
+        still_ended = set(
+            InterlockLog.objects.filter(
+                pk__in=[session.pk for session in sessions],
+                session_complete=True,
+                last_heartbeat__lt=cutoff,
+            ).values_list("pk", flat=True)
+        )
+        sessions = [session for session in sessions if session.pk in still_ended]
+
+    for session in sessions:
+        on_time = humanize.naturaldelta(
+            session.last_heartbeat - session.first_heartbeat
+        )
+        post_interlock_swipe_to_discord(
+            session.user.profile.get_full_name(),
+            session.interlock.name,
+            "left_on",
+            on_time,
+        )
+
+    return ended
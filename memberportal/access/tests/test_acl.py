@@ -0,0 +1,71 @@
+from access import acl
+from access.models import AuthorisedTag, Doors, Interlock
+from api_general.models import SiteSession
+from membermatters.testing import MemberMattersTestCase, make_member
+
+
+class AuthorisedTagIndexTests(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.door = Doors.objects.create(name="Front", description="Front door")
+        self.interlock = Interlock.objects.create(name="Laser", description="Laser")
+        self.member = make_member(1)
+        self.member.doors.add(self.door)
+        self.member.interlocks.add(self.interlock)
+        self.session = SiteSession.objects.create(user=self.member.user)
+
+    def test_member_with_access_is_authorised(self):
+        self.assertEqual(acl.get_authorised_tags(self.door), ["1001"])
+        self.assertEqual(acl.get_authorised_tags(self.interlock), ["1001"])
+
+    def test_index_matches_the_authorisation_rules(self):
+        make_member(2).doors.add(self.door)  # not signed in
+        make_member(3, state="inactive").doors.add(self.door)
+
+        expected = list(
+            acl.get_authorised_profiles(self.door).values_list("rfid", flat=True)
+        )
+        self.assertEqual(acl.get_authorised_tags(self.door), expected)
+
+    def test_signing_out_removes_the_tag(self):
+        self.session.signout()
+
+        self.assertEqual(acl.get_authorised_tags(self.door), [])
+
+    def test_exempt_device_doesnt_need_a_sign_in(self):
+        self.session.signout()
+        self.door.exempt_signin = True
+        self.door.save()
+
+        self.assertEqual(acl.get_authorised_tags(self.door), ["1001"])
+        self.assertEqual(acl.get_authorised_tags(self.interlock), [])
+
+    def test_inactive_member_is_removed(self):
+        self.member.state = "inactive"
+        self.member.save()
+
+        self.assertEqual(acl.get_authorised_tags(self.door), [])
+
+    def test_changed_rfid_replaces_the_old_tag(self):
+        self.member.rfid = "2222"
+        self.member.save()
+
+        self.assertEqual(acl.get_authorised_tags(self.door), ["2222"])
+
+    def test_removing_access_removes_the_tag(self):
+        self.member.doors.remove(self.door)
+        self.assertEqual(acl.get_authorised_tags(self.door), [])
+
+        self.door.profile_set.add(self.member)
+        self.assertEqual(acl.get_authorised_tags(self.door), ["1001"])
+
+    def test_rebuild_fixes_a_stale_index(self):
+        AuthorisedTag.objects.all().delete()
+        AuthorisedTag.objects.create(
+            device=self.door, profile=make_member(2), rfid="9999"
+        )
+
+        acl.rebuild_all()
+
+        self.assertEqual(acl.get_authorised_tags(self.door), ["1001"])
+        self.assertEqual(acl.get_authorised_tags(self.interlock), ["1001"])
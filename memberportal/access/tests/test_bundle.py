@@ -0,0 +1,69 @@
+import hmac
+from constance import config
+from access import bundle
+from access.models import Doors
+from membermatters.testing import MemberMattersTestCase, make_member
+
+
+class AclBundleTests(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.door = Doors.objects.create(
+            name="Front", description="Front door", exempt_signin=True
+        )
+
+        for number, rfid in ((1, "300"), (2, "20"), (3, "not-a-number")):
+            make_member(number, rfid=rfid).doors.add(self.door)
+
+        self.door.refresh_from_db()
+
+    def parse(self, data):
+        body, signature = data[:-32], data[-32:]
+        self.assertTrue(hmac.compare_digest(bundle.sign_bundle(body), signature))
+
+        header = bundle.HEADER.unpack_from(body)
+        tags = [
+            bundle.TAG.unpack_from(body, bundle.HEADER.size + i * bundle.TAG.size)[0]
+            for i in range(header[-1])
+        ]
+
+        return header, tags
+
+    def test_bundle_has_the_sorted_numeric_tags(self):
+        header, tags = self.parse(bundle.build_acl_bundle(self.door))
+        magic, format_version, flags, device_id, version, generated, count = header
+
+        self.assertEqual(magic, bundle.MAGIC)
+        self.assertEqual(format_version, bundle.FORMAT_VERSION)
+        self.assertEqual(flags, bundle.FLAG_EXEMPT_SIGNIN)
+        self.assertEqual(device_id, self.door.id)
+        self.assertEqual(version, self.door.acl_version)
+        self.assertEqual(tags, [20, 300])
+
+    def test_lockout_is_flagged(self):
+        self.door.locked_out = True
+        self.door.exempt_signin = False
+
+        header, _ = self.parse(bundle.build_acl_bundle(self.door))
+
+        self.assertEqual(header[2], bundle.FLAG_LOCKED_OUT)
+
+    def test_endpoint_serves_the_current_bundle(self):
+        response = self.client.get(
+            f"/api/door/{self.door.id}/authorised/bundle/",
+            {"secret": config.API_SECRET_KEY},
+        )
+
+        self.assertEqual(response["Content-Type"], "application/octet-stream")
+        self.assertEqual(response["X-ACL-Version"], str(self.door.acl_version))
+        header, tags = self.parse(response.content)
+        self.assertEqual(header[4], self.door.acl_version)
+        self.assertEqual(tags, [20, 300])
+
+    def test_tampered_bundle_fails_the_signature_check(self):
+        data = bytearray(bundle.build_acl_bundle(self.door))
+        data[bundle.HEADER.size] ^= 1
+
+        self.assertFalse(
+            hmac.compare_digest(bundle.sign_bundle(bytes(data[:-32])), data[-32:])
+        )
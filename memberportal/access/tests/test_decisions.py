@@ -0,0 +1,120 @@
+from constance import config
+from access import decisions
+from access.models import DoorLog, Doors, Interlock
+from api_general.models import SiteSession
+from membermatters.testing import MemberMattersTestCase, make_member
+
+
+class SwipeDecisionTests(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.door = Doors.objects.create(
+            name="Front", description="Front door", ip_address="10.0.0.1"
+        )
+        self.member = make_member(1)
+        self.member.doors.add(self.door)
+        SiteSession.objects.create(user=self.member.user)
+
+    def resolve(self, rfid="1001", **kwargs):
+        kwargs.setdefault("device_id", self.door.id)
+        return decisions.resolve_swipe(Doors, rfid, **kwargs)
+
+    def test_granted(self):
+        decision = self.resolve()
+
+        self.assertEqual(decision["result"], decisions.GRANTED)
+        self.assertEqual(decision["profile"]["user_id"], self.member.user_id)
+        self.assertEqual(decision["device"]["id"], self.door.id)
+
+    def test_finds_the_device_by_ip_address(self):
+        decision = self.resolve(device_id=None, ip_address="10.0.0.1")
+
+        self.assertEqual(decision["result"], decisions.GRANTED)
+
+    def test_unknown_member(self):
+        self.assertEqual(self.resolve("9999")["result"], decisions.UNKNOWN_MEMBER)
+
+    def test_unknown_device(self):
+        decision = self.resolve(device_id=self.door.id + 100)
+
+        self.assertEqual(decision["result"], decisions.UNKNOWN_DEVICE)
+        self.assertIsNotNone(decision["profile"])
+
+    def test_no_access(self):
+        self.member.doors.remove(self.door)
+
+        self.assertEqual(self.resolve()["result"], decisions.DENIED)
+
+    def test_inactive_member(self):
+        self.member.state = "inactive"
+        self.member.save()
+
+        self.assertEqual(self.resolve()["result"], decisions.DENIED)
+
+    def test_not_signed_in(self):
+        SiteSession.objects.get(user=self.member.user).signout()
+
+        self.assertEqual(self.resolve()["result"], decisions.NOT_SIGNED_IN)
+
+    def test_changed_device_is_picked_up(self):
+        self.resolve()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.door.locked_out = True
+            self.door.save()
+
+        self.assertEqual(self.resolve()["result"], decisions.LOCKED_OUT)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.door.locked_out = False
+            self.door.exempt_signin = True
+            self.door.save()
+
+        SiteSession.objects.get(user=self.member.user).signout()
+        self.assertEqual(self.resolve()["result"], decisions.GRANTED)
+
+
+class SwipeViewTests(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.door = Doors.objects.create(name="Front", description="Front door")
+        self.interlock = Interlock.objects.create(name="Laser", description="Laser")
+        self.member = make_member(1)
+        self.member.doors.add(self.door)
+        SiteSession.objects.create(user=self.member.user)
+
+    def swipe(self, rfid):
+        return self.client.get(
+            f"/api/door/{self.door.id}/check/{rfid}/",
+            {"secret": config.API_SECRET_KEY},
+        ).json()
+
+    def test_granted_swipe_is_logged(self):
+        response = self.swipe(1001)
+
+        self.assertTrue(response["access"])
+        self.assertEqual(response["name"], "Member1")
+        self.assertTrue(
+            DoorLog.objects.filter(user=self.member.user, door=self.door).exists()
+        )
+
+    def test_denied_swipe_isnt_logged(self):
+        self.member.doors.remove(self.door)
+        response = self.swipe(1001)
+
+        self.assertFalse(response["access"])
+        self.assertFalse(DoorLog.objects.exists())
+
+    def test_unknown_member(self):
+        response = self.swipe(9999)
+
+        self.assertFalse(response["access"])
+        self.assertIn("error", response)
+
+    def test_interlock_without_access_is_rejected(self):
+        response = self.client.get(
+            f"/api/interlock/{self.interlock.id}/check/1001/",
+            {"secret": config.API_SECRET_KEY},
+        ).json()
+
+        self.assertFalse(response["access"])
@@ -0,0 +1,62 @@
+from access import acl
+from access.models import Doors, Interlock
+from membermatters.testing import MemberMattersTestCase, make_member
+
+
+class DefaultAccessTests(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.door = Doors.objects.create(
+            name="Front", description="Front door", all_members=True, exempt_signin=True
+        )
+        self.private = Doors.objects.create(name="Office", description="Office")
+        self.interlock = Interlock.objects.create(
+            name="Drill", description="Drill", all_members=True, exempt_signin=True
+        )
+        self.members = [make_member(number) for number in range(1, 4)]
+
+    def test_everyone_gets_default_doors(self):
+        self.members[0].doors.add(self.door)
+
+        self.assertEqual(acl.grant_default_door_access(), 2)
+
+        for member in self.members:
+            self.assertEqual(list(member.doors.all()), [self.door])
+
+        # the authorised tags are refreshed even though bulk_create sends no signals
+        self.assertEqual(acl.get_authorised_tags(self.door), ["1001", "1002", "1003"])
+
+    def test_nothing_to_add_the_second_time(self):
+        acl.grant_default_door_access()
+
+        self.assertEqual(acl.grant_default_door_access(), 0)
+
+    def test_only_the_given_members(self):
+        self.assertEqual(acl.grant_default_interlock_access([self.members[1].id]), 1)
+
+        self.assertEqual(list(self.members[1].interlocks.all()), [self.interlock])
+        self.assertFalse(self.members[0].interlocks.exists())
+        self.assertEqual(acl.get_authorised_tags(self.interlock), ["1002"])
+
+    def test_queries_dont_grow_with_membership(self):
+        acl.grant_default_door_access()
+
+        # the savepoint, the all_members doors and one insert for each of them
+        with self.assertNumQueries(4):
+            self.assertEqual(acl.grant_default_door_access(), 0)
+
+        for number in range(4, 20):
+            make_member(number)
+
+        self.assertEqual(acl.grant_default_door_access(), 16)
+
+        with self.assertNumQueries(4):
+            self.assertEqual(acl.grant_default_door_access(), 0)
+
+    def test_only_inserted_rows_are_counted(self):
+        self.members[0].interlocks.add(self.interlock)
+
+        self.assertEqual(
+            acl.grant_default_interlock_access([m.id for m in self.members]), 2
+        )
+        self.assertEqual(acl.grant_default_interlock_access([]), 0)
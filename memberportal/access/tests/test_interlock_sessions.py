@@ -0,0 +1,61 @@
+import uuid
+from datetime import timedelta
+from constance import config
+from django.utils import timezone
+from access.models import Interlock, InterlockLog
+from api_general.models import SiteSession
+from membermatters.testing import MemberMattersTestCase, make_member
+
+
+class InterlockSessionTests(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.interlock = Interlock.objects.create(name="Laser", description="Laser")
+        self.member = make_member(1)
+        self.member.interlocks.add(self.interlock)
+        SiteSession.objects.create(user=self.member.user)
+        self.started = timezone.now() - timedelta(minutes=1)
+        self.session = InterlockLog.objects.create(
+            user=self.member.user,
+            interlock=self.interlock,
+            first_heartbeat=self.started,
+            last_heartbeat=self.started,
+        )
+
+    def heartbeat(self, session_id):
+        return self.client.get(
+            f"/api/interlock/session/{session_id}/heartbeat/",
+            {"secret": config.API_SECRET_KEY},
+        ).json()
+
+    def test_heartbeat_keeps_a_running_session_alive(self):
+        self.assertTrue(self.heartbeat(self.session.pk)["access"])
+
+        self.session.refresh_from_db()
+        self.interlock.refresh_from_db()
+        self.assertGreater(self.session.last_heartbeat, self.started)
+        self.assertGreater(self.interlock.last_seen, self.started)
+
+    def test_heartbeat_for_an_ended_session_is_refused(self):
+        InterlockLog.objects.filter(pk=self.session.pk).update(session_complete=True)
+
+        self.assertFalse(self.heartbeat(self.session.pk)["access"])
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.last_heartbeat, self.started)
+
+    def test_heartbeat_for_an_unknown_session(self):
+        with self.assertRaises(InterlockLog.DoesNotExist):
+            InterlockLog.heartbeat_session(uuid.uuid4())
+
+    def test_swipe_starts_a_session(self):
+        response = self.client.get(
+            f"/api/interlock/{self.interlock.id}/check/1001/",
+            {"secret": config.API_SECRET_KEY},
+        ).json()
+
+        self.assertTrue(response["access"])
+        self.assertTrue(
+            InterlockLog.objects.filter(
+                user=self.member.user, session_complete=False
+            ).exclude(pk=self.session.pk)
+        )
@@ -0,0 +1,90 @@
+import threading
+import time
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from access import acl
+from access.models import Doors
+from membermatters.testing import make_member, reset_snapshots
+
+
+@override_settings(ACL_LONG_POLL_INTERVAL=0.1)
+class LongPollTests(TransactionTestCase):
+    # the watcher checks versions from its own thread, so the changes it's
+    # waiting for have to be committed
+
+    def setUp(self):
+        reset_snapshots()
+        self.door = Doors.objects.create(
+            name="Front", description="Front door", exempt_signin=True
+        )
+
+    def change_later(self, change, delay=0.2):
+        def run():
+            time.sleep(delay)
+
+            try:
+                change()
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.addCleanup(thread.join)
+
+    def test_returns_straight_away_if_already_changed(self):
+        acl.bump_version(self.door)
+        self.door.refresh_from_db()
+
+        started = time.monotonic()
+        self.assertTrue(acl.wait_for_change(self.door, 0, timeout=5))
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_times_out_without_a_change(self):
+        started = time.monotonic()
+
+        self.assertFalse(acl.wait_for_change(self.door, 0, timeout=0.3))
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+
+    def test_wakes_up_when_the_tag_list_changes(self):
+        self.change_later(lambda: make_member(1).doors.add(self.door))
+
+        self.assertTrue(acl.wait_for_change(self.door, 0, timeout=5))
+        self.assertEqual(self.door.acl_version, 1)
+
+    def test_notices_a_change_made_by_another_worker(self):
+        # a bare queryset update doesn't wake the watcher, so this is only
+        # seen when it next checks the versions
+        def change():
+            Doors.objects.filter(pk=self.door.pk).update(acl_version=5)
+
+        self.change_later(change)
+
+        self.assertTrue(acl.wait_for_change(self.door, 0, timeout=5))
+        self.assertEqual(self.door.acl_version, 5)
+
+    def test_waiters_share_the_watcher(self):
+        other = Doors.objects.create(name="Back", description="Back door")
+        results = {}
+
+        def wait(device):
+            results[device.pk] = acl.wait_for_change(device, 0, timeout=5)
+
+        threads = [
+            threading.Thread(target=wait, args=(device,))
+            for device in (self.door, other)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        time.sleep(0.1)
+        self.assertEqual(set(acl.watcher.waiters), {self.door.pk, other.pk})
+
+        acl.bump_version(self.door)
+        acl.bump_version(other)
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, {self.door.pk: True, other.pk: True})
+        self.assertFalse(acl.watcher.waiters)
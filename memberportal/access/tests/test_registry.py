@@ -0,0 +1,56 @@
+from access import registry
+from access.models import Doors, Interlock, MemberbucksDevice
+from api_general.models import Kiosk
+from membermatters.testing import MemberMattersTestCase
+
+
+class DeviceRegistryTests(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.door = Doors.objects.create(
+            name="Front", description="Front door", ip_address="10.0.0.1"
+        )
+        self.kiosk = Kiosk.objects.create(name="Kiosk", kiosk_id="abc")
+
+    def test_finds_devices_by_id_or_ip_address(self):
+        self.assertEqual(registry.get_device(Doors, device_id=self.door.id), self.door)
+        self.assertEqual(registry.get_device(Doors, ip_address="10.0.0.1"), self.door)
+        self.assertEqual(registry.get_kiosk("abc"), self.kiosk)
+
+    def test_only_finds_devices_of_the_right_type(self):
+        self.assertIsNone(registry.get_device(Interlock, device_id=self.door.id))
+        self.assertIsNone(registry.get_device(MemberbucksDevice, ip_address="10.0.0.1"))
+        self.assertIsNone(registry.get_device(Doors, device_id=self.door.id + 100))
+
+    def test_lookups_dont_query_the_database(self):
+        registry.get_device(Doors, device_id=self.door.id)
+
+        with self.assertNumQueries(0):
+            registry.get_device(Doors, ip_address="10.0.0.1")
+            registry.get_kiosk("abc")
+
+    def test_hands_out_copies(self):
+        registry.get_device(Doors, device_id=self.door.id).name = "Changed"
+
+        self.assertEqual(
+            registry.get_device(Doors, device_id=self.door.id).name, "Front"
+        )
+
+    def test_changes_are_picked_up(self):
+        registry.get_device(Doors, device_id=self.door.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.door.ip_address = "10.0.0.2"
+            self.door.save()
+            interlock = Interlock.objects.create(name="Laser", description="Laser")
+
+        self.assertIsNone(registry.get_device(Doors, ip_address="10.0.0.1"))
+        self.assertEqual(registry.get_device(Doors, ip_address="10.0.0.2"), self.door)
+        self.assertEqual(
+            registry.get_device(Interlock, device_id=interlock.id), interlock
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.door.delete()
+
+        self.assertIsNone(registry.get_device(Doors, ip_address="10.0.0.2"))
@@ -0,0 +1,133 @@
+from constance import config
+from django.test import override_settings
+from access import acl
+from access.models import AuthorisedTagChange, Doors
+from membermatters.testing import MemberMattersTestCase, make_member
+
+
+class TagChangeTests(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.door = Doors.objects.create(
+            name="Front", description="Front door", exempt_signin=True
+        )
+
+    def get_changes(self, since):
+        self.door.refresh_from_db()
+        return acl.get_tag_changes(self.door, since)
+
+    def test_changes_since_a_version(self):
+        first = make_member(1)
+        first.doors.add(self.door)
+        self.door.refresh_from_db()
+        version = self.door.acl_version
+
+        make_member(2).doors.add(self.door)
+        first.doors.remove(self.door)
+
+        self.assertEqual(
+            self.get_changes(version), {"added": ["1002"], "removed": ["1001"]}
+        )
+
+    def test_tag_added_and_removed_again_cancels_out(self):
+        member = make_member(1)
+        member.doors.add(self.door)
+        self.door.refresh_from_db()
+        version = self.door.acl_version
+
+        member.doors.remove(self.door)
+        member.doors.add(self.door)
+
+        self.assertEqual(self.get_changes(version), {"added": ["1001"], "removed": []})
+
+    def test_up_to_date_controller_gets_no_changes(self):
+        make_member(1).doors.add(self.door)
+        self.door.refresh_from_db()
+
+        self.assertEqual(
+            self.get_changes(self.door.acl_version), {"added": [], "removed": []}
+        )
+
+    def test_full_sync_is_needed(self):
+        make_member(1).doors.add(self.door)
+        make_member(2).doors.add(self.door)
+        self.door.refresh_from_db()
+
+        # no list yet, or a version we've never given out
+        self.assertIsNone(self.get_changes(0))
+        self.assertIsNone(self.get_changes(self.door.acl_version + 1))
+
+        # some of the history has been pruned
+        AuthorisedTagChange.objects.filter(device=self.door, version=2).delete()
+        self.assertIsNone(self.get_changes(1))
+
+    @override_settings(ACL_CHANGE_HISTORY=2)
+    def test_full_sync_when_too_far_behind(self):
+        for number in range(1, 5):
+            make_member(number).doors.add(self.door)
+
+        self.assertIsNone(self.get_changes(1))
+        self.assertFalse(
+            AuthorisedTagChange.objects.filter(device=self.door, version=1).exists()
+        )
+        self.assertEqual(
+            self.get_changes(2), {"added": ["1003", "1004"], "removed": []}
+        )
+
+    def test_lockout_bumps_the_version_without_changing_tags(self):
+        make_member(1).doors.add(self.door)
+        self.door.refresh_from_db()
+        version = self.door.acl_version
+
+        self.door.locked_out = True
+        self.door.save()
+
+        self.assertEqual(self.get_changes(version), {"added": [], "removed": []})
+        self.assertEqual(self.door.acl_version, version + 1)
+
+    def test_saving_a_stale_device_keeps_its_version(self):
+        stale = Doors.objects.get(pk=self.door.pk)
+        make_member(1).doors.add(self.door)
+
+        stale.description = "Renamed"
+        stale.save()
+
+        self.door.refresh_from_db()
+        self.assertEqual(self.door.acl_version, 1)
+        self.assertEqual(self.door.description, "Renamed")
+
+
+class TagChangeViewTests(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.door = Doors.objects.create(
+            name="Front", description="Front door", exempt_signin=True
+        )
+        make_member(1).doors.add(self.door)
+
+    def get(self, version):
+        return self.client.get(
+            f"/api/door/{self.door.id}/authorised/changes/{version}/",
+            {"secret": config.API_SECRET_KEY},
+        ).json()
+
+    def test_new_controller_gets_the_full_list(self):
+        response = self.get(0)
+
+        self.assertTrue(response["full"])
+        self.assertEqual(response["authorised_tags"], ["1001"])
+        self.assertEqual(response["version"], 1)
+
+    def test_controller_gets_what_changed(self):
+        make_member(2).doors.add(self.door)
+        response = self.get(1)
+
+        self.assertFalse(response["full"])
+        self.assertEqual(response["version"], 2)
+        self.assertEqual(response["added"], ["1002"])
+        self.assertEqual(response["removed"], [])
+
+    def test_needs_the_api_secret(self):
+        response = self.client.get(f"/api/door/{self.door.id}/authorised/changes/0/")
+
+        self.assertEqual(response.status_code, 403)
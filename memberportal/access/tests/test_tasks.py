@@ -0,0 +1,25 @@
+from datetime import timedelta
+from django.utils import timezone
+from access.models import Interlock, InterlockLog
+from access.tasks import INTERLOCK_SESSION_TIMEOUT, timeout_interlock_sessions
+from membermatters.testing import MemberMattersTestCase, make_member
+
+
+class InterlockTimeoutTests(MemberMattersTestCase):
+    def test_sessions_without_a_recent_heartbeat_are_ended(self):
+        interlock = Interlock.objects.create(name="Laser", description="Laser")
+        user = make_member(1).user
+        stale = timezone.now() - INTERLOCK_SESSION_TIMEOUT - timedelta(seconds=1)
+
+        timed_out = InterlockLog.objects.create(
+            user=user, interlock=interlock, first_heartbeat=stale, last_heartbeat=stale
+        )
+        running = InterlockLog.objects.create(user=user, interlock=interlock)
+
+        self.assertEqual(timeout_interlock_sessions(), 1)
+        self.assertEqual(timeout_interlock_sessions(), 0)
+
+        timed_out.refresh_from_db()
+        running.refresh_from_db()
+        self.assertTrue(timed_out.session_complete)
+        self.assertFalse(running.session_complete)
@@ -18,6 +18,34 @@ urlpatterns = [
         name="authorised_tags",
     ),
     path("api/door/authorised/", views.authorised_door_tags, name="authorised_tags"),
+    path(
+        "api/door/<int:door>/authorised/changes/<int:version>/",
+        views.door_tag_changes,
+        name="door_tag_changes",
+    ),
+    path(
+        "api/door/authorised/changes/<int:version>/",
+        views.door_tag_changes,
+        name="door_tag_changes",
+    ),
+    path(
+        "api/door/<int:door>/authorised/changes/<int:version>/wait/",
+        views.door_tag_changes,
+        {"wait": True},
+        name="door_tag_changes_wait",
+    ),
+    path(
+        "api/door/authorised/changes/<int:version>/wait/",
+        views.door_tag_changes,
+        {"wait": True},
+        name="door_tag_changes_wait",
+    ),
+    path(
+        "api/door/<int:door>/authorised/bundle/",
+        views.door_acl_bundle,
+        name="door_acl_bundle",
+    ),
+    path("api/door/authorised/bundle/", views.door_acl_bundle, name="door_acl_bundle"),
     path("api/door/<int:door>/checkin/", views.door_checkin, name="door_checkin"),
     path("api/door/checkin/", views.door_checkin, name="door_checkin"),
     path(
@@ -66,6 +94,38 @@ urlpatterns = [
         views.authorised_interlock_tags,
         name="authorised_interlock_tags",
     ),
+    path(
+        "api/interlock/<int:interlock>/authorised/changes/<int:version>/",
+        views.interlock_tag_changes,
+        name="interlock_tag_changes",
+    ),
+    path(
+        "api/interlock/authorised/changes/<int:version>/",
+        views.interlock_tag_changes,
+        name="interlock_tag_changes",
+    ),
+    path(
+        "api/interlock/<int:interlock>/authorised/changes/<int:version>/wait/",
+        views.interlock_tag_changes,
+        {"wait": True},
+        name="interlock_tag_changes_wait",
+    ),
+    path(
+        "api/interlock/authorised/changes/<int:version>/wait/",
+        views.interlock_tag_changes,
+        {"wait": True},
+        name="interlock_tag_changes_wait",
+    ),
+    path(
+        "api/interlock/<int:interlock>/authorised/bundle/",
+        views.interlock_acl_bundle,
+        name="interlock_acl_bundle",
+    ),
+    path(
+        "api/interlock/authorised/bundle/",
+        views.interlock_acl_bundle,
+        name="interlock_acl_bundle",
+    ),
     path(
         "api/interlock/reset-default-access/",
         views.reset_default_interlock_access,
@@ -1,10 +1,20 @@
 from django.http import HttpResponseRedirect, HttpResponseForbidden
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
 from django.contrib.auth.decorators import login_required
 from membermatters.helpers import log_user_event
 from membermatters.decorators import staff_required, api_auth
 from profile.models import User
 from .models import *
+from .acl import (
+    get_authorised_tags,
+    get_tag_changes,
+    grant_default_door_access,
+    grant_default_interlock_access,
+    wait_for_change,
+)
+from . import decisions, registry
+from .bundle import build_acl_bundle
+from .tasks import timeout_interlock_sessions
 from profile.models import Profile
 from django.db.models import *
 from constance import config
@@ -23,11 +33,9 @@ utc = pytz.UTC
 request_timeout = settings.REQUEST_TIMEOUT
 
 
-def play_theme_song(user):
+def play_theme_song(screen_name):
     if config.ENABLE_THEME_SWIPE:
-        url = config.THEME_SWIPE_URL.format(
-            urllib.parse.quote_plus(user.profile.screen_name)
-        )
+        url = config.THEME_SWIPE_URL.format(urllib.parse.quote_plus(screen_name))
 
         try:
             requests.get(url, timeout=request_timeout)
@@ -41,12 +49,12 @@ def play_theme_song(user):
 
 @api_auth
 def check_door_access(request, rfid_code, door_id=None):
-    log_event("TEST.", "error", request)
-    print("TEST2 ({}).".format(request.META.keys()))
-    try:
-        user = Profile.objects.get(rfid=rfid_code).user
+    door_ip = request.META.get("HTTP_X_REAL_IP")
+    decision = decisions.resolve_swipe(Doors, rfid_code, door_id, door_ip)
+    profile = decision["profile"]
+    door = decision["device"]
 
-    except ObjectDoesNotExist:
+    if decision["result"] == decisions.UNKNOWN_MEMBER:
         log_event(
             "Tried to check access for non existent user (or rfid not set).",
             "error",
@@ -65,12 +73,8 @@ def check_door_access(request, rfid_code, door_id=None):
             }
         )
 
-    if door_id is not None:
-        try:
-            door = Doors.objects.get(pk=door_id)
-            door.checkin()
-
-        except ObjectDoesNotExist:
+    if decision["result"] == decisions.UNKNOWN_DEVICE:
+        if door_id is not None:
             log_event("Tried to check access for non existent door.", "error", request)
             print("Tried to check access for non existent door ({}).".format(door_id))
             return JsonResponse(
@@ -81,82 +85,62 @@ def check_door_access(request, rfid_code, door_id=None):
                 }
             )
 
-    else:
-        door_ip = request.META.get("HTTP_X_REAL_IP")
-
-        try:
-            door = Doors.objects.get(ip_address=door_ip)
-            door.checkin()
-
-        except ObjectDoesNotExist:
-            log_event(
-                "Tried to check access for door {} but none found. (or IP not set)".format(
+        log_event(
+            "Tried to check access for door {} but none found. (or IP not set)".format(
+                door_ip
+            ),
+            "error",
+            request,
+        )
+        print(
+            "Tried to check access for non existent door ({}) ip ({}).".format(
+                door_id, door_ip
+            )
+        )
+        return JsonResponse(
+            {
+                "access": False,
+                "error": "Tried to check access for door {} but none found. (or IP not set)".format(
                     door_ip
                 ),
-                "error",
-                request,
-            )
-            print(
-                "Tried to check access for non existent door ({}) ip ({}).".format(
-                    door_id, door_ip
-                )
-            )
-            return JsonResponse(
-                {
-                    "access": False,
-                    "error": "Tried to check access for door {} but none found. (or IP not set)".format(
-                        door_ip
-                    ),
-                    "timestamp": round(time.time()),
-                }
-            )
+                "timestamp": round(time.time()),
+            }
+        )
 
-    if user.profile.state == "active":
-        allowed_doors = user.profile.doors.all()
+    full_name = profile["first_name"] + " " + profile["last_name"]
 
-        if door.locked_out:
-            post_interlock_swipe_to_discord(
-                user.profile.get_full_name(), door.name, "maintenance_lock_out"
-            )
-            return JsonResponse(
-                {
-                    "access": False,
-                    "error": "Maintenance lockout enabled.",
-                    "timestamp": round(time.time()),
-                }
-            )
+    if decision["result"] == decisions.LOCKED_OUT:
+        decisions.record_swipe(decision)
+        post_interlock_swipe_to_discord(
+            full_name,
+            door["name"],
+            "maintenance_lock_out",
+        )
+        return JsonResponse(
+            {
+                "access": False,
+                "error": "Maintenance lockout enabled.",
+                "timestamp": round(time.time()),
+            }
+        )
 
-        if allowed_doors:
-            if door in allowed_doors:
-                # user has access
-
-                # if the user isn't signed into site and the door isn't exempt from this
-                if (
-                    not user.profile.is_signed_into_site()
-                    and door.exempt_signin is False
-                ):
-                    user.profile.update_last_seen()
-                    post_door_swipe_to_discord(
-                        user.profile.get_full_name(), door.name, "not_signed_in"
-                    )
-                    return JsonResponse(
-                        {"access": False, "name": user.profile.first_name}
-                    )
-
-                door.log_access(user.id)
-                user.profile.update_last_seen()
-                post_door_swipe_to_discord(
-                    user.profile.get_full_name(), door.name, True
-                )
-                if door.play_theme:
-                    play_theme_song(user)
+    if decision["result"] == decisions.NOT_SIGNED_IN:
+        decisions.record_swipe(decision)
+        post_door_swipe_to_discord(full_name, door["name"], "not_signed_in")
+        return JsonResponse({"access": False, "name": profile["first_name"]})
 
-                return JsonResponse({"access": True, "name": user.profile.first_name})
+    if decision["result"] == decisions.GRANTED:
+        decisions.record_swipe(decision, log_door_access=True)
+        post_door_swipe_to_discord(full_name, door["name"], True)
+        if door["play_theme"]:
+            decisions.defer(play_theme_song, profile["screen_name"])
+
+        return JsonResponse({"access": True, "name": profile["first_name"]})
 
     # if the are inactive or don't have access
-    user.profile.update_last_seen()
-    post_door_swipe_to_discord(user.profile.get_full_name(), door.name, False)
-    return JsonResponse({"access": False, "name": user.profile.first_name})
+    decisions.record_swipe(decision)
+    post_door_swipe_to_discord(full_name, door["name"], False)
+    return JsonResponse({"access": False, "name": profile["first_name"]})
 
 
 @login_required
@@ -190,29 +174,30 @@ def reboot_door(request, door_id):
     return JsonResponse({"success": door.reboot()})
 
 
-def get_door_tags(door, return_hash=False):
+def get_device(model, device):
+    """
+    Finds a door or interlock by its id, falling back to its IP address.
+    :param model: Doors or Interlock
+    :param device: the id or IP address of the device
+    :return: the device or None if it doesn't exist
+    """
     try:
-        door = Doors.objects.get(pk=door)
+        found = registry.get_device(model, device_id=int(device))
 
-    except (ObjectDoesNotExist, ValueError):
-        try:
-            door = Doors.objects.get(ip_address=door)
+    except (TypeError, ValueError):
+        found = None
 
-        except ObjectDoesNotExist:
-            return False
+    return found or registry.get_device(model, ip_address=device)
 
-        except TypeError:
-            return False
 
-    door.checkin()
-    authorised_tags = list()
+def get_door_tags(door, return_hash=False):
+    door = get_device(Doors, door)
 
-    for profile in Profile.objects.all():
-        if door in profile.doors.all() and profile.state == "active":
-            if profile.rfid and (
-                profile.is_signed_into_site() or door.exempt_signin is True
-            ):
-                authorised_tags.append(profile.rfid)
+    if door is None:
+        return False
+
+    door.checkin()
+    authorised_tags = get_authorised_tags(door)
 
     if return_hash:
         return hashlib.md5(str(authorised_tags).encode("utf-8")).hexdigest()
@@ -222,28 +207,13 @@ def get_door_tags(door, return_hash=False):
 
 
 def get_interlock_tags(interlock, return_hash=False):
-    try:
-        interlock = Interlock.objects.get(pk=interlock)
-
-    except (ObjectDoesNotExist, ValueError):
-        try:
-            interlock = Interlock.objects.get(ip_address=interlock)
-
-        except ObjectDoesNotExist:
-            return False
+    interlock = get_device(Interlock, interlock)
 
-        except TypeError:
-            return False
+    if interlock is None:
+        return False
 
     interlock.checkin()
-    authorised_tags = list()
-
-    for profile in Profile.objects.all():
-        if interlock in profile.interlocks.all() and profile.state == "active":
-            if profile.rfid and (
-                profile.is_signed_into_site() or interlock.exempt_signin is True
-            ):
-                authorised_tags.append(profile.rfid)
+    authorised_tags = get_authorised_tags(interlock)
 
     if return_hash:
         return hashlib.md5(str(authorised_tags).encode("utf-8")).hexdigest()
@@ -252,6 +222,157 @@ def get_interlock_tags(interlock, return_hash=False):
         return authorised_tags
 
 
+def get_tag_changes_response(device, version, wait=False):
+    """
+    Builds the response for a controller asking what changed in its authorised
+    tag list since the version it has. If we can't work that out (ie it's too
+    far behind) we send the full list instead. If wait is set this is a long
+    poll, and we hold the request until something changes (or we time out).
+    """
+    device.checkin()
+    device.refresh_from_db(fields=["acl_version"])
+
+    if wait:
+        wait_for_change(device, version, settings.ACL_LONG_POLL_TIMEOUT)
+
+    changes = get_tag_changes(device, version)
+
+    if changes is None:
+        tags = get_authorised_tags(device)
+
+        return JsonResponse(
+            {
+                "success": True,
+                "full": True,
+                "version": device.acl_version,
+                "authorised_tags": tags,
+                "authorised_tags_hash": hashlib.md5(
+                    str(tags).encode("utf-8")
+                ).hexdigest(),
+                "timestamp": round(time.time()),
+            }
+        )
+
+    return JsonResponse(
+        {
+            "success": True,
+            "full": False,
+            "version": device.acl_version,
+            "added": changes["added"],
+            "removed": changes["removed"],
+            "timestamp": round(time.time()),
+        }
+    )
+
+
+@api_auth
+def door_tag_changes(request, version, door=None, wait=False):
+    if door is None:
+        door = request.META.get("HTTP_X_REAL_IP")
+
+    device = get_device(Doors, door)
+
+    if device is None:
+        log_event(
+            "Tried to get tag changes for non existent door {}.".format(door),
+            "error",
+            request,
+        )
+        return JsonResponse(
+            {
+                "success": False,
+                "error": "Error door does not exist.",
+                "timestamp": round(time.time()),
+            }
+        )
+
+    return get_tag_changes_response(device, version, wait)
+
+
+@api_auth
+def interlock_tag_changes(request, version, interlock=None, wait=False):
+    if interlock is None:
+        interlock = request.META.get("HTTP_X_REAL_IP")
+
+    device = get_device(Interlock, interlock)
+
+    if device is None:
+        log_event(
+            "Tried to get tag changes for non existent interlock {}.".format(interlock),
+            "error",
+            request,
+        )
+        return JsonResponse(
+            {
+                "success": False,
+                "error": "Error interlock does not exist.",
+                "timestamp": round(time.time()),
+            }
+        )
+
+    return get_tag_changes_response(device, version, wait)
+
+
+def get_acl_bundle_response(device):
+    device.checkin()
+    device.refresh_from_db(fields=["acl_version", "locked_out", "exempt_signin"])
+
+    response = HttpResponse(
+        build_acl_bundle(device), content_type="application/octet-stream"
+    )
+    response["X-ACL-Version"] = device.acl_version
+
+    return response
+
+
+@api_auth
+def door_acl_bundle(request, door=None):
+    if door is None:
+        door = request.META.get("HTTP_X_REAL_IP")
+
+    device = get_device(Doors, door)
+
+    if device is None:
+        log_event(
+            "Tried to get ACL bundle for non existent door {}.".format(door),
+            "error",
+            request,
+        )
+        return JsonResponse(
+            {
+                "success": False,
+                "error": "Error door does not exist.",
+                "timestamp": round(time.time()),
+            }
+        )
+
+    return get_acl_bundle_response(device)
+
+
+@api_auth
+def interlock_acl_bundle(request, interlock=None):
+    if interlock is None:
+        interlock = request.META.get("HTTP_X_REAL_IP")
+
+    device = get_device(Interlock, interlock)
+
+    if device is None:
+        log_event(
+            "Tried to get ACL bundle for non existent interlock {}.".format(interlock),
+            "error",
+            request,
+        )
+        return JsonResponse(
+            {
+                "success": False,
+                "error": "Error interlock does not exist.",
+                "timestamp": round(time.time()),
+            }
+        )
+
+    return get_acl_bundle_response(device)
+
+
 @api_auth
 def interlock_checkin(request, interlock=None):
     if interlock is not None:
@@ -467,9 +588,7 @@ def check_interlock_access(request, rfid_code=None, interlock_id=None, session_i
     interlock_ip = None
 
     if session_id is not None:
-        session = InterlockLog.objects.get(pk=session_id)
-        if not session.session_complete:
-            session.heartbeat()
+        if InterlockLog.heartbeat_session(session_id):
             return JsonResponse({"access": True, "timestamp": round(time.time())})
 
         else:
@@ -481,10 +600,12 @@ def check_interlock_access(request, rfid_code=None, interlock_id=None, session_i
                 }
             )
 
-    try:
-        user = Profile.objects.get(rfid=rfid_code).user
+    interlock_ip = request.META.get("HTTP_X_REAL_IP")
+    decision = decisions.resolve_swipe(Interlock, rfid_code, interlock_id, interlock_ip)
+    profile = decision["profile"]
+    interlock = decision["device"]
 
-    except ObjectDoesNotExist:
+    if decision["result"] == decisions.UNKNOWN_MEMBER:
         log_event(
             "Tried to check access for non existent user (or rfid not set).",
             "error",
@@ -503,12 +624,8 @@ def check_interlock_access(request, rfid_code=None, interlock_id=None, session_i
             }
         )
 
-    if interlock_id is not None:
-        try:
-            interlock = Interlock.objects.get(pk=interlock_id)
-            interlock.checkin()
-
-        except ObjectDoesNotExist:
+    if decision["result"] == decisions.UNKNOWN_DEVICE:
+        if interlock_id is not None:
             log_event(
                 "Tried to check access for non existent interlock.", "error", request
             )
@@ -525,91 +642,73 @@ def check_interlock_access(request, rfid_code=None, interlock_id=None, session_i
                 }
             )
 
-    else:
-        interlock_ip = request.META.get("HTTP_X_REAL_IP")
-
-        try:
-            interlock = Interlock.objects.get(ip_address=interlock_ip)
-            interlock.checkin()
-
-        except ObjectDoesNotExist:
-            log_event(
-                "Tried to check access for {} interlock but none found.".format(
+        log_event(
+            "Tried to check access for {} interlock but none found.".format(
+                interlock_ip
+            ),
+            "error",
+            request,
+        )
+        print(
+            "Tried to check access for non existent interlock ({}) ip ({}).".format(
+                interlock_id, interlock_ip
+            )
+        )
+        return JsonResponse(
+            {
+                "access": False,
+                "error": "Tried to check access for {} interlock but none found.".format(
                     interlock_ip
                 ),
-                "error",
-                request,
-            )
-            print(
-                "Tried to check access for non existent interlock ({}) ip ({}).".format(
-                    interlock_id, interlock_ip
-                )
-            )
-            return JsonResponse(
-                {
-                    "access": False,
-                    "error": "Tried to check access for {} interlock but none found.".format(
-                        interlock_ip
-                    ),
-                    "timestamp": round(time.time()),
-                }
-            )
+                "timestamp": round(time.time()),
+            }
+        )
 
-    if user.profile.state == "active":
-        if interlock.locked_out:
-            post_interlock_swipe_to_discord(
-                user.profile.get_full_name(), interlock.name, "maintenance_lock_out"
-            )
-            return JsonResponse(
-                {
-                    "access": False,
-                    "error": "Maintenance lockout enabled.",
-                    "timestamp": round(time.time()),
-                }
-            )
+    full_name = profile["first_name"] + " " + profile["last_name"]
 
-        allowed_interlocks = user.profile.interlocks.all()
-
-        if allowed_interlocks:
-            if interlock in allowed_interlocks:
-                # user has access
-
-                # if the user isn't signed into site and the interlock isn't exempt
-                if (
-                    not user.profile.is_signed_into_site()
-                    and interlock.exempt_signin is False
-                ):
-                    user.profile.update_last_seen()
-                    post_door_swipe_to_discord(
-                        user.profile.get_full_name(), interlock.name, "not_signed_in"
-                    )
-                    return JsonResponse(
-                        {"access": False, "name": user.profile.first_name}
-                    )
-
-                session = interlock.create_session(user)
-                user.profile.update_last_seen()
-                post_interlock_swipe_to_discord(
-                    user.profile.get_full_name(), interlock.name, "activated"
-                )
-                if interlock.play_theme:
-                    play_theme_song(user)
-
-                return JsonResponse(
-                    {
-                        "access": True,
-                        "session_id": session.id,
-                        "timestamp": round(time.time()),
-                        "name": user.profile.first_name,
-                    }
-                )
+    if decision["result"] == decisions.LOCKED_OUT:
+        decisions.record_swipe(decision)
+        post_interlock_swipe_to_discord(
+            full_name,
+            interlock["name"],
+            "maintenance_lock_out",
+        )
+        return JsonResponse(
+            {
+                "access": False,
+                "error": "Maintenance lockout enabled.",
+                "timestamp": round(time.time()),
+            }
+        )
+
+    if decision["result"] == decisions.NOT_SIGNED_IN:
+        decisions.record_swipe(decision)
+        post_door_swipe_to_discord(full_name, interlock["name"], "not_signed_in")
+        return JsonResponse({"access": False, "name": profile["first_name"]})
+
+    if decision["result"] == decisions.GRANTED:
+        # the session id goes back to the interlock so this can't be deferred
+        session = InterlockLog.objects.create(
+            user_id=profile["user_id"], interlock_id=interlock["id"]
+        )
+        decisions.record_swipe(decision)
+        post_interlock_swipe_to_discord(full_name, interlock["name"], "activated")
+        if interlock["play_theme"]:
+            decisions.defer(play_theme_song, profile["screen_name"])
+
+        return JsonResponse(
+            {
+                "access": True,
+                "session_id": session.id,
+                "timestamp": round(time.time()),
+                "name": profile["first_name"],
+            }
+        )
 
     # if they are inactive or don't have access
-    user.profile.update_last_seen()
-    post_interlock_swipe_to_discord(
-        user.profile.get_full_name(), interlock.name, "rejected"
-    )
-    return JsonResponse({"access": False, "name": user.profile.first_name})
+    decisions.record_swipe(decision)
+    post_interlock_swipe_to_discord(full_name, interlock["name"], "rejected")
+    return JsonResponse({"access": False, "name": profile["first_name"]})
 
 
 @api_auth
@@ -617,12 +716,13 @@ def memberbucks_device_checkin(request, device_id=None):
     device_ip = None
 
     if device_id is not None:
-        try:
-            device = MemberbucksDevice.objects.get(pk=device_id)
+        device = registry.get_device(MemberbucksDevice, device_id=device_id)
+
+        if device:
             device.checkin()
             return JsonResponse({"success": True, "timestamp": round(time.time())})
 
-        except ObjectDoesNotExist:
+        else:
             log_event(
                 f"Tried to check access for non existent {config.MEMBERBUCKS_NAME} device.",
                 "error",
@@ -637,13 +737,14 @@ def memberbucks_device_checkin(request, device_id=None):
             )
 
     else:
-        try:
-            device_ip = request.META.get("HTTP_X_REAL_IP")
-            device = MemberbucksDevice.objects.get(ip_address=device_ip)
+        device_ip = request.META.get("HTTP_X_REAL_IP")
+        device = registry.get_device(MemberbucksDevice, ip_address=device_ip)
+
+        if device:
             device.checkin()
             return JsonResponse({"success": True, "timestamp": round(time.time())})
 
-        except ObjectDoesNotExist:
+        else:
             log_event(
                 f"Tried to check access for {device_ip} {config.MEMBERBUCKS_NAME} device but none found.",
                 "error",
@@ -660,24 +761,9 @@ def memberbucks_device_checkin(request, device_id=None):
 
 @api_auth
 def interlock_cron(request):
-    timedout_interlocks = InterlockLog.objects.filter(
-        last_heartbeat__lt=timezone.now() - timedelta(minutes=2), session_complete=False
-    )
-
-    if timedout_interlocks:
-        for session in timedout_interlocks:
-            session.session_complete = True
-            session.save()
-            session.interlock.checkin()
-            on_time = humanize.naturaldelta(
-                session.last_heartbeat - session.first_heartbeat
-            )
-            post_interlock_swipe_to_discord(
-                session.user.profile.get_full_name(),
-                session.interlock.name,
-                "left_on",
-                on_time,
-            )
+    # interlock sessions are timed out by the scheduler now, this is kept so
+    # existing cron jobs don't break
+    timeout_interlock_sessions()
 
     return HttpResponseRedirect("/")
 
@@ -720,15 +806,10 @@ def end_interlock_session(request, session_id, rfid=None):
 
 @api_auth
 def reset_default_door_access(request):
-    users = User.objects.all()
-    doors = Doors.objects.filter(all_members=True)
-
     try:
-        for user in users:
-            for door in doors:
-                user.profile.doors.add(door)
+        added = grant_default_door_access()
 
-        return JsonResponse({"success": True})
+        return JsonResponse({"success": True, "added": added})
 
     except:
         return JsonResponse(
@@ -741,15 +822,10 @@ def reset_default_door_access(request):
 
 @api_auth
 def reset_default_interlock_access(request):
-    users = User.objects.all()
-    interlocks = Interlock.objects.filter(all_members=True)
-
     try:
-        for user in users:
-            for interlock in interlocks:
-                user.profile.interlocks.add(interlock)
+        added = grant_default_interlock_access()
 
-        return JsonResponse({"success": True})
+        return JsonResponse({"success": True, "added": added})
 
     except Exception as e:
         return JsonResponse(
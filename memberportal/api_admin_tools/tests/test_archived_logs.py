@@ -0,0 +1,56 @@
+from django.test import override_settings
+from django.utils import timezone
+from membermatters.testing import make_member
+from profile import log_archive
+from profile.tests.test_log_archive import LogArchiveTestCase
+
+
+class ArchivedLogsViewTests(LogArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        log_archive.archive_old_logs()
+
+        staff = make_member(2)
+        staff.user.staff = True
+        staff.user.save()
+        self.client.force_login(staff.user)
+
+    def get(self, **params):
+        return self.client.get("/api/admin/logs/archive/", params)
+
+    def test_admins_can_read_the_archive(self):
+        day = timezone.localtime(self.old).date().isoformat()
+        response = self.get(**{"from": day, "to": day, "memberId": self.user.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["logs"]), 3)
+        self.assertFalse(response.json()["truncated"])
+
+    @override_settings(LOG_ARCHIVE_QUERY_MAX_LOGS=2)
+    def test_results_are_truncated(self):
+        day = timezone.localtime(self.old).date().isoformat()
+        response = self.get(**{"from": day, "to": day})
+
+        self.assertEqual(len(response.json()["logs"]), 2)
+        self.assertTrue(response.json()["truncated"])
+
+    def test_bad_ranges_are_refused(self):
+        self.assertEqual(self.get().status_code, 400)
+        self.assertEqual(
+            self.get(**{"from": "2021-02-01", "to": "2021-01-01"}).status_code, 400
+        )
+        self.assertEqual(
+            self.get(**{"from": "2021-01-01", "to": "2021-03-01"}).status_code, 400
+        )
+        self.assertEqual(
+            self.get(
+                **{"from": "2021-01-01", "to": "2021-01-02", "memberId": "x"}
+            ).status_code,
+            400,
+        )
+
+    def test_only_admins_can_read_the_archive(self):
+        self.client.force_login(self.user)
+        day = timezone.localtime(self.old).date().isoformat()
+
+        self.assertEqual(self.get(**{"from": day, "to": day}).status_code, 403)
@@ -0,0 +1,68 @@
+import datetime
+from django.utils import timezone
+from membermatters.testing import MemberMattersTestCase, make_member
+from profile.models import UserEventLog
+
+
+class MemberLogsViewTests(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.member = make_member(1)
+        # midday (local time) so each day's logs can't straddle midnight
+        self.now = timezone.localtime().replace(hour=12)
+
+        # two logs share each date so pages have to break ties on the id
+        for i in range(6):
+            UserEventLog.objects.create(
+                user=self.member.user,
+                logtype="door" if i % 2 else "stripe",
+                description=f"log {i}",
+                data="",
+                date=self.now - datetime.timedelta(days=i // 2),
+            )
+
+        staff = make_member(2)
+        staff.user.staff = True
+        staff.user.save()
+        self.client.force_login(staff.user)
+
+    def get(self, **params):
+        return self.client.get(
+            f"/api/admin/members/{self.member.user.id}/logs/", params
+        )
+
+    def test_pages_cover_every_log_once(self):
+        descriptions = []
+        params = {"limit": 4}
+
+        while True:
+            response = self.get(**params).json()
+            descriptions += [log["description"] for log in response["logs"]]
+
+            if not response["nextCursor"]:
+                break
+
+            params["cursor"] = response["nextCursor"]
+
+        self.assertEqual(descriptions, [f"log {i}" for i in (1, 0, 3, 2, 5, 4)])
+
+    def test_last_page_has_no_cursor(self):
+        self.assertIsNone(self.get(limit=10).json()["nextCursor"])
+
+    def test_filters(self):
+        logs = self.get(logtype="door").json()["logs"]
+        self.assertEqual(
+            [log["description"] for log in logs], ["log 1", "log 3", "log 5"]
+        )
+
+        day = (self.now - datetime.timedelta(days=1)).date().isoformat()
+        logs = self.get(**{"from": day, "to": day}).json()["logs"]
+        self.assertEqual([log["description"] for log in logs], ["log 3", "log 2"])
+
+    def test_bad_params_are_refused(self):
+        self.assertEqual(self.get(cursor="!!!").status_code, 400)
+        self.assertEqual(self.get(limit="lots").status_code, 400)
+
+    def test_members_cant_read_logs(self):
+        self.client.force_login(self.member.user)
+        self.assertEqual(self.get().status_code, 403)
@@ -5,6 +5,7 @@ from . import views
 
 urlpatterns = [
     path("members/", views.GetMembers.as_view(), name="GetMembers"),
+    path("logs/archive/", views.ArchivedLogs.as_view(), name="ArchivedLogs"),
     path(
         "members/<int:member_id>/state/<str:state>/",
         views.MemberState.as_view(),
@@ -35,6 +36,16 @@ urlpatterns = [
         views.MemberBillingInfo.as_view(),
         name="MemberBillingInfo",
     ),
+    path(
+        "members/<int:member_id>/memberbucks/",
+        views.MemberMemberbucksHistory.as_view(),
+        name="MemberMemberbucksHistory",
+    ),
+    path(
+        "members/<int:member_id>/logs/",
+        views.MemberLogs.as_view(),
+        name="MemberLogs",
+    ),
     path(
         "members/<int:member_id>/invoice/<str:send_email>/",
         views.MemberCreateNewInvoice.as_view(),
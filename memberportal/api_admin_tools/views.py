@@ -1,7 +1,9 @@
 from profile.models import User
 from access import models
+from access.acl import grant_default_door_access, grant_default_interlock_access
 from .models import MemberTier, PaymentPlan
 from memberbucks.models import MemberBucks
+from memberbucks.history import get_history_page
 from constance import config
 from services.emails import send_single_email
 import json
@@ -20,6 +22,11 @@ from rest_framework import status
 from rest_framework.views import APIView
 import humanize
 from django.db import connection
+from membermatters.helpers import get_page_params, make_cursor
+from profile.log_archive import read_archived_logs
+from django.conf import settings
+from django.utils.dateparse import parse_date
+from itertools import islice
 
 
 class GetMembers(APIView):
@@ -77,13 +84,9 @@ class MakeMember(APIView):
 
         # if they're a new member or account only
         if user.profile.state == "noob" or user.profile.state == "accountonly":
-            # give default door access
-            for door in models.Doors.objects.filter(all_members=True):
-                user.profile.doors.add(door)
-
-            # give default interlock access
-            for interlock in models.Interlock.objects.filter(all_members=True):
-                user.profile.interlocks.add(interlock)
+            # give default door and interlock access
+            grant_default_door_access([user.profile.id])
+            grant_default_interlock_access([user.profile.id])
 
             # send the welcome email
             email = user.email_welcome()
@@ -623,10 +626,8 @@ class MemberBillingInfo(APIView):
             else:
                 billing_info["subscription"] = None
 
-        # get the most recent memberbucks transactions and order them by date
-        recent_transactions = MemberBucks.objects.filter(user=request.user).order_by(
-            "date"
-        )[::-1][:100]
+        # get the most recent memberbucks transactions
+        recent_transactions = MemberBucks.get_history(member.id, limit=100)
 
         def get_transaction(transaction):
             return transaction.get_transaction_display()
@@ -639,3 +640,103 @@ class MemberBillingInfo(APIView):
         }
 
         return Response(billing_info)
+
+
+class MemberLogs(APIView):
+    """
+    get: This method gets a page of a member's logs, newest first. Optionally
+    filtered by logtype and a from/to date range. Pass the nextCursor from the
+    previous page as cursor to get the next one.
+    """
+
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request, member_id):
+        member = User.objects.get(id=member_id)
+        params = request.query_params
+
+        try:
+            page = get_page_params(params)
+
+        except (TypeError, ValueError):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        logs = list(
+            member.profile.get_logs(logtype=params.get("logtype"), **page).values(
+                "id", "logtype", "description", "data", "date"
+            )
+        )
+
+        next_cursor = None
+
+        if len(logs) == page["limit"]:
+            next_cursor = make_cursor(logs[-1]["date"], logs[-1]["id"])
+
+        return Response({"logs": logs, "nextCursor": next_cursor})
+
+
+class MemberMemberbucksHistory(APIView):
+    """
+    get: This method gets a page of a member's memberbucks transactions, newest
+    first. Optionally filtered by a from/to date range. Pass the nextCursor from
+    the previous page as cursor to get the next one.
+    """
+
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request, member_id):
+        member = User.objects.get(id=member_id)
+
+        try:
+            return Response(get_history_page(member.id, request.query_params))
+
+        except (TypeError, ValueError):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+
+class ArchivedLogs(APIView):
+    """
+    get: This method reads logs back out of the log archive (see
+    profile/log_archive.py). Takes a from and to date (inclusive), and
+    optionally a logtype and memberId (user id) to filter by.
+    """
+
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        params = request.query_params
+
+        try:
+            start = parse_date(params.get("from", ""))
+            end = parse_date(params.get("to", ""))
+            user_id = int(params["memberId"]) if params.get("memberId") else None
+
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        if start is None or end is None or end < start:
+            return Response(
+                "A from and to date are required.", status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if (end - start).days >= settings.LOG_ARCHIVE_QUERY_MAX_DAYS:
+            return Response(
+                f"A maximum of {settings.LOG_ARCHIVE_QUERY_MAX_DAYS} days can be read at once.",
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        logs = list(
+            islice(
+                read_archived_logs(
+                    start, end, logtype=params.get("logtype"), user_id=user_id
+                ),
+                settings.LOG_ARCHIVE_QUERY_MAX_LOGS + 1,
+            )
+        )
+
+        return Response(
+            {
+                "logs": logs[: settings.LOG_ARCHIVE_QUERY_MAX_LOGS],
+                "truncated": len(logs) > settings.LOG_ARCHIVE_QUERY_MAX_LOGS,
+            }
+        )
@@ -2,7 +2,7 @@ import python_http_client.exceptions
 
 from profile.models import Profile
 from profile.xerohelpers import create_stripe_membership_invoice
-from access.models import Doors, Interlock
+from access.acl import grant_default_door_access, grant_default_interlock_access
 from api_admin_tools.models import *
 
 from rest_framework import status, permissions
@@ -438,13 +438,9 @@ class CompleteSignup(StripeAPIView):
             member.activate()
             send_submitted_application_emails(member)
 
-            # give default door access
-            for door in Doors.objects.filter(all_members=True):
-                member.doors.add(door)
-
-            # give default interlock access
-            for interlock in Interlock.objects.filter(all_members=True):
-                member.interlocks.add(interlock)
+            # give default door and interlock access
+            grant_default_door_access([member.id])
+            grant_default_interlock_access([member.id])
 
             member.user.email_welcome()
 
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class ApiGeneralConfig(AppConfig):
+    name = "api_general"
+
+    def ready(self):
+        # connects the receivers that keep the site config and presence snapshots up to date
+        from . import signals
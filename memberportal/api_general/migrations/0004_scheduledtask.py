@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:16
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api_general", "0003_auto_20211005_0015"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduledTask",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        max_length=200,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="Name",
+                    ),
+                ),
+                ("next_run", models.DateTimeField(default=django.utils.timezone.now)),
+                ("last_run", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api_general", "0005_snapshotversion"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="sitesession",
+            index=models.Index(
+                fields=["user", "signout_date"], name="api_general_user_id_f4bb5d_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api_general", "0006_sitesession_user_signout_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sitesession",
+            name="auto_signout",
+            field=models.BooleanField(
+                default=False,
+                verbose_name="Automatically signed out after the maximum session length",
+            ),
+        ),
+    ]
@@ -4,6 +4,7 @@ from django.utils import timezone
 import pytz
 from django.conf import settings
 from uuid import uuid4
+from membermatters.heartbeats import record_heartbeat
 
 utc = pytz.UTC
 
@@ -19,9 +20,20 @@ class Kiosk(models.Model):
     play_theme = models.BooleanField("Play theme on door swipe", default=False)
     authorised = models.BooleanField("Is this kiosk authorised?", default=False)
 
+    def save(self, *args, **kwargs):
+        # last_seen is only changed by the heartbeat flush, so don't overwrite
+        # it with whatever we happened to load
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "last_seen"
+            ]
+
+        super().save(*args, **kwargs)
+
     def checkin(self):
-        self.last_seen = timezone.now()
-        self.save()
+        self.last_seen = record_heartbeat(Kiosk, self.pk)
 
     def get_unavailable(self):
         if self.last_seen:
@@ -40,6 +52,12 @@ class SiteSession(models.Model):
     signin_date = models.DateTimeField(default=timezone.now)
     signout_date = models.DateTimeField(null=True, blank=True)
     guests = models.TextField(default="[]")
+    auto_signout = models.BooleanField(
+        "Automatically signed out after the maximum session length", default=False
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "signout_date"])]
 
     def signout(self):
         self.signout_date = timezone.now()
@@ -54,3 +72,32 @@ class EmailVerificationToken(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     creation_date = models.DateTimeField(default=timezone.now)
     verification_token = models.UUIDField(default=uuid4)
+
+
+class ScheduledTask(models.Model):
+    """
+    Keeps track of when each periodic task (see membermatters/scheduler.py) is
+    next due. Every gunicorn worker runs a scheduler, so this row is also the
+    lock that makes sure only one of them runs the task each time it's due.
+    """
+
+    name = models.CharField("Name", max_length=200, primary_key=True)
+    next_run = models.DateTimeField(default=timezone.now)
+    last_run = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class SnapshotVersion(models.Model):
+    """
+    A version number for each in-process snapshot (see membermatters/snapshots.py)
+    that's bumped whenever the data it's built from changes, so that every
+    worker knows to reload its copy.
+    """
+
+    name = models.CharField("Name", max_length=100, primary_key=True)
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} - v{self.version}"
@@ -0,0 +1,64 @@
+"""
+Keeps the roster of who's signed into the site for the statistics screen.
+Everyone with an open SiteSession is kept in an in-process snapshot that's
+reloaded (with one query) whenever someone signs in or out (see signals.py), so
+showing who's here doesn't need any queries. Other workers only notice a sign
+in or out when they next check the snapshot's version, so the roster can be up
+to SNAPSHOT_CHECK_INTERVAL seconds out of date. Anything that decides access
+(ie the authorised tag index and swipes) checks SiteSession itself.
+"""
+
+import ast
+from membermatters.snapshots import Snapshot
+from .models import SiteSession
+
+
+def count_guests(guests):
+    """
+    Counts the guests a member signed in with. They're stored as the string
+    version of a list.
+    :param guests: SiteSession.guests
+    :return: int
+    """
+    try:
+        return len(ast.literal_eval(guests or "[]"))
+
+    except (ValueError, SyntaxError, TypeError):
+        return 0
+
+
+def load_presence():
+    sessions = (
+        SiteSession.objects.filter(signout_date=None)
+        .order_by("-signin_date")
+        .values(
+            "user_id",
+            "signin_date",
+            "guests",
+            "user__profile__first_name",
+            "user__profile__last_name",
+        )
+    )
+    return tuple(
+        {
+            "userId": session["user_id"],
+            "name": "{} {}".format(
+                session["user__profile__first_name"],
+                session["user__profile__last_name"],
+            ),
+            "signinDate": session["signin_date"],
+            "guests": count_guests(session["guests"]),
+        }
+        for session in sessions
+    )
+
+
+presence = Snapshot("presence", load_presence)
+
+
+def get_roster():
+    """
+    Returns everyone that's signed into the site, most recent first.
+    :return: [{"userId": int, "name": str, "signinDate": datetime, "guests": int}]
+    """
+    return [dict(member) for member in presence.get()]
@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from profile.models import MemberTypes
+from .models import SiteSession
+from .presence import presence
+from .site_config import site_config
+
+
+@receiver(post_save, sender=MemberTypes)
+@receiver(post_delete, sender=MemberTypes)
+def member_types_changed(sender, instance, **kwargs):
+    transaction.on_commit(site_config.invalidate)
+
+
+@receiver(post_save, sender=SiteSession)
+@receiver(post_delete, sender=SiteSession)
+def site_session_changed(sender, instance, **kwargs):
+    transaction.on_commit(presence.invalidate)
@@ -0,0 +1,99 @@
+"""
+The site config returned by GetConfig is the same for everyone (other than the
+loggedIn flag) so it's built once, serialised and kept in a snapshot along with
+an ETag. It's rebuilt when the constance config or member types change.
+"""
+
+import hashlib
+import json
+from constance import config
+from rest_framework.utils.encoders import JSONEncoder
+from membermatters.constance_backend import config_values
+from membermatters.snapshots import Snapshot
+from profile.models import MemberTypes
+
+
+def build_site_config(logged_in):
+    membership_types = list(MemberTypes.objects.values())
+
+    features = {
+        "memberbucks_topup_options": json.loads(
+            config.STRIPE_MEMBERBUCKS_TOPUP_OPTIONS
+        ),
+        "trelloIntegration": config.ENABLE_TRELLO_INTEGRATION,
+        "enableProxyVoting": config.ENABLE_PROXY_VOTING,
+        "enableStripe": len(config.STRIPE_PUBLISHABLE_KEY) > 0
+        and len(config.STRIPE_SECRET_KEY) > 0,
+        "enableMembershipPayments": config.ENABLE_STRIPE_MEMBERSHIP_PAYMENTS,
+        "enableMemberBucks": config.ENABLE_MEMBERBUCKS,
+        "signup": {
+            "inductionLink": config.INDUCTION_ENROL_LINK,
+            "requireAccessCard": config.REQUIRE_ACCESS_CARD,
+            "contactPageUrl": config.CONTACT_PAGE_URL,
+        },
+        "enableWebcams": config.ENABLE_WEBCAMS,
+        "siteBanner": config.SITE_BANNER,
+    }
+
+    keys = {"stripePublishableKey": config.STRIPE_PUBLISHABLE_KEY}
+
+    return {
+        "loggedIn": logged_in,
+        "general": {
+            "siteName": config.SITE_NAME,
+            "siteOwner": config.SITE_OWNER,
+            "entityType": config.ENTITY_TYPE,
+        },
+        "contact": {
+            "admin": config.EMAIL_ADMIN,
+            "sysadmin": config.EMAIL_SYSADMIN,
+            "address": config.SITE_MAIL_ADDRESS,
+        },
+        "images": {
+            "siteLogo": config.SITE_LOGO,
+            "statsCard": config.STATS_CARD_IMAGE,
+            "siteFavicon": config.SITE_FAVICON,
+            "menuBackground": config.MENU_BACKGROUND,
+        },
+        "theme": {
+            "themePrimary": config.THEME_PRIMARY,
+            "themeToolbar": config.THEME_TOOLBAR,
+            "themeAccent": config.THEME_ACCENT,
+        },
+        "homepageCards": json.loads(config.HOME_PAGE_CARDS),
+        "webcamLinks": json.loads(config.WEBCAM_PAGE_URLS),
+        "memberTypes": membership_types,
+        "keys": keys,
+        "features": features,
+        "analyticsId": config.GOOGLE_ANALYTICS_PROPERTY_ID,
+        "sentryDSN": config.SENTRY_DSN_FRONTEND,
+    }
+
+
+def load_site_config():
+    """
+    Builds the serialised site config for logged in and logged out users.
+    :return: {logged_in: (body, etag)}
+    """
+    # make sure we're not building it from config values that are out of date
+    config_values.refresh()
+    site_config = {}
+
+    for logged_in in (True, False):
+        body = json.dumps(build_site_config(logged_in), cls=JSONEncoder).encode("utf-8")
+        etag = '"{}"'.format(hashlib.sha256(body).hexdigest()[:32])
+        site_config[logged_in] = (body, etag)
+
+    return site_config
+
+
+site_config = Snapshot("site_config", load_site_config, depends_on=["constance"])
+
+
+def get_site_config(logged_in):
+    """
+    Returns the serialised site config and its ETag.
+    :param logged_in: if the user requesting it is logged in
+    :return: (body, etag)
+    """
+    return site_config.get()[logged_in]
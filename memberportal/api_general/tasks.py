@@ -0,0 +1,45 @@
+from datetime import timedelta
+from constance import config
+from django.utils import timezone
+from access.acl import refresh_profile
+from membermatters.helpers import log_user_event
+from membermatters.scheduler import periodic_task
+from profile.models import Profile
+from .models import SiteSession
+from .presence import presence
+
+
+@periodic_task(300)
+def expire_site_sessions():
+    """
+    Signs out anyone that's been signed into the site for longer than
+    SITE_SESSION_MAX_HOURS (ie they forgot to sign out).
+    :return: the number of sessions that were ended
+    """
+    if not config.SITE_SESSION_MAX_HOURS:
+        return 0
+
+    now = timezone.now()
+    expired = SiteSession.objects.filter(
+        signout_date=None,
+        signin_date__lt=now - timedelta(hours=config.SITE_SESSION_MAX_HOURS),
+    )
+    user_ids = set(expired.values_list("user_id", flat=True))
+
+    if not user_ids:
+        return 0
+
+    ended = expired.update(signout_date=now, auto_signout=True)
+
+    # bulk updates don't send signals, so update everything that depends on them
+    presence.invalidate()
+
+    for profile in Profile.objects.filter(user_id__in=user_ids).select_related("user"):
+        refresh_profile(profile)
+        log_user_event(
+            profile.user,
+            f"Automatically signed out of site after {config.SITE_SESSION_MAX_HOURS} hours.",
+            "usage",
+        )
+
+    return ended
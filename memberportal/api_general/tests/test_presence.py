@@ -0,0 +1,41 @@
+from api_general import presence
+from api_general.models import SiteSession
+from membermatters.testing import MemberMattersTestCase, make_member
+
+
+class PresenceTests(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.member = make_member(1)
+
+    def sign_in(self, member, guests="[]"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return SiteSession.objects.create(user=member.user, guests=guests)
+
+    def signed_in(self):
+        return [member["userId"] for member in presence.get_roster()]
+
+    def test_signing_in_and_out_is_seen(self):
+        self.assertEqual(self.signed_in(), [])
+
+        session = self.sign_in(self.member)
+        self.assertEqual(self.signed_in(), [self.member.user_id])
+        self.assertTrue(self.member.is_signed_into_site())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            session.signout()
+
+        self.assertEqual(self.signed_in(), [])
+        self.assertFalse(self.member.is_signed_into_site())
+
+    def test_roster_doesnt_query_the_database(self):
+        self.sign_in(self.member)
+        presence.get_roster()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.signed_in(), [self.member.user_id])
+
+    def test_guests_are_counted(self):
+        self.assertEqual(presence.count_guests("['Alice', 'Bob']"), 2)
+        self.assertEqual(presence.count_guests(""), 0)
+        self.assertEqual(presence.count_guests("not a list ["), 0)
@@ -0,0 +1,59 @@
+from constance import config
+from membermatters.testing import MemberMattersTestCase, make_member
+from profile.models import MemberTypes
+
+
+class GetConfigTests(MemberMattersTestCase):
+    def get(self, **headers):
+        return self.client.get("/api/config/", **headers)
+
+    def test_config_has_an_etag(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        self.assertFalse(response.json()["loggedIn"])
+        self.assertTrue(response["ETag"].startswith('"'))
+
+    def test_not_modified_when_the_etag_matches(self):
+        etag = self.get()["ETag"]
+
+        for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            response = self.get(HTTP_IF_NONE_MATCH=header)
+
+            self.assertEqual(response.status_code, 304, header)
+            self.assertEqual(response.content, b"")
+            self.assertEqual(response["ETag"], etag)
+
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_logged_in_users_get_their_own_etag(self):
+        etag = self.get()["ETag"]
+        self.client.force_login(make_member(1).user)
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["loggedIn"])
+
+    def test_changing_the_config_changes_the_etag(self):
+        etag = self.get()["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            config.SITE_NAME = "Test Space"
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["general"]["siteName"], "Test Space")
+
+    def test_changing_member_types_changes_the_etag(self):
+        etag = self.get()["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MemberTypes.objects.create(name="Student", conditions="", cost=100)
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            "Student",
+            [member_type["name"] for member_type in response.json()["memberTypes"]],
+        )
@@ -0,0 +1,30 @@
+from datetime import timedelta
+from django.utils import timezone
+from api_general.models import SiteSession
+from membermatters.testing import MemberMattersTestCase, make_member
+
+
+class StatisticsTests(MemberMattersTestCase):
+    def test_roster_lists_everyone_on_site_newest_first(self):
+        first = make_member(1)
+        second = make_member(2)
+        make_member(3)  # not on site
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SiteSession.objects.create(
+                user=first.user, signin_date=timezone.now() - timedelta(hours=1)
+            )
+            SiteSession.objects.create(user=second.user, guests="['Alice']")
+
+        self.client.force_login(first.user)
+        on_site = self.client.get("/api/statistics/").json()["onSite"]
+
+        self.assertEqual(on_site["count"], 2)
+        self.assertEqual(on_site["members"], ["Member2 Test", "Member1 Test"])
+        self.assertEqual(
+            [(member["userId"], member["guests"]) for member in on_site["roster"]],
+            [(second.user_id, 1), (first.user_id, 0)],
+        )
+
+    def test_needs_a_logged_in_user(self):
+        self.assertIn(self.client.get("/api/statistics/").status_code, (401, 403))
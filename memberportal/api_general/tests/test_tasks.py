@@ -0,0 +1,51 @@
+from datetime import timedelta
+from constance import config
+from django.utils import timezone
+from access.acl import get_authorised_tags
+from access.models import Doors
+from api_general import presence
+from api_general.models import SiteSession
+from api_general.tasks import expire_site_sessions
+from membermatters.testing import MemberMattersTestCase, make_member
+
+
+class ExpireSiteSessionsTests(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.door = Doors.objects.create(name="Front", description="Front door")
+        self.forgot = make_member(1)
+        self.forgot.doors.add(self.door)
+        self.recent = make_member(2)
+        self.recent.doors.add(self.door)
+
+        self.old_session = SiteSession.objects.create(
+            user=self.forgot.user, signin_date=timezone.now() - timedelta(hours=13)
+        )
+        self.new_session = SiteSession.objects.create(user=self.recent.user)
+
+    def signed_in(self, member):
+        return member.user_id in [m["userId"] for m in presence.get_roster()]
+
+    def test_disabled_by_default(self):
+        self.assertEqual(expire_site_sessions(), 0)
+
+        self.old_session.refresh_from_db()
+        self.assertIsNone(self.old_session.signout_date)
+
+    def test_old_sessions_are_signed_out(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            config.SITE_SESSION_MAX_HOURS = 12
+
+        self.assertTrue(self.signed_in(self.forgot))
+
+        self.assertEqual(expire_site_sessions(), 1)
+
+        self.old_session.refresh_from_db()
+        self.new_session.refresh_from_db()
+        self.assertTrue(self.old_session.auto_signout)
+        self.assertIsNotNone(self.old_session.signout_date)
+        self.assertIsNone(self.new_session.signout_date)
+
+        # everything that's normally updated by the SiteSession signals
+        self.assertFalse(self.signed_in(self.forgot))
+        self.assertEqual(get_authorised_tags(self.door), ["1002"])
@@ -4,17 +4,22 @@ from django.contrib.auth import (
     logout,
 )
 from django.core.exceptions import ObjectDoesNotExist
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
 from constance import config
 import json
 from django.utils.timezone import make_aware
 import datetime
 from pytz import UTC as utc
-from profile.models import User, Profile, MemberTypes
+from profile.models import User, Profile
 
 from rest_framework import status, permissions, generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from .models import Kiosk, SiteSession, EmailVerificationToken
+from .presence import get_roster
+from .site_config import get_site_config
+from access.registry import get_kiosk
 from services.discord import post_kiosk_swipe_to_discord
 import base64
 from urllib.parse import parse_qs, urlencode
@@ -30,62 +35,18 @@ class GetConfig(APIView):
     permission_classes = (permissions.AllowAny,)
 
     def get(self, request):
-        membership_types = list(MemberTypes.objects.values())
-
-        features = {
-            "memberbucks_topup_options": json.loads(
-                config.STRIPE_MEMBERBUCKS_TOPUP_OPTIONS
-            ),
-            "trelloIntegration": config.ENABLE_TRELLO_INTEGRATION,
-            "enableProxyVoting": config.ENABLE_PROXY_VOTING,
-            "enableStripe": len(config.STRIPE_PUBLISHABLE_KEY) > 0
-            and len(config.STRIPE_SECRET_KEY) > 0,
-            "enableMembershipPayments": config.ENABLE_STRIPE_MEMBERSHIP_PAYMENTS,
-            "enableMemberBucks": config.ENABLE_MEMBERBUCKS,
-            "signup": {
-                "inductionLink": config.INDUCTION_ENROL_LINK,
-                "requireAccessCard": config.REQUIRE_ACCESS_CARD,
-                "contactPageUrl": config.CONTACT_PAGE_URL,
-            },
-            "enableWebcams": config.ENABLE_WEBCAMS,
-            "siteBanner": config.SITE_BANNER,
-        }
+        body, etag = get_site_config(request.user.is_authenticated)
 
-        keys = {"stripePublishableKey": config.STRIPE_PUBLISHABLE_KEY}
+        # handles If-None-Match (and If-Match) the same way as Django's ConditionalGetMiddleware
+        response = get_conditional_response(request, etag=etag)
 
-        response = {
-            "loggedIn": request.user.is_authenticated,
-            "general": {
-                "siteName": config.SITE_NAME,
-                "siteOwner": config.SITE_OWNER,
-                "entityType": config.ENTITY_TYPE,
-            },
-            "contact": {
-                "admin": config.EMAIL_ADMIN,
-                "sysadmin": config.EMAIL_SYSADMIN,
-                "address": config.SITE_MAIL_ADDRESS,
-            },
-            "images": {
-                "siteLogo": config.SITE_LOGO,
-                "statsCard": config.STATS_CARD_IMAGE,
-                "siteFavicon": config.SITE_FAVICON,
-                "menuBackground": config.MENU_BACKGROUND,
-            },
-            "theme": {
-                "themePrimary": config.THEME_PRIMARY,
-                "themeToolbar": config.THEME_TOOLBAR,
-                "themeAccent": config.THEME_ACCENT,
-            },
-            "homepageCards": json.loads(config.HOME_PAGE_CARDS),
-            "webcamLinks": json.loads(config.WEBCAM_PAGE_URLS),
-            "memberTypes": membership_types,
-            "keys": keys,
-            "features": features,
-            "analyticsId": config.GOOGLE_ANALYTICS_PROPERTY_ID,
-            "sentryDSN": config.SENTRY_DSN_FRONTEND,
-        }
+        if response is None:
+            response = HttpResponse(body, content_type="application/json")
 
-        return Response(response)
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+
+        return response
 
 
 class Login(APIView):
@@ -233,9 +194,9 @@ class LoginKiosk(APIView):
         except Profile.DoesNotExist:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
-        kiosk = Kiosk.objects.get(kiosk_id=body.get("kioskId"))
+        kiosk = get_kiosk(body.get("kioskId"))
 
-        if not kiosk.authorised:
+        if kiosk is None or not kiosk.authorised:
             return Response(status=status.HTTP_403_FORBIDDEN)
 
         if not user.email_verified:
@@ -536,11 +497,14 @@ class UserSiteSession(APIView):
     """
 
     def get(self, request):
-        sessions = SiteSession.objects.filter(
-            user=request.user, signout_date=None
-        ).order_by("-signin_date")
+        session = (
+            SiteSession.objects.filter(user=request.user, signout_date=None)
+            .order_by("-signin_date")
+            .values()
+            .first()
+        )
 
-        return Response(sessions.values()[0] if len(sessions) else False)
+        return Response(session or False)
 
 
 class LoggedIn(APIView):
@@ -561,13 +525,15 @@ class Statistics(APIView):
     """
 
     def get(self, request):
-        members = SiteSession.objects.filter(signout_date=None).order_by("-signin_date")
-        member_list = []
+        roster = get_roster()
 
-        for member in members:
-            member_list.append(member.user.profile.get_full_name())
-
-        statistics = {"onSite": {"members": member_list, "count": members.count()}}
+        statistics = {
+            "onSite": {
+                "members": [member["name"] for member in roster],
+                "count": len(roster),
+                "roster": roster,
+            }
+        }
 
         return Response(statistics)
 
@@ -7,6 +7,11 @@ urlpatterns = [
         views.MemberBucksTransactions.as_view(),
         name="MemberBucksTransactions",
     ),
+    path(
+        "api/memberbucks/transactions/history/",
+        views.MemberBucksHistory.as_view(),
+        name="MemberBucksHistory",
+    ),
     path(
         "api/memberbucks/balance/",
         views.MemberBucksBalance.as_view(),
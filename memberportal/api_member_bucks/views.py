@@ -1,4 +1,6 @@
 from memberbucks.models import MemberBucks
+from memberbucks.history import get_history_page
+from memberbucks.idempotency import get_key, idempotent
 from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -21,9 +23,7 @@ class MemberBucksTransactions(APIView):
     permission_classes = (permissions.IsAuthenticated,)
 
     def get(self, request):
-        recent_transactions = MemberBucks.objects.filter(user=request.user).order_by(
-            "date"
-        )[::-1][:100]
+        recent_transactions = MemberBucks.get_history(request.user.id, limit=100)
 
         def get_transaction(transaction):
             return transaction.get_transaction_display()
@@ -33,6 +33,23 @@ class MemberBucksTransactions(APIView):
         )
 
 
+class MemberBucksHistory(APIView):
+    """
+    get: This method returns a page of a member's memberbucks transactions,
+    newest first. Optionally filtered by a from/to date range. Pass the
+    nextCursor from the previous page as cursor to get the next one.
+    """
+
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request):
+        try:
+            return Response(get_history_page(request.user.id, request.query_params))
+
+        except (TypeError, ValueError):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+
 class MemberBucksBalance(APIView):
     """
     get: This method returns a member's memberbucks balance.
@@ -52,6 +69,7 @@ class MemberBucksAddFunds(APIView):
     post: attempts to charge the saved card and add funds.
     """
 
+    @idempotent("add_funds")
     def post(self, request, amount=None):
         profile = request.user.profile
 
@@ -72,6 +90,9 @@ class MemberBucksAddFunds(APIView):
                 payment_method=profile.stripe_payment_method_id,
                 off_session=True,
                 confirm=True,
+                idempotency_key=f"memberbucks-{profile.user_id}-{get_key(request)}"
+                if get_key(request)
+                else None,
             )
         except stripe.error.CardError as e:
             err = e.error
@@ -124,6 +145,7 @@ class MemberBucksDonateFunds(APIView):
     post: charges the member the specified amount and removes it from their balance.
     """
 
+    @idempotent("donate_funds", atomic=True)
     def post(self, request, amount=None):
         profile = request.user.profile
 
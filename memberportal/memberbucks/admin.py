@@ -1,7 +1,12 @@
 from django.contrib import admin
-from .models import MemberBucks
+from .models import MemberBucks, MemberBucksCheckpoint
 
 
 @admin.register(MemberBucks)
 class MemberBucksAdmin(admin.ModelAdmin):
     pass
+
+
+@admin.register(MemberBucksCheckpoint)
+class MemberBucksCheckpointAdmin(admin.ModelAdmin):
+    pass
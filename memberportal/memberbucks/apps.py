@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class MemberbucksConfig(AppConfig):
+    name = "memberbucks"
+
+    def ready(self):
+        # connects the receivers that keep the card lookup snapshot and
+        # balances up to date
+        from . import signals
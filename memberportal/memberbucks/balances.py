@@ -0,0 +1,96 @@
+"""
+Lookups for memberbucks devices, which show a member's balance when they tap
+their card and then debit them when they buy something.
+
+Which member a card belongs to rarely changes, so it's kept in an in-process
+snapshot (see membermatters/snapshots.py) that's reloaded whenever a card
+changes. This is only used to show a balance, the debit finds the card's owner
+in the database so a card that was just moved or removed can't be charged to
+its old owner. Balances change on every purchase, so each worker
+keeps its own copy of the ones it's looked up for MEMBERBUCKS_BALANCE_CACHE_TTL
+seconds. Ledger writes (see MemberBucks.save) update the copy in the worker
+that made them, other workers see the new balance once their copy expires.
+"""
+
+import threading
+import time
+from django.conf import settings
+from membermatters.snapshots import Snapshot
+from profile.models import Profile
+
+FIELDS = ("rfid", "id", "user_id")
+
+
+def load_members():
+    return {
+        member["rfid"]: member
+        for member in Profile.objects.exclude(rfid=None).values(*FIELDS)
+    }
+
+
+members = Snapshot("memberbucks_members", load_members)
+
+# {user_id: (balance, expires)}
+balances = {}
+balances_lock = threading.Lock()
+
+
+def get_member(rfid):
+    """
+    Finds the member a card belongs to.
+    :param rfid: the rfid tag
+    :return: {"rfid", "id", "user_id"} or None if it's not a member's card
+    """
+    rfid = str(rfid)
+    member = members.get().get(rfid)
+
+    if member is None:
+        # this worker mightn't have seen a card that was just assigned yet
+        member = Profile.objects.filter(rfid=rfid).values(*FIELDS).first()
+
+    return member
+
+
+def get_balance(user_id):
+    """
+    Returns a member's memberbucks balance, from this worker's copy if it's
+    recent enough.
+    :param user_id: the member's user id
+    :return: the balance, or None if there's no such member
+    """
+    cached = balances.get(user_id)
+
+    if cached and time.monotonic() < cached[1]:
+        return cached[0]
+
+    balance = (
+        Profile.objects.filter(user_id=user_id)
+        .values_list("memberbucks_balance", flat=True)
+        .first()
+    )
+
+    if balance is not None:
+        balance = round(balance, 2)
+        set_balance(user_id, balance)
+
+    return balance
+
+
+def set_balance(user_id, balance):
+    with balances_lock:
+        balances[user_id] = (
+            balance,
+            time.monotonic() + settings.MEMBERBUCKS_BALANCE_CACHE_TTL,
+        )
+
+        # don't let the cache grow forever
+        if len(balances) > 10000:
+            now = time.monotonic()
+
+            for key in [key for key, value in balances.items() if value[1] <= now]:
+                del balances[key]
+
+
+def forget_balance(user_id):
+    with balances_lock:
+        balances.pop(user_id, None)
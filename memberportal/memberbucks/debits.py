@@ -0,0 +1,140 @@
+"""
+The debit path used by vending machines and other memberbucks devices.
+
+The machine is waiting on this answer before it vends, so the debit only does
+what has to happen before we reply: the card's owner is found and their
+balance locked in a single query, then the ledger entry is committed under
+that lock. The receipt email and the audit log are sent by the receipt worker
+once the debit has committed. Debits slower than settings.DEBIT_LATENCY_TARGET
+are logged.
+"""
+
+import logging
+import time
+from datetime import timedelta
+from constance import config
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from membermatters.background import BackgroundWorker
+from membermatters.helpers import log_user_event
+from profile.models import Profile, User
+from .models import MemberBucks
+
+logger = logging.getLogger(__name__)
+receipt_worker = BackgroundWorker("memberbucks-receipts")
+
+# possible results of a debit
+SUCCESS = "success"
+INSUFFICIENT_FUNDS = "insufficient_funds"
+TOO_SOON = "too_soon"
+UNKNOWN_MEMBER = "unknown_member"
+
+
+def debit(rfid, amount, description, throttle=False):
+    """
+    Debits a member's memberbucks account.
+    :param rfid: the rfid tag of the member
+    :param amount: the amount in dollars to debit (always taken as positive)
+    :param description: a description of the purchase
+    :param throttle: refuse the debit if the member's last purchase was less
+        than settings.MEMBERBUCKS_DEBIT_MIN_INTERVAL seconds ago
+    :return: {"result": str, "balance": float or None}
+    """
+    started = time.monotonic()
+    amount = abs(amount)  # the abs() stops us accidentally crediting an account
+    now = timezone.now()
+    result = SUCCESS
+
+    with transaction.atomic():
+        # look the card up under the lock rather than from the snapshot so
+        # a card that was just moved or removed can't charge its old owner
+        member = (
+            Profile.objects.select_for_update()
+            .filter(rfid=rfid)
+            .values("user_id", "memberbucks_balance", "last_memberbucks_purchase")
+            .first()
+        )
+
+        if member is None:
+            return {"result": UNKNOWN_MEMBER, "balance": None}
+
+        balance = round(member["memberbucks_balance"], 2)
+
+        if balance < amount:
+            result = INSUFFICIENT_FUNDS
+
+        elif throttle and now - member["last_memberbucks_purchase"] < timedelta(
+            seconds=settings.MEMBERBUCKS_DEBIT_MIN_INTERVAL
+        ):
+            result = TOO_SOON
+
+        else:
+            entry = MemberBucks(
+                user_id=member["user_id"],
+                amount=amount * -1.0,
+                description=description,
+                transaction_type="card",
+            )
+            entry.save()
+            balance = round(balance - amount, 2)
+            Profile.objects.filter(user_id=member["user_id"]).update(
+                last_memberbucks_purchase=now
+            )
+
+    # if we're part of a bigger transaction (ie an idempotent request) only
+    # send the receipt once the debit is committed
+    if result != TOO_SOON:
+        transaction.on_commit(
+            lambda: receipt_worker.submit(
+                send_receipt, member["user_id"], result, amount, description, balance
+            )
+        )
+
+    elapsed = time.monotonic() - started
+    if elapsed > settings.DEBIT_LATENCY_TARGET:
+        logger.warning(
+            f"Memberbucks debit for {rfid} took {round(elapsed * 1000)}ms, "
+            f"target is {round(settings.DEBIT_LATENCY_TARGET * 1000)}ms."
+        )
+
+    return {"result": result, "balance": balance}
+
+
+def send_receipt(user_id, result, amount, description, balance):
+    """
+    Emails the member a receipt (or a warning for a failed debit) and logs it.
+    """
+    user = User.objects.get(pk=user_id)
+
+    if result == SUCCESS:
+        log_user_event(
+            user,
+            f"Successfully debited ${amount} from {config.MEMBERBUCKS_NAME} account.",
+            "memberbucks",
+        )
+        subject = f"You just made a ${amount} {config.MEMBERBUCKS_NAME} purchase."
+        user.email_notification(
+            subject,
+            subject,
+            subject,
+            f"Description: {description}. Balance Remaining: ${balance}. If this "
+            "wasn't you, or you believe there has been an error, please let us know.",
+        )
+
+    else:
+        log_user_event(
+            user,
+            f"Not enough funds to debit ${amount} from {config.MEMBERBUCKS_NAME} "
+            "account.",
+            "memberbucks",
+        )
+        subject = f"Failed to make a ${amount} {config.MEMBERBUCKS_NAME} purchase."
+        user.email_notification(
+            subject,
+            subject,
+            subject,
+            f"We just tried to debit ${amount} from your {config.MEMBERBUCKS_NAME} "
+            f"balance but were not successful. You currently have ${balance}. If "
+            "this wasn't you, please let us know immediately.",
+        )
@@ -0,0 +1,25 @@
+from membermatters.helpers import get_page_params, make_cursor
+from .models import MemberBucks
+
+
+def get_history_page(user_id, params):
+    """
+    Gets a page of a member's transaction history, newest first.
+    :param user_id: the member's user id
+    :param params: the request's query params (cursor, limit, from, to)
+    :return: {"transactions": [], "nextCursor": str or None}, raises
+        ValueError if the params are invalid
+    """
+    page = get_page_params(params)
+    transactions = list(MemberBucks.get_history(user_id, **page))
+    next_cursor = None
+
+    if len(transactions) == page["limit"]:
+        next_cursor = make_cursor(transactions[-1].date, transactions[-1].id)
+
+    return {
+        "transactions": [
+            transaction.get_transaction_display() for transaction in transactions
+        ],
+        "nextCursor": next_cursor,
+    }
@@ -0,0 +1,151 @@
+"""
+Makes retries of requests that change a member's balance safe.
+
+A client (ie a vending machine that timed out waiting for us) sends the same
+Idempotency-Key header with every attempt at a request. The first attempt
+claims the key by committing an IdempotencyKey row with no response yet, then
+runs the request and saves its response on that row. Any attempt after that
+gets the saved response back instead of being applied again, or a 409 if the
+first attempt is still running. Keys are per member and endpoint, and are
+forgotten after settings.IDEMPOTENCY_KEY_TTL seconds.
+
+Requests that only change our database are run in a transaction with the
+response saved alongside their changes, so if they fail with a server error
+nothing is kept and the client can try again with the same key. Requests that
+call out to someone else (ie Stripe) aren't run in a transaction, as a
+rollback can't undo a card charge, so whatever they answer (even an error) is
+what retries get.
+"""
+
+import functools
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .models import IdempotencyKey
+
+
+def get_key(request):
+    return request.META.get("HTTP_IDEMPOTENCY_KEY")
+
+
+def get_request_user_id(request, *args, **kwargs):
+    return request.user.id
+
+
+def save_response(record, response):
+    record.status_code = response.status_code
+    record.response = json.dumps(response.data)
+    record.save(update_fields=["status_code", "response"])
+
+
+def idempotent(endpoint, get_user_id=get_request_user_id, atomic=False):
+    """
+    Decorates an APIView method so requests with an Idempotency-Key header are
+    only applied once.
+    :param endpoint: a name for the endpoint, keys are only unique per endpoint
+    :param get_user_id: get_user_id(request, *args, **kwargs) returns the id
+        of the member the request is for, or None if there isn't one
+    :param atomic: run the method in a transaction that's rolled back if it
+        fails, only use this if it doesn't call any external services
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrap(self, request, *args, **kwargs):
+            key = get_key(request)
+
+            if not key:
+                return method(self, request, *args, **kwargs)
+
+            if len(key) > 100:
+                return Response(
+                    "Idempotency-Key must be 100 characters or less.",
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            user_id = get_user_id(request, *args, **kwargs)
+
+            if user_id is None:
+                return method(self, request, *args, **kwargs)
+
+            keys = IdempotencyKey.objects.filter(
+                user_id=user_id, endpoint=endpoint, key=key
+            )
+            keys.filter(created__lt=get_expiry()).delete()
+
+            try:
+                # claim the key in its own transaction so other attempts can
+                # see we're working on it
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user_id=user_id, endpoint=endpoint, key=key
+                    )
+
+            except IntegrityError:
+                record = keys.first()
+
+                if record is None:
+                    raise
+
+                if record.status_code is None:
+                    return Response(
+                        "A request with this Idempotency-Key is still in progress.",
+                        status=status.HTTP_409_CONFLICT,
+                    )
+
+                return Response(
+                    json.loads(record.response),
+                    status=record.status_code,
+                    headers={"Idempotent-Replayed": "true"},
+                )
+
+            if not atomic:
+                try:
+                    response = method(self, request, *args, **kwargs)
+
+                except Exception:
+                    # we can't tell what happened, so don't let a retry
+                    # charge them again
+                    record.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+                    record.response = json.dumps(None)
+                    record.save(update_fields=["status_code", "response"])
+                    raise
+
+                save_response(record, response)
+                return response
+
+            try:
+                with transaction.atomic():
+                    response = method(self, request, *args, **kwargs)
+
+                    if response.status_code >= 500:
+                        # undo anything it did so the client can try again
+                        transaction.set_rollback(True)
+
+                    else:
+                        save_response(record, response)
+
+            except Exception:
+                record.delete()
+                raise
+
+            if response.status_code >= 500:
+                record.delete()
+
+            return response
+
+        return wrap
+
+    return decorator
+
+
+def get_expiry():
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def delete_expired_keys():
+    return IdempotencyKey.objects.filter(created__lt=get_expiry()).delete()[0]
@@ -0,0 +1,126 @@
+"""
+Checks on the memberbucks ledger. Every transaction adjusts the member's
+running balance as it's saved (see MemberBucks.save), these periodically record
+checkpoints of each balance and compare the running balances to what the
+transaction history says they should be.
+"""
+
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Max, Min, Sum
+from django.utils import timezone
+from profile.models import Profile
+from .balances import forget_balance
+from .models import MemberBucks, MemberBucksCheckpoint, lock_balance
+
+# balances are in dollars, so anything under half a cent is float rounding
+TOLERANCE = 0.005
+
+
+def get_latest_checkpoint(user_id):
+    return (
+        MemberBucksCheckpoint.objects.filter(user_id=user_id)
+        .order_by("-last_transaction_id")
+        .first()
+    )
+
+
+def get_history_balance(user_id, checkpoint=None):
+    """
+    Adds up a member's transactions to work out what their balance should be.
+    :param user_id: the member's user id
+    :param checkpoint: only add up the transactions since this checkpoint
+    :return: the balance
+    """
+    transactions = MemberBucks.objects.filter(user_id=user_id)
+    balance = 0
+
+    if checkpoint:
+        transactions = transactions.filter(id__gt=checkpoint.last_transaction_id)
+        balance = checkpoint.balance
+
+    return round(
+        balance + (transactions.aggregate(Sum("amount"))["amount__sum"] or 0), 2
+    )
+
+
+def create_checkpoints():
+    """
+    Records a checkpoint of the balance of every member that has made a
+    transaction since their last one.
+    :return: the number of checkpoints created
+    """
+    # leave out anything very recent so we don't skip over a transaction that
+    # got its id before one of these but hasn't committed yet
+    until = timezone.now() - timedelta(minutes=1)
+    created = 0
+
+    user_ids = MemberBucks.objects.values_list("user_id", flat=True).distinct()
+
+    for user_id in user_ids:
+        checkpoint = get_latest_checkpoint(user_id)
+        transactions = MemberBucks.objects.filter(user_id=user_id, date__lt=until)
+        balance = 0
+
+        # offline sales are dated when they happened, so one can be older than
+        # a recent transaction with a lower id that we have to stop before
+        first_recent = MemberBucks.objects.filter(
+            user_id=user_id, date__gte=until
+        ).aggregate(first=Min("id"))["first"]
+
+        if first_recent is not None:
+            transactions = transactions.filter(id__lt=first_recent)
+
+        if checkpoint:
+            transactions = transactions.filter(id__gt=checkpoint.last_transaction_id)
+            balance = checkpoint.balance
+
+        totals = transactions.aggregate(total=Sum("amount"), last=Max("id"))
+
+        if totals["last"] is None:
+            continue
+
+        MemberBucksCheckpoint.objects.create(
+            user_id=user_id,
+            last_transaction_id=totals["last"],
+            balance=round(balance + totals["total"], 2),
+        )
+        created += 1
+
+    return created
+
+
+def reconcile(full=False):
+    """
+    Compares every member's running balance against their transaction history.
+    :param full: add up each member's full history instead of starting from
+        their latest checkpoint (this also catches changed or deleted history)
+    :return: a list of (profile, running balance, expected balance)
+    """
+    mismatches = []
+
+    for profile in Profile.objects.select_related("user"):
+        checkpoint = None if full else get_latest_checkpoint(profile.user_id)
+        expected = get_history_balance(profile.user_id, checkpoint)
+
+        if abs(profile.memberbucks_balance - expected) > TOLERANCE:
+            mismatches.append((profile, profile.memberbucks_balance, expected))
+
+    return mismatches
+
+
+def fix_balance(user_id):
+    """
+    Sets a member's running balance to what their full transaction history
+    adds up to. The history is added up while their balance is locked so a
+    transaction that's saved at the same time isn't lost.
+    :param user_id: the member's user id
+    :return: the balance
+    """
+    with transaction.atomic():
+        lock_balance(user_id)
+        balance = get_history_balance(user_id)
+        Profile.objects.filter(user_id=user_id).update(memberbucks_balance=balance)
+        transaction.on_commit(lambda: forget_balance(user_id))
+
+    return balance
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from memberbucks.ledger import fix_balance, reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks every member's memberbucks balance against their transaction history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Add up each member's full history instead of starting from their latest checkpoint.",
+        )
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Set any balance that doesn't match to what the full history says it should be (needs --full).",
+        )
+
+    def handle(self, *args, **options):
+        if options["fix"] and not options["full"]:
+            # a checkpoint is taken from the balance at the time, so after an
+            # edit to older history it would "fix" the balance back to wrong
+            raise CommandError("--fix can only be used with --full.")
+
+        mismatches = reconcile(full=options["full"])
+
+        for profile, balance, expected in mismatches:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{profile.user.email}: balance is ${balance} but should be ${expected}."
+                )
+            )
+
+            if options["fix"]:
+                fix_balance(profile.user_id)
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("All balances match."))
+
+        elif options["fix"]:
+            self.stdout.write(
+                self.style.SUCCESS(f"Fixed {len(mismatches)} balance(s).")
+            )
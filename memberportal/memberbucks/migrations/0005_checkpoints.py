@@ -0,0 +1,49 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("memberbucks", "0004_alter_memberbucks_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MemberBucksCheckpoint",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                (
+                    "last_transaction_id",
+                    models.PositiveIntegerField(
+                        verbose_name="ID of the last transaction included"
+                    ),
+                ),
+                ("balance", models.FloatField(verbose_name="Balance")),
+                ("date", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Memberbucks checkpoint",
+                "verbose_name_plural": "Memberbucks checkpoints",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="memberbuckscheckpoint",
+            index=models.Index(
+                fields=["user", "last_transaction_id"],
+                name="memberbucks_user_id_d69656_idx",
+            ),
+        ),
+    ]
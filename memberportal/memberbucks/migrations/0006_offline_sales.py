@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("access", "0006_authorisedtagchange"),
+        ("memberbucks", "0005_checkpoints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="memberbucks",
+            name="device",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="transactions",
+                to="access.memberbucksdevice",
+            ),
+        ),
+        migrations.AddField(
+            model_name="memberbucks",
+            name="device_sequence",
+            field=models.PositiveIntegerField(
+                blank=True,
+                null=True,
+                verbose_name="Sequence number from the device's offline queue",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="memberbucks",
+            unique_together={("device", "device_sequence")},
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("memberbucks", "0006_offline_sales"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdempotencyKey",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                ("endpoint", models.CharField(max_length=30, verbose_name="Endpoint")),
+                (
+                    "key",
+                    models.CharField(max_length=100, verbose_name="Idempotency key"),
+                ),
+                (
+                    "status_code",
+                    models.PositiveSmallIntegerField(
+                        null=True, verbose_name="Response status code"
+                    ),
+                ),
+                (
+                    "response",
+                    models.TextField(blank=True, verbose_name="Response body (JSON)"),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "endpoint", "key")},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("memberbucks", "0007_idempotency_keys"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="memberbucks",
+            index=models.Index(
+                fields=["user", "date"], name="memberbucks_user_id_63bc56_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:18
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("memberbucks", "0008_history_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="memberbucks",
+            name="date",
+            field=models.DateTimeField(
+                blank=True, default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
@@ -1,12 +1,17 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
-from django.db.models import Sum
+from django.db.models import F, Func, Value
+from django.utils import timezone
+from profile.models import Profile
+from .balances import set_balance
 
 
 class MemberBucks(models.Model):
     class Meta:
         verbose_name = "Memberbucks"
         verbose_name_plural = "Memberbucks"
+        unique_together = ("device", "device_sequence")
+        indexes = [models.Index(fields=["user", "date"])]
 
     TRANSACTION_TYPES = (
         ("stripe", "Stripe Payment"),
@@ -22,16 +27,93 @@ class MemberBucks(models.Model):
         "Transaction Type", max_length=10, choices=TRANSACTION_TYPES
     )
     description = models.CharField("Description of Transaction", max_length=100)
-    date = models.DateTimeField(auto_now_add=True, blank=True)
+    # not auto_now_add, so offline sales can be dated when they happened
+    date = models.DateTimeField(default=timezone.now, editable=False, blank=True)
     logging_info = models.TextField("Detailed logging info from stripe.", blank=True)
+    device = models.ForeignKey(
+        "access.MemberbucksDevice",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="transactions",
+    )
+    device_sequence = models.PositiveIntegerField(
+        "Sequence number from the device's offline queue", null=True, blank=True
+    )
 
     def save(self, *args, **kwargs):
-        super(MemberBucks, self).save(*args, **kwargs)
-        balance = MemberBucks.objects.filter(user=self.user).aggregate(Sum("amount"))[
-            "amount__sum"
-        ]
-        self.user.profile.memberbucks_balance = round(balance, 2)
-        self.user.profile.save()
+        with transaction.atomic():
+            previous = None
+
+            if not self._state.adding:
+                # lock the transaction before reading it so two edits of the
+                # same one can't both adjust from the same old amount
+                previous = (
+                    MemberBucks.objects.select_for_update()
+                    .values_list("user_id", "amount")
+                    .filter(pk=self.pk)
+                    .first()
+                )
+
+            previous_user_id, previous_amount = previous or (self.user_id, 0)
+
+            # always lock in the same order so moving transactions between
+            # two members can't deadlock
+            for user_id in sorted({self.user_id, previous_user_id}):
+                lock_balance(user_id)
+
+            super(MemberBucks, self).save(*args, **kwargs)
+
+            if previous_user_id != self.user_id:
+                # the transaction was moved to a different member
+                old_balance = adjust_balance(previous_user_id, -previous_amount)
+                previous_amount = 0
+
+                if old_balance is not None:
+                    transaction.on_commit(
+                        lambda: set_balance(previous_user_id, old_balance)
+                    )
+
+            balance = adjust_balance(self.user_id, self.amount - previous_amount)
+            transaction.on_commit(lambda: set_balance(self.user_id, balance))
+
+        self.update_loaded_profile(balance)
+
+    def update_loaded_profile(self, balance):
+        # keep a profile we've already loaded (ie the one a view is using) in step
+        if MemberBucks.user.is_cached(self) and type(self.user).profile.is_cached(
+            self.user
+        ):
+            self.user.profile.memberbucks_balance = balance
+
+    @staticmethod
+    def get_history(user_id, start=None, end=None, before=None, limit=None):
+        """
+        Returns a member's transactions, newest first.
+        :param user_id: the member's user id
+        :param start: only return transactions from this datetime onwards
+        :param end: only return transactions from before this datetime
+        :param before: (date, id) of the last transaction on the previous page
+        :param limit: the most transactions to return
+        :return: QuerySet<MemberBucks>
+        """
+        transactions = MemberBucks.objects.filter(user_id=user_id).order_by(
+            "-date", "-id"
+        )
+
+        if start:
+            transactions = transactions.filter(date__gte=start)
+
+        if end:
+            transactions = transactions.filter(date__lt=end)
+
+        if before:
+            date, transaction_id = before
+            transactions = transactions.filter(
+                models.Q(date__lt=date) | models.Q(date=date, id__lt=transaction_id)
+            )
+
+        return transactions[:limit] if limit else transactions
 
     def get_transaction_display(self):
         return {
@@ -40,3 +122,88 @@ class MemberBucks(models.Model):
             "description": self.description,
             "date": self.date,
         }
+
+
+class MemberBucksCheckpoint(models.Model):
+    """
+    The balance of a member's account as of a transaction. Reconciling only
+    has to add up the transactions since the latest checkpoint instead of a
+    member's entire history.
+    """
+
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    last_transaction_id = models.PositiveIntegerField(
+        "ID of the last transaction included"
+    )
+    balance = models.FloatField("Balance")
+    date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Memberbucks checkpoint"
+        verbose_name_plural = "Memberbucks checkpoints"
+        indexes = [models.Index(fields=["user", "last_transaction_id"])]
+
+    def __str__(self):
+        return f"{self.user} ${self.balance} (#{self.last_transaction_id})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    The response we sent to a request that changed a member's balance, kept
+    so a retry of the same request (with the same Idempotency-Key header) gets
+    the same answer instead of being applied twice. See memberbucks/idempotency.py.
+    """
+
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    endpoint = models.CharField("Endpoint", max_length=30)
+    key = models.CharField("Idempotency key", max_length=100)
+    status_code = models.PositiveSmallIntegerField("Response status code", null=True)
+    response = models.TextField("Response body (JSON)", blank=True)
+    created = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = ("user", "endpoint", "key")
+
+    def __str__(self):
+        return f"{self.endpoint} {self.key}"
+
+
+def lock_balance(user_id):
+    """
+    Locks a member's profile row until the end of the current transaction so
+    balance changes for the same member are applied one at a time.
+    :param user_id: the member's user id
+    :return: the balance before any change, or None if they have no profile
+    """
+    return (
+        Profile.objects.select_for_update()
+        .filter(user_id=user_id)
+        .values_list("memberbucks_balance", flat=True)
+        .first()
+    )
+
+
+def adjust_balance(user_id, amount):
+    """
+    Adds amount to a member's running balance in the database. The result is
+    rounded to the cent so float error doesn't build up in the stored balance.
+    :param user_id: the member's user id
+    :param amount: the amount to add (negative for a debit)
+    :return: the new balance, or None if they have no profile
+    """
+    Profile.objects.filter(user_id=user_id).update(
+        memberbucks_balance=Func(
+            F("memberbucks_balance") + amount,
+            Value(2),
+            function="ROUND",
+            output_field=models.FloatField(),
+        )
+    )
+
+    return (
+        Profile.objects.filter(user_id=user_id)
+        .values_list("memberbucks_balance", flat=True)
+        .first()
+    )
@@ -0,0 +1,200 @@
+"""
+Applies the sales a memberbucks device made while it couldn't reach the portal.
+
+The device keeps a queue of sales, each numbered with its own increasing
+sequence number, and uploads them as JSON:
+
+    {"device": 3, "sent": 1650000100,
+     "transactions": [{"sequence": 1, "rfid": "1234", "amount": 250,
+                       "description": "Chips", "timestamp": 1650000000}, ...]}
+
+device is the device's id (the same as in the URL), sent is when the upload
+was signed, amount is a whole number of cents (more than zero) and timestamp is
+when the sale happened (all times are unix time). The X-Signature header is the
+hex HMAC-SHA256 of the raw request body keyed with API_SECRET_KEY.
+
+Signing the device id and time means a captured upload can't be replayed
+against a different device, or against the same one once it's more than
+MEMBERBUCKS_OFFLINE_BATCH_MAX_AGE seconds old. A sale is only ever applied once
+per device and sequence number, so a device can safely upload the same queue
+again if it doesn't get an answer.
+
+The goods have already been handed over, so sales are applied even if they
+take the member's balance below zero, and are dated when they happened rather
+than when they were uploaded. Sales we can't apply are logged so they can be
+sorted out by hand.
+"""
+
+import datetime
+import hashlib
+import hmac
+import json
+import time
+from constance import config
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from membermatters.helpers import log_event
+from profile.models import Profile
+from .debits import SUCCESS, receipt_worker, send_receipt
+from .models import MemberBucks
+
+# possible results of each sale
+APPLIED = "applied"
+DUPLICATE = "duplicate"
+UNKNOWN_MEMBER = "unknown_member"
+INVALID = "invalid"
+
+
+def sign_batch(body):
+    return hmac.new(
+        config.API_SECRET_KEY.encode("utf-8"), body, hashlib.sha256
+    ).hexdigest()
+
+
+def check_signature(body, signature):
+    return hmac.compare_digest(sign_batch(body), signature or "")
+
+
+def check_batch(batch, device_id):
+    """
+    Checks that a signed upload was meant for this device and was signed recently.
+    :param batch: the decoded request body
+    :param device_id: the id of the device the upload was sent to
+    :return: bool
+    """
+    device = batch.get("device")
+    sent = batch.get("sent")
+
+    # bools are ints in python, don't let true stand in for device 1
+    if isinstance(device, bool) or device != device_id:
+        return False
+
+    if isinstance(sent, bool) or not isinstance(sent, (int, float)):
+        return False
+
+    return abs(time.time() - sent) <= settings.MEMBERBUCKS_OFFLINE_BATCH_MAX_AGE
+
+
+def apply_batch(device, sales):
+    """
+    Applies a batch of offline sales from a device in a single transaction.
+    :param device: the MemberbucksDevice that made the sales
+    :param sales: a list of sales as described above
+    :return: a list of {"sequence": int, "result": str, "balance": float or None}
+    """
+    rfids = {str(sale.get("rfid")) for sale in sales}
+    members = dict(
+        Profile.objects.filter(rfid__in=rfids).values_list("rfid", "user_id")
+    )
+    applied = set(
+        MemberBucks.objects.filter(
+            device_id=device.id,
+            device_sequence__in=[sale.get("sequence") for sale in sales],
+        ).values_list("device_sequence", flat=True)
+    )
+    results = []
+    receipts = []
+    rejected = []
+    now = timezone.now()
+    uploaded_at = int(now.timestamp())
+
+    with transaction.atomic():
+        for sale in sales:
+            sequence = sale.get("sequence")
+            result = {"sequence": sequence, "result": APPLIED, "balance": None}
+            results.append(result)
+
+            amount = sale.get("amount")
+            timestamp = sale.get("timestamp", uploaded_at)
+
+            # bools are ints in python, and we don't want to round a
+            # fractional or text amount into something the device didn't send
+            if (
+                any(
+                    isinstance(value, bool) or not isinstance(value, int)
+                    for value in (sequence, amount, timestamp)
+                )
+                or sequence < 0
+                or amount <= 0
+            ):
+                result["result"] = INVALID
+                rejected.append(sale)
+                continue
+
+            try:
+                # a device with its clock set ahead can't date a sale in the future
+                sold_at = min(
+                    datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc),
+                    now,
+                )
+
+            except (ValueError, OverflowError, OSError):
+                result["result"] = INVALID
+                rejected.append(sale)
+                continue
+
+            if sequence in applied:
+                result["result"] = DUPLICATE
+                continue
+
+            user_id = members.get(str(sale.get("rfid")))
+
+            if user_id is None:
+                result["result"] = UNKNOWN_MEMBER
+                rejected.append(sale)
+                continue
+
+            description = str(sale.get("description") or "No Description")[:100]
+            amount = amount / 100
+            entry = MemberBucks(
+                user_id=user_id,
+                amount=amount * -1.0,
+                date=sold_at,
+                description=description,
+                transaction_type="card",
+                device_id=device.id,
+                device_sequence=sequence,
+                logging_info=f"Offline sale on {device.name} at {sold_at.isoformat()}.",
+            )
+
+            try:
+                # another upload of the same queue could have beaten us to it
+                with transaction.atomic():
+                    entry.save()
+
+            except IntegrityError:
+                result["result"] = DUPLICATE
+                continue
+
+            applied.add(sequence)
+            result["balance"] = round(
+                Profile.objects.values_list("memberbucks_balance", flat=True).get(
+                    user_id=user_id
+                ),
+                2,
+            )
+            receipts.append((user_id, amount, description, result["balance"]))
+
+    for user_id, amount, description, balance in receipts:
+        receipt_worker.submit(
+            send_receipt, user_id, SUCCESS, amount, description, balance
+        )
+
+        if balance < 0:
+            log_event(
+                f"Offline {config.MEMBERBUCKS_NAME} sale on {device.name} left a "
+                "member with a negative balance.",
+                "memberbucks",
+                f"User {user_id}, balance ${balance}.",
+            )
+
+    if rejected:
+        log_event(
+            f"Couldn't apply {len(rejected)} offline {config.MEMBERBUCKS_NAME} "
+            f"sale(s) from {device.name}.",
+            "memberbucks",
+            json.dumps(rejected),
+        )
+
+    return results
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from profile.models import Profile
+from .balances import members, set_balance
+from .models import MemberBucks, adjust_balance, lock_balance
+
+
+@receiver(post_init, sender=Profile)
+def remember_card(sender, instance, **kwargs):
+    # use __dict__ so we don't trigger a query for a deferred rfid
+    instance._loaded_rfid = instance.__dict__.get("rfid")
+
+
+@receiver(post_save, sender=Profile)
+def profile_saved(sender, instance, created, **kwargs):
+    if created or instance.rfid != getattr(instance, "_loaded_rfid", None):
+        transaction.on_commit(members.invalidate)
+
+    instance._loaded_rfid = instance.rfid
+
+
+@receiver(post_delete, sender=Profile)
+def profile_deleted(sender, instance, **kwargs):
+    transaction.on_commit(members.invalidate)
+
+
+@receiver(post_delete, sender=MemberBucks)
+def transaction_deleted(sender, instance, **kwargs):
+    # a signal rather than overriding MemberBucks.delete so deleting from a queryset (ie
+    # the admin's bulk delete action) takes the amount off the balance too
+    lock_balance(instance.user_id)
+    balance = adjust_balance(instance.user_id, -instance.amount)
+
+    if balance is not None:
+        transaction.on_commit(lambda: set_balance(instance.user_id, balance))
+        instance.update_loaded_profile(balance)
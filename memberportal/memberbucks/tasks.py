@@ -0,0 +1,13 @@
+from membermatters.scheduler import periodic_task
+from .idempotency import delete_expired_keys
+from .ledger import create_checkpoints
+
+
+@periodic_task(86400)
+def checkpoint_balances():
+    return create_checkpoints()
+
+
+@periodic_task(3600)
+def expire_idempotency_keys():
+    return delete_expired_keys()
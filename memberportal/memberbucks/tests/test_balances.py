@@ -0,0 +1,140 @@
+import datetime
+from django.test import override_settings
+from django.utils import timezone
+from membermatters.testing import MemberMattersTestCase, make_member
+from memberbucks import debits
+from memberbucks.balances import balances, get_balance, get_member, members
+from memberbucks.models import MemberBucks
+from profile.models import Profile
+
+
+class BalancesTestCase(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        balances.clear()
+        self.addCleanup(balances.clear)
+        self.member = make_member(
+            1,
+            memberbucks_balance=10,
+            last_memberbucks_purchase=timezone.now() - datetime.timedelta(hours=1),
+        )
+
+
+class GetMemberTests(BalancesTestCase):
+    def test_members_are_found_from_the_snapshot(self):
+        member = get_member(self.member.rfid)
+
+        self.assertEqual(member["user_id"], self.member.user_id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_member(int(self.member.rfid)), member)
+
+    def test_unknown_cards(self):
+        self.assertIsNone(get_member("999999"))
+
+    def test_new_cards_are_found_before_the_snapshot_reloads(self):
+        members.get()
+        # a queryset update doesn't send post_save, so the snapshot isn't invalidated
+        Profile.objects.filter(pk=self.member.pk).update(rfid="5555")
+
+        self.assertEqual(get_member("5555")["user_id"], self.member.user_id)
+
+    def test_changing_a_card_reloads_the_snapshot(self):
+        members.get()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.rfid = "5555"
+            self.member.save()
+
+        self.assertIsNone(get_member("1001"))
+        self.assertEqual(get_member("5555")["user_id"], self.member.user_id)
+
+    def test_other_changes_dont_reload_the_snapshot(self):
+        members.get()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.member.first_name = "Renamed"
+            self.member.save()
+
+        self.assertEqual(callbacks, [])
+
+    def test_deleting_a_member_reloads_the_snapshot(self):
+        members.get()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.user.delete()
+
+        self.assertIsNone(get_member("1001"))
+
+
+class GetBalanceTests(BalancesTestCase):
+    def test_balances_are_kept_for_a_while(self):
+        self.assertEqual(get_balance(self.member.user_id), 10)
+        Profile.objects.filter(pk=self.member.pk).update(memberbucks_balance=3)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_balance(self.member.user_id), 10)
+
+    @override_settings(MEMBERBUCKS_BALANCE_CACHE_TTL=0)
+    def test_expired_balances_are_read_again(self):
+        get_balance(self.member.user_id)
+        Profile.objects.filter(pk=self.member.pk).update(memberbucks_balance=3)
+
+        self.assertEqual(get_balance(self.member.user_id), 3)
+
+    def test_ledger_writes_update_the_balance(self):
+        get_balance(self.member.user_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MemberBucks.objects.create(
+                user=self.member.user,
+                amount=-2.5,
+                transaction_type="card",
+                description="Snack",
+            )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_balance(self.member.user_id), 7.5)
+
+    def test_unknown_members(self):
+        self.assertIsNone(get_balance(0))
+        self.assertNotIn(0, balances)
+
+
+class BalanceViewTests(BalancesTestCase):
+    def test_balance(self):
+        response = self.client.get(f"/api/memberbucks/balance/{self.member.rfid}/")
+
+        self.assertEqual(response.json(), {"balance": 10})
+
+    def test_unknown_card(self):
+        response = self.client.get("/api/memberbucks/balance/999999/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data)
+
+
+class StaleSnapshotTests(BalancesTestCase):
+    def test_debits_charge_the_cards_current_owner(self):
+        other = make_member(2, memberbucks_balance=10)
+        members.get()
+
+        # move the card without the snapshot hearing about it
+        Profile.objects.filter(pk=self.member.pk).update(rfid="5555")
+        Profile.objects.filter(pk=other.pk).update(rfid="1001")
+        self.assertEqual(get_member("1001")["user_id"], self.member.user_id)
+
+        result = debits.debit("1001", 2, "Snack")
+
+        self.assertEqual(result, {"result": debits.SUCCESS, "balance": 8})
+        self.assertEqual(MemberBucks.objects.get().user_id, other.user_id)
+        self.assertEqual(Profile.objects.get(pk=self.member.pk).memberbucks_balance, 10)
+
+    def test_debits_refuse_a_card_that_was_removed(self):
+        members.get()
+        Profile.objects.filter(pk=self.member.pk).update(rfid=None)
+
+        result = debits.debit("1001", 2, "Snack")
+
+        self.assertEqual(result["result"], debits.UNKNOWN_MEMBER)
+        self.assertFalse(MemberBucks.objects.exists())
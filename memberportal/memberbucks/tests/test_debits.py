@@ -0,0 +1,138 @@
+import datetime
+from django.utils import timezone
+from membermatters.testing import MemberMattersTestCase, make_member
+from memberbucks import debits
+from memberbucks.balances import balances
+from memberbucks.models import MemberBucks
+from profile.models import Profile, User, UserEventLog
+
+
+class DebitTestCase(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        balances.clear()
+        self.addCleanup(balances.clear)
+        self.member = make_member(
+            1,
+            memberbucks_balance=10,
+            last_memberbucks_purchase=timezone.now() - datetime.timedelta(hours=1),
+        )
+
+    def balance(self):
+        return Profile.objects.get(pk=self.member.pk).memberbucks_balance
+
+
+class DebitTests(DebitTestCase):
+    def test_success(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = debits.debit(self.member.rfid, 2.5, "Snack")
+
+        self.assertEqual(result, {"result": debits.SUCCESS, "balance": 7.5})
+        self.assertEqual(self.balance(), 7.5)
+
+        entry = MemberBucks.objects.get()
+        self.assertEqual(
+            (entry.user_id, entry.amount, entry.description, entry.transaction_type),
+            (self.member.user_id, -2.5, "Snack", "card"),
+        )
+
+    def test_amount_is_always_taken_as_positive(self):
+        result = debits.debit(self.member.rfid, -2.5, "Snack")
+
+        self.assertEqual(result["balance"], 7.5)
+        self.assertEqual(self.balance(), 7.5)
+
+    def test_insufficient_funds(self):
+        result = debits.debit(self.member.rfid, 10.01, "Snack")
+
+        self.assertEqual(result, {"result": debits.INSUFFICIENT_FUNDS, "balance": 10})
+        self.assertEqual(self.balance(), 10)
+        self.assertFalse(MemberBucks.objects.exists())
+
+    def test_unknown_member(self):
+        result = debits.debit("999999", 1, "Snack")
+
+        self.assertEqual(result, {"result": debits.UNKNOWN_MEMBER, "balance": None})
+        self.assertFalse(MemberBucks.objects.exists())
+
+    def test_throttle(self):
+        debits.debit(self.member.rfid, 1, "Snack", throttle=True)
+        result = debits.debit(self.member.rfid, 1, "Snack", throttle=True)
+
+        self.assertEqual(result, {"result": debits.TOO_SOON, "balance": 9})
+        self.assertEqual(self.balance(), 9)
+
+        # without the throttle (ie with an idempotency key) it's allowed
+        result = debits.debit(self.member.rfid, 1, "Snack")
+        self.assertEqual(result["result"], debits.SUCCESS)
+
+
+class ReceiptTests(DebitTestCase):
+    def test_receipt_is_sent_once_the_debit_commits(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            debits.debit(self.member.rfid, 2.5, "Snack")
+
+        User.email_notification.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+
+        User.email_notification.assert_called_once()
+        self.assertIn("$2.5", User.email_notification.call_args[0][0])
+        self.assertTrue(
+            UserEventLog.objects.filter(
+                user=self.member.user, logtype="memberbucks"
+            ).exists()
+        )
+
+    def test_failed_debits_send_a_warning(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            debits.debit(self.member.rfid, 20, "Snack")
+
+        self.assertIn("Failed", User.email_notification.call_args[0][0])
+
+    def test_throttled_debits_dont_send_a_receipt(self):
+        debits.debit(self.member.rfid, 1, "Snack", throttle=True)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            debits.debit(self.member.rfid, 1, "Snack", throttle=True)
+
+        self.assertEqual(callbacks, [])
+
+
+class DebitViewTests(DebitTestCase):
+    def post(self, amount, rfid=None, **headers):
+        return self.client.post(
+            f"/api/memberbucks/debit/{rfid or self.member.rfid}/{amount}/Cold+drink",
+            **headers,
+        )
+
+    def test_debit(self):
+        response = self.post(250)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"success": True, "balance": 7.5})
+        self.assertEqual(MemberBucks.objects.get().description, "Cold drink")
+
+    def test_insufficient_funds(self):
+        response = self.post(1100)
+
+        self.assertEqual(response.json(), {"success": False, "balance": 10})
+
+    def test_unknown_member(self):
+        self.assertEqual(self.post(100, rfid=999999).status_code, 400)
+
+    def test_debits_without_a_key_are_throttled(self):
+        self.post(100)
+        response = self.post(100)
+
+        self.assertEqual(
+            response.json(),
+            {"success": False, "balance": 9, "message": "Whoa! Not so fast!!"},
+        )
+
+    def test_debits_with_a_key_arent_throttled(self):
+        self.post(100, HTTP_IDEMPOTENCY_KEY="first")
+        response = self.post(100, HTTP_IDEMPOTENCY_KEY="second")
+
+        self.assertEqual(response.json(), {"success": True, "balance": 8})
@@ -0,0 +1,141 @@
+import datetime
+from django.utils import timezone
+from membermatters.testing import MemberMattersTestCase, make_member
+from memberbucks.models import MemberBucks
+
+
+class HistoryTestCase(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.member = make_member(1)
+        self.other = make_member(2)
+        # midday (local time) so each day's transactions can't straddle midnight
+        self.now = timezone.localtime().replace(hour=12)
+
+        # two transactions share each date so pages have to break ties on the id
+        for i in range(6):
+            transaction = MemberBucks.objects.create(
+                user=self.member.user,
+                amount=i + 1,
+                transaction_type="bank",
+                description=f"transaction {i}",
+            )
+            MemberBucks.objects.filter(pk=transaction.pk).update(
+                date=self.now - datetime.timedelta(days=i // 2)
+            )
+
+        MemberBucks.objects.create(
+            user=self.other.user,
+            amount=1,
+            transaction_type="bank",
+            description="someone else's",
+        )
+
+
+class GetHistoryTests(HistoryTestCase):
+    def descriptions(self, transactions):
+        return [transaction.description for transaction in transactions]
+
+    def test_newest_first(self):
+        self.assertEqual(
+            self.descriptions(MemberBucks.get_history(self.member.user_id)),
+            [f"transaction {i}" for i in (1, 0, 3, 2, 5, 4)],
+        )
+
+    def test_before_continues_after_a_tie(self):
+        first_page = list(MemberBucks.get_history(self.member.user_id, limit=3))
+        last = first_page[-1]
+
+        self.assertEqual(
+            self.descriptions(
+                MemberBucks.get_history(
+                    self.member.user_id, before=(last.date, last.id)
+                )
+            ),
+            [f"transaction {i}" for i in (2, 5, 4)],
+        )
+
+    def test_date_range(self):
+        yesterday = self.now - datetime.timedelta(days=1)
+
+        self.assertEqual(
+            self.descriptions(
+                MemberBucks.get_history(
+                    self.member.user_id,
+                    start=yesterday.replace(hour=0),
+                    end=self.now.replace(hour=0),
+                )
+            ),
+            ["transaction 3", "transaction 2"],
+        )
+
+
+class HistoryViewTests(HistoryTestCase):
+    url = "/api/memberbucks/transactions/history/"
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.member.user)
+
+    def get(self, **params):
+        return self.client.get(self.url, params)
+
+    def test_pages_cover_every_transaction_once(self):
+        descriptions = []
+        params = {"limit": 4}
+
+        while True:
+            response = self.get(**params).json()
+            descriptions += [t["description"] for t in response["transactions"]]
+
+            if not response["nextCursor"]:
+                break
+
+            params["cursor"] = response["nextCursor"]
+
+        self.assertEqual(descriptions, [f"transaction {i}" for i in (1, 0, 3, 2, 5, 4)])
+
+    def test_date_filter(self):
+        day = (self.now - datetime.timedelta(days=2)).date().isoformat()
+        transactions = self.get(**{"from": day, "to": day}).json()["transactions"]
+
+        self.assertEqual(
+            [t["description"] for t in transactions],
+            ["transaction 5", "transaction 4"],
+        )
+
+    def test_bad_params_are_refused(self):
+        self.assertEqual(self.get(cursor="!!!").status_code, 400)
+        self.assertEqual(self.get(to="soon").status_code, 400)
+
+    def test_recent_transactions(self):
+        transactions = self.client.get("/api/memberbucks/transactions/").json()
+
+        self.assertEqual(transactions[0]["description"], "transaction 1")
+        self.assertEqual(len(transactions), 6)
+
+
+class AdminHistoryViewTests(HistoryTestCase):
+    def get(self, **params):
+        return self.client.get(
+            f"/api/admin/members/{self.member.user_id}/memberbucks/", params
+        )
+
+    def test_admins_can_page_through_history(self):
+        staff = make_member(3)
+        staff.user.staff = True
+        staff.user.save()
+        self.client.force_login(staff.user)
+
+        response = self.get(limit=5).json()
+        self.assertEqual(len(response["transactions"]), 5)
+
+        response = self.get(limit=5, cursor=response["nextCursor"]).json()
+        self.assertEqual(
+            [t["description"] for t in response["transactions"]], ["transaction 4"]
+        )
+        self.assertIsNone(response["nextCursor"])
+
+    def test_members_cant_read_history(self):
+        self.client.force_login(self.other.user)
+        self.assertEqual(self.get().status_code, 403)
@@ -0,0 +1,168 @@
+import datetime
+from unittest import mock
+from django.test import override_settings
+from django.utils import timezone
+from membermatters.testing import MemberMattersTestCase, make_member
+from memberbucks import debits, idempotency
+from memberbucks.balances import balances
+from memberbucks.models import IdempotencyKey, MemberBucks
+from profile.models import Profile
+
+
+class IdempotencyTestCase(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        balances.clear()
+        self.addCleanup(balances.clear)
+        self.member = make_member(
+            1,
+            memberbucks_balance=10,
+            last_memberbucks_purchase=timezone.now() - datetime.timedelta(hours=1),
+        )
+
+    def balance(self):
+        return Profile.objects.get(pk=self.member.pk).memberbucks_balance
+
+
+class DebitIdempotencyTests(IdempotencyTestCase):
+    def debit(self, key="abc", amount=100):
+        return self.client.post(
+            f"/api/memberbucks/debit/{self.member.rfid}/{amount}/",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retries_get_the_same_response(self):
+        first = self.debit()
+        retry = self.debit()
+
+        self.assertEqual(retry.status_code, first.status_code)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertFalse(first.has_header("Idempotent-Replayed"))
+        self.assertEqual(self.balance(), 9)
+        self.assertEqual(MemberBucks.objects.count(), 1)
+
+    def test_different_keys_are_different_purchases(self):
+        self.debit("abc")
+        self.debit("def")
+
+        self.assertEqual(self.balance(), 8)
+
+    def test_keys_are_per_member(self):
+        other = make_member(2, memberbucks_balance=10)
+        self.debit()
+        self.client.post(
+            f"/api/memberbucks/debit/{other.rfid}/100/", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        self.assertEqual(Profile.objects.get(pk=other.pk).memberbucks_balance, 9)
+
+    def test_requests_in_progress(self):
+        IdempotencyKey.objects.create(
+            user=self.member.user, endpoint="debit", key="abc"
+        )
+
+        self.assertEqual(self.debit().status_code, 409)
+        self.assertEqual(self.balance(), 10)
+
+    def test_failed_requests_are_rolled_back(self):
+        def debit_then_fail(*args, **kwargs):
+            debit(*args, **kwargs)
+            raise RuntimeError("Oops")
+
+        debit = debits.debit
+
+        with mock.patch.object(debits, "debit", debit_then_fail):
+            with self.assertRaises(RuntimeError):
+                self.debit()
+
+        self.assertEqual(self.balance(), 10)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        # the key was released so the client can try again
+        self.assertEqual(self.debit().json(), {"success": True, "balance": 9})
+
+    def test_long_keys_are_refused(self):
+        self.assertEqual(self.debit("x" * 101).status_code, 400)
+        self.assertEqual(self.balance(), 10)
+
+    def test_expired_keys_are_forgotten(self):
+        self.debit()
+        IdempotencyKey.objects.update(
+            created=timezone.now() - datetime.timedelta(days=2)
+        )
+
+        self.assertFalse(self.debit().has_header("Idempotent-Replayed"))
+        self.assertEqual(self.balance(), 8)
+
+    @override_settings(IDEMPOTENCY_KEY_TTL=60)
+    def test_delete_expired_keys(self):
+        self.debit("old")
+        self.debit("new")
+        IdempotencyKey.objects.filter(key="old").update(
+            created=timezone.now() - datetime.timedelta(minutes=2)
+        )
+
+        self.assertEqual(idempotency.delete_expired_keys(), 1)
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"]
+        )
+
+
+class DonateIdempotencyTests(IdempotencyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.member.user)
+
+    def donate(self, amount=300):
+        return self.client.post(
+            f"/api/memberbucks/donate/{amount}/", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+    def test_retries_are_only_applied_once(self):
+        self.assertEqual(self.donate().status_code, 200)
+        self.assertEqual(self.donate()["Idempotent-Replayed"], "true")
+        self.assertEqual(self.balance(), 7)
+
+    def test_errors_are_replayed(self):
+        self.assertEqual(self.donate(5000).status_code, 400)
+
+        retry = self.donate(5000)
+        self.assertEqual(retry.status_code, 400)
+        self.assertEqual(retry.json(), "Not enough funds")
+
+
+@mock.patch("api_member_bucks.views.stripe.PaymentIntent.create")
+class AddFundsIdempotencyTests(IdempotencyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.member.user)
+
+    def add(self, amount=5):
+        return self.client.post(
+            f"/api/memberbucks/add/{amount}/", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+    def test_retries_only_charge_once(self, create):
+        create.return_value = mock.Mock(status="succeeded", charges=[])
+
+        self.assertEqual(self.add().status_code, 200)
+        self.assertEqual(self.add()["Idempotent-Replayed"], "true")
+
+        create.assert_called_once()
+        self.assertEqual(
+            create.call_args[1]["idempotency_key"],
+            f"memberbucks-{self.member.user_id}-abc",
+        )
+        self.assertEqual(self.balance(), 15)
+
+    def test_retries_after_an_error_dont_charge_again(self, create):
+        create.side_effect = RuntimeError("Stripe is down")
+
+        with self.assertRaises(RuntimeError):
+            self.add()
+
+        retry = self.add()
+        self.assertEqual(retry.status_code, 500)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        create.assert_called_once()
@@ -0,0 +1,219 @@
+import datetime
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from membermatters.testing import MemberMattersTestCase, make_member
+from memberbucks import ledger
+from memberbucks.balances import balances
+from memberbucks.models import MemberBucks, MemberBucksCheckpoint
+from profile.models import Profile
+
+
+class LedgerTestCase(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        balances.clear()
+        self.addCleanup(balances.clear)
+        self.member = make_member(1)
+        self.other = make_member(2)
+
+    def add(self, amount, member=None):
+        return MemberBucks.objects.create(
+            user=(member or self.member).user,
+            amount=amount,
+            transaction_type="card",
+            description="Test",
+        )
+
+    def balance(self, member=None):
+        return Profile.objects.get(pk=(member or self.member).pk).memberbucks_balance
+
+    def age(self, *transactions):
+        MemberBucks.objects.filter(pk__in=[t.pk for t in transactions]).update(
+            date=timezone.now() - datetime.timedelta(hours=1)
+        )
+
+
+class RunningBalanceTests(LedgerTestCase):
+    def test_transactions_adjust_the_balance(self):
+        self.add(10)
+        self.add(-2.5)
+
+        self.assertEqual(self.balance(), 7.5)
+        self.assertEqual(self.balance(self.other), 0)
+
+    def test_balance_is_rounded_to_the_cent(self):
+        for _ in range(10):
+            self.add(0.1)
+
+        self.add(-0.3)
+
+        self.assertEqual(self.balance(), 0.7)
+
+    def test_loaded_profile_is_kept_in_step(self):
+        user = self.member.user
+        user.profile  # load the profile so it's cached on the user
+
+        MemberBucks.objects.create(
+            user=user, amount=5, transaction_type="card", description="Test"
+        )
+
+        self.assertEqual(user.profile.memberbucks_balance, 5)
+
+    def test_editing_a_transaction_adjusts_by_the_difference(self):
+        transaction = self.add(10)
+        transaction.amount = 4
+        transaction.save()
+
+        self.assertEqual(self.balance(), 4)
+
+    def test_moving_a_transaction_moves_its_amount(self):
+        transaction = self.add(10)
+        transaction.user = self.other.user
+        transaction.amount = 6
+        transaction.save()
+
+        self.assertEqual(self.balance(), 0)
+        self.assertEqual(self.balance(self.other), 6)
+
+    def test_deleting_transactions_takes_them_off_the_balance(self):
+        self.add(10)
+        transaction = self.add(-3)
+        self.add(5, self.other)
+
+        transaction.delete()
+        self.assertEqual(self.balance(), 10)
+
+        MemberBucks.objects.all().delete()
+        self.assertEqual(self.balance(), 0)
+        self.assertEqual(self.balance(self.other), 0)
+
+
+class CheckpointTests(LedgerTestCase):
+    def test_checkpoints_record_the_balance(self):
+        first = self.add(10)
+        second = self.add(-4)
+        self.age(first, second)
+
+        self.assertEqual(ledger.create_checkpoints(), 1)
+
+        checkpoint = ledger.get_latest_checkpoint(self.member.user_id)
+        self.assertEqual(checkpoint.balance, 6)
+        self.assertEqual(checkpoint.last_transaction_id, second.id)
+
+    def test_checkpoints_build_on_the_last_one(self):
+        self.age(self.add(10))
+        ledger.create_checkpoints()
+        self.age(self.add(2.5))
+        ledger.create_checkpoints()
+
+        self.assertEqual(
+            ledger.get_latest_checkpoint(self.member.user_id).balance, 12.5
+        )
+
+    def test_recent_and_unchanged_members_are_skipped(self):
+        self.age(self.add(10))
+        ledger.create_checkpoints()
+        self.add(5, self.other)
+
+        self.assertEqual(ledger.create_checkpoints(), 0)
+        self.assertEqual(MemberBucksCheckpoint.objects.count(), 1)
+
+    def test_checkpoints_stop_before_recent_transactions(self):
+        recent = self.add(10)
+        # an offline sale uploaded after it, but dated an hour ago
+        offline_sale = self.add(-2)
+        self.age(offline_sale)
+
+        self.assertEqual(ledger.create_checkpoints(), 0)
+
+        self.age(recent)
+        ledger.create_checkpoints()
+
+        checkpoint = ledger.get_latest_checkpoint(self.member.user_id)
+        self.assertEqual(checkpoint.balance, 8)
+        self.assertEqual(checkpoint.last_transaction_id, offline_sale.id)
+
+    def test_history_balance_starts_from_a_checkpoint(self):
+        self.age(self.add(10))
+        ledger.create_checkpoints()
+        self.add(-1)
+        checkpoint = ledger.get_latest_checkpoint(self.member.user_id)
+
+        self.assertEqual(ledger.get_history_balance(self.member.user_id, checkpoint), 9)
+        self.assertEqual(ledger.get_history_balance(self.member.user_id), 9)
+
+
+class ReconcileTests(LedgerTestCase):
+    def break_balance(self, balance):
+        Profile.objects.filter(pk=self.member.pk).update(memberbucks_balance=balance)
+
+    def test_matching_balances(self):
+        self.add(10)
+        self.add(-0.1)
+
+        self.assertEqual(ledger.reconcile(), [])
+        self.assertEqual(ledger.reconcile(full=True), [])
+
+    def test_mismatches_are_found(self):
+        self.add(10)
+        self.break_balance(7)
+
+        ((profile, balance, expected),) = ledger.reconcile()
+        self.assertEqual((profile.pk, balance, expected), (self.member.pk, 7, 10))
+
+    def test_changed_history_is_only_found_by_a_full_check(self):
+        old = self.add(10)
+        self.age(old)
+        ledger.create_checkpoints()
+        MemberBucks.objects.filter(pk=old.pk).update(amount=8)
+
+        self.assertEqual(ledger.reconcile(), [])
+        self.assertEqual(len(ledger.reconcile(full=True)), 1)
+
+    def test_fix_balance(self):
+        self.add(10)
+        self.break_balance(7)
+        balances[self.member.user_id] = (7, float("inf"))
+
+        self.assertEqual(ledger.fix_balance(self.member.user_id), 10)
+        self.assertEqual(self.balance(), 10)
+
+        # forgetting the cached copy waits until the fix is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            ledger.fix_balance(self.member.user_id)
+
+        self.assertNotIn(self.member.user_id, balances)
+
+
+class ReconcileCommandTests(LedgerTestCase):
+    def call(self, *args):
+        out = StringIO()
+        call_command("reconcile_memberbucks", *args, stdout=out)
+        return out.getvalue()
+
+    def test_all_balances_match(self):
+        self.add(10)
+        self.assertIn("All balances match.", self.call())
+
+    def test_fix_needs_full(self):
+        with self.assertRaises(CommandError):
+            self.call("--fix")
+
+    def test_fix(self):
+        self.add(10)
+        Profile.objects.filter(pk=self.member.pk).update(memberbucks_balance=3)
+
+        output = self.call("--full", "--fix")
+
+        self.assertIn("balance is $3.0 but should be $10", output)
+        self.assertIn("Fixed 1 balance(s).", output)
+        self.assertEqual(self.balance(), 10)
+
+    def test_mismatches_are_left_without_fix(self):
+        self.add(10)
+        Profile.objects.filter(pk=self.member.pk).update(memberbucks_balance=3)
+
+        self.call("--full")
+
+        self.assertEqual(self.balance(), 3)
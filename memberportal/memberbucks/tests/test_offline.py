@@ -0,0 +1,178 @@
+import json
+import time
+from django.test import override_settings
+from access.models import MemberbucksDevice
+from membermatters.testing import MemberMattersTestCase, make_member
+from memberbucks import offline
+from memberbucks.balances import balances
+from memberbucks.models import MemberBucks
+from profile.models import EventLog, Profile
+
+
+class OfflineBatchTests(MemberMattersTestCase):
+    def setUp(self):
+        super().setUp()
+        balances.clear()
+        self.addCleanup(balances.clear)
+        self.member = make_member(1, memberbucks_balance=5)
+        self.device = MemberbucksDevice.objects.create(
+            name="Vending", ip_address="10.0.0.1"
+        )
+        self.other_device = MemberbucksDevice.objects.create(
+            name="Coffee", ip_address="10.0.0.2"
+        )
+
+    def sale(self, sequence, amount=250, rfid=None):
+        return {
+            "sequence": sequence,
+            "rfid": rfid or self.member.rfid,
+            "amount": amount,
+            "description": "Chips",
+            "timestamp": int(time.time()) - 60,
+        }
+
+    def upload(self, sales, to=None, signature=None, **batch):
+        to = to or self.device
+        body = json.dumps(
+            {"device": to.id, "sent": time.time(), "transactions": sales, **batch}
+        ).encode()
+
+        return self.client.post(
+            f"/api/memberbucks/device/{to.id}/offline/",
+            body,
+            content_type="application/json",
+            HTTP_X_SIGNATURE=signature or offline.sign_batch(body),
+        )
+
+    def results(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [sale["result"] for sale in response.json()["results"]]
+
+    def balance(self):
+        return Profile.objects.get(pk=self.member.pk).memberbucks_balance
+
+    def test_sales_are_applied(self):
+        response = self.upload([self.sale(1), self.sale(2, amount=100)])
+
+        self.assertEqual(self.results(response), [offline.APPLIED] * 2)
+        self.assertEqual(response.json()["results"][1]["balance"], 1.5)
+        self.assertEqual(self.balance(), 1.5)
+
+        entry = MemberBucks.objects.get(device_sequence=1)
+        self.assertEqual((entry.device_id, entry.amount), (self.device.id, -2.5))
+
+    def test_unsigned_batches_are_refused(self):
+        self.assertEqual(
+            self.upload([self.sale(1)], signature="0" * 64).status_code, 403
+        )
+        self.assertFalse(MemberBucks.objects.exists())
+
+    def test_batches_for_another_device_are_refused(self):
+        # a batch signed for one device sent to a different device's url
+        response = self.upload(
+            [self.sale(1)], to=self.other_device, device=self.device.id
+        )
+        self.assertEqual(response.status_code, 403)
+
+        response = self.upload([self.sale(1)], device=True)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(MemberBucks.objects.exists())
+
+    def test_old_batches_are_refused(self):
+        self.assertEqual(
+            self.upload([self.sale(1)], sent=time.time() - 1000).status_code, 403
+        )
+        self.assertEqual(self.upload([self.sale(1)], sent="now").status_code, 403)
+        self.assertEqual(self.upload([self.sale(1)], sent=True).status_code, 403)
+
+    def test_uploading_the_same_sales_again(self):
+        self.upload([self.sale(1)])
+        response = self.upload([self.sale(1), self.sale(2)])
+
+        self.assertEqual(self.results(response), [offline.DUPLICATE, offline.APPLIED])
+        self.assertEqual(self.balance(), 0)
+
+    def test_sequences_are_per_device(self):
+        self.upload([self.sale(1)])
+        response = self.upload([self.sale(1)], to=self.other_device)
+
+        self.assertEqual(self.results(response), [offline.APPLIED])
+
+    def test_invalid_sales(self):
+        sales = [
+            self.sale(True),
+            self.sale(-1),
+            self.sale("1"),
+            self.sale(4, amount=0),
+            self.sale(5, amount=-100),
+            self.sale(6, amount=250.7),
+            self.sale(7, amount="250"),
+            self.sale(8, amount=True),
+            dict(self.sale(9), timestamp="yesterday"),
+            {"sequence": 10, "rfid": self.member.rfid},
+        ]
+
+        response = self.upload(sales)
+
+        self.assertEqual(self.results(response), [offline.INVALID] * len(sales))
+        self.assertEqual(self.balance(), 5)
+
+    def test_rejected_sales_are_logged(self):
+        self.upload([self.sale(1, amount=250.7), self.sale(2, rfid="999999")])
+
+        log = EventLog.objects.get(description__startswith="Couldn't apply")
+        self.assertIn("2 offline", log.description)
+        self.assertEqual([sale["sequence"] for sale in json.loads(log.data)], [1, 2])
+
+    def test_unknown_members(self):
+        response = self.upload([self.sale(1, rfid="999999")])
+
+        self.assertEqual(self.results(response), [offline.UNKNOWN_MEMBER])
+
+    def test_large_sales_are_applied(self):
+        response = self.upload([self.sale(1, amount=1200)])
+
+        self.assertEqual(self.results(response), [offline.APPLIED])
+        self.assertEqual(self.balance(), -7)
+
+    def test_sales_are_dated_when_they_happened(self):
+        sold_at = int(time.time()) - 3600
+        self.upload(
+            [
+                dict(self.sale(1), timestamp=sold_at),
+                dict(self.sale(2), timestamp=int(time.time()) + 3600),
+                {
+                    key: value
+                    for key, value in self.sale(3).items()
+                    if key != "timestamp"
+                },
+            ]
+        )
+
+        dates = dict(MemberBucks.objects.values_list("device_sequence", "date"))
+        self.assertEqual(dates[1].timestamp(), sold_at)
+
+        # sales can't be dated in the future, or before the upload if we
+        # don't know when they happened
+        for sequence in (2, 3):
+            self.assertLess(abs(dates[sequence].timestamp() - time.time()), 60)
+
+    def test_sales_can_go_below_zero(self):
+        response = self.upload([self.sale(1, amount=1000)])
+
+        self.assertEqual(self.results(response), [offline.APPLIED])
+        self.assertEqual(self.balance(), -5)
+        self.assertTrue(
+            EventLog.objects.filter(description__contains="negative balance").exists()
+        )
+
+    @override_settings(MEMBERBUCKS_OFFLINE_BATCH_MAX=2)
+    def test_batch_size_is_limited(self):
+        response = self.upload([self.sale(1), self.sale(2), self.sale(3)])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(MemberBucks.objects.exists())
+
+    def test_malformed_batches(self):
+        self.assertEqual(self.upload("nope").status_code, 400)
+        self.assertEqual(self.upload(["nope"]).status_code, 400)
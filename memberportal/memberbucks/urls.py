@@ -27,6 +27,11 @@ urlpatterns = [
         views.MemberbucksDebit.as_view(),
         name="memberbucks_debit",
     ),
+    path(
+        "api/memberbucks/device/<int:device_id>/offline/",
+        views.MemberbucksOfflineBatch.as_view(),
+        name="memberbucks_offline_batch",
+    ),
     path(
         "api/memberbucks/balance/<int:rfid>/",
         views.MemberbucksBalance.as_view(),
@@ -1,9 +1,11 @@
-from django.core.exceptions import ObjectDoesNotExist
-from django.utils import timezone
-from membermatters.helpers import log_user_event
-from .models import MemberBucks
-from profile.models import Profile, User
-from constance import config
+from django.conf import settings
+from access import registry
+from access.models import MemberbucksDevice
+from profile.models import Profile
+from . import debits, offline
+from .balances import get_balance, get_member
+from .idempotency import get_key, idempotent
+import json
 import pytz
 
 from rest_framework import status, permissions
@@ -13,6 +15,10 @@ from rest_framework.views import APIView
 utc = pytz.UTC
 
 
+def get_user_id(rfid):
+    return Profile.objects.filter(rfid=rfid).values_list("user_id", flat=True).first()
+
+
 class MemberbucksDebit(APIView):
     """
     get:
@@ -21,6 +27,11 @@ class MemberbucksDebit(APIView):
 
     permission_classes = [permissions.AllowAny]
 
+    @idempotent(
+        "debit",
+        lambda request, rfid=None, *args, **kwargs: get_user_id(rfid),
+        atomic=True,
+    )
     def post(self, request, rfid=None, amount=None, description="No Description"):
         if amount is None or rfid is None:
             return Response(status=status.HTTP_400_BAD_REQUEST)
@@ -28,11 +39,6 @@ class MemberbucksDebit(APIView):
         amount = abs(
             amount / 100
         )  # the abs() stops us accidentally crediting an account if it's negative
-        try:
-            profile = Profile.objects.get(rfid=rfid)
-
-        except ObjectDoesNotExist:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
 
         if amount is not None:
             if abs(amount / 100) > 10:
@@ -41,76 +47,34 @@ class MemberbucksDebit(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-        if profile.memberbucks_balance >= amount:
-            time_dif = (
-                timezone.now() - profile.last_memberbucks_purchase
-            ).total_seconds()
-
-            if time_dif > 5:
-                transaction = MemberBucks()
-                transaction.amount = amount * -1.0
-                transaction.user = profile.user
-                transaction.description = description.replace("+", " ")
-                transaction.transaction_type = "card"
-                transaction.save()
-
-                profile.last_memberbucks_purchase = timezone.now()
-                profile.save()
-
-                subject = (
-                    f"You just made a ${amount} {config.MEMBERBUCKS_NAME} purchase."
-                )
-                message = (
-                    "Description: {}. Balance Remaining: ${}. If this wasn't you, or you believe there has been an "
-                    "error, please let us know.".format(
-                        transaction.description, profile.memberbucks_balance
-                    )
-                )
-                User.objects.get(profile=profile).email_notification(
-                    subject, subject, subject, message
-                )
-
-                log_user_event(
-                    profile.user,
-                    f"Successfully debited ${amount} from {config.MEMBERBUCKS_NAME} account.",
-                    "memberbucks",
-                )
-
-                return Response(
-                    {"success": True, "balance": round(profile.memberbucks_balance, 2)}
-                )
-
-            else:
-                log_user_event(
-                    profile.user,
-                    f"Not enough funds to debit ${amount} from {config.MEMBERBUCKS_NAME} account.",
-                    "memberbucks",
-                )
-                subject = (
-                    f"Failed to make a ${amount} {config.MEMBERBUCKS_NAME} purchase."
-                )
-                User.objects.get(profile=profile).email_notification(
-                    subject,
-                    subject,
-                    subject,
-                    f"We just tried to debit ${amount} from your {config.MEMBERBUCKS_NAME} balance but were not successful. "
-                    f"You currently have ${profile.memberbucks_balance}. If this wasn't you, please let us know "
-                    "immediately.",
-                )
+        # without an Idempotency-Key we can't tell a retry from a second
+        # purchase, so fall back to not allowing purchases too close together
+        result = debits.debit(
+            rfid,
+            amount,
+            description.replace("+", " "),
+            throttle=not get_key(request),
+        )
 
-                return Response(
-                    {"success": False, "balance": round(profile.memberbucks_balance, 2)}
-                )
+        if result["result"] == debits.UNKNOWN_MEMBER:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        else:
+        if result["result"] == debits.TOO_SOON:
             return Response(
                 {
                     "success": False,
-                    "balance": round(profile.memberbucks_balance, 2),
+                    "balance": result["balance"],
                     "message": "Whoa! Not so fast!!",
                 }
             )
 
+        return Response(
+            {
+                "success": result["result"] == debits.SUCCESS,
+                "balance": result["balance"],
+            }
+        )
+
 
 class MemberbucksBalance(APIView):
     """
@@ -123,9 +87,55 @@ class MemberbucksBalance(APIView):
         if rfid is None:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            profile = Profile.objects.get(rfid=rfid)
-            return Response({"balance": profile.memberbucks_balance})
+        member = get_member(rfid)
 
-        except ObjectDoesNotExist:
+        if member is None:
             return Response()
+
+        return Response({"balance": get_balance(member["user_id"])})
+
+
+class MemberbucksOfflineBatch(APIView):
+    """
+    post: applies a signed batch of sales a device made while it was offline
+    (see memberbucks/offline.py).
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, device_id=None):
+        body = request.body
+
+        if not offline.check_signature(body, request.META.get("HTTP_X_SIGNATURE")):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        device = registry.get_device(MemberbucksDevice, device_id=device_id)
+
+        if device is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            batch = json.loads(body)
+            sales = batch["transactions"]
+
+        except (ValueError, KeyError, TypeError):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        if not offline.check_batch(batch, device_id):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        if not isinstance(sales, list) or not all(
+            isinstance(sale, dict) for sale in sales
+        ):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        if len(sales) > settings.MEMBERBUCKS_OFFLINE_BATCH_MAX:
+            return Response(
+                f"A maximum of {settings.MEMBERBUCKS_OFFLINE_BATCH_MAX} transactions may be uploaded at once.",
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        device.checkin()
+        results = offline.apply_batch(device, sales)
+
+        return Response({"success": True, "results": results})
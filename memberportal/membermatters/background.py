@@ -0,0 +1,174 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# how long (in seconds) submit() waits for space in a full queue
+FULL_QUEUE_WAIT = 0.05
+
+
+class BackgroundWorker:
+    """
+    Runs jobs on a daemon thread so that slow side effects (network calls, non
+    critical writes, etc.) don't hold up the request that triggered them. If the
+    queue is still full after waiting up to FULL_QUEUE_WAIT seconds the job is
+    run straight away, or dropped (and logged) if drop_when_full is set. Use that
+    for jobs that make network calls, so they can never end up back in the
+    request. Anything still queued is run before the process exits.
+    """
+
+    def __init__(self, name, max_size=1000, drop_when_full=False):
+        self.name = name
+        self.drop_when_full = drop_when_full
+        self.queue = queue.Queue(max_size)
+        self.thread = None
+        self.lock = threading.Lock()
+        atexit.register(self.drain)
+
+    def submit(self, func, *args, **kwargs):
+        self.put((func, args, kwargs))
+
+    def put(self, item):
+        self.start()
+
+        try:
+            self.queue.put(item, timeout=FULL_QUEUE_WAIT)
+
+        except queue.Full:
+            if self.drop_when_full:
+                logger.error(f"{self.name} queue is full, dropping item {item!r}.")
+
+            else:
+                logger.warning(f"{self.name} queue is full, handling item immediately.")
+                self.run_item(item)
+
+    def start(self):
+        # threads don't survive a fork, so check it's still alive as well
+        if self.thread is None or not self.thread.is_alive():
+            with self.lock:
+                if self.thread is None or not self.thread.is_alive():
+                    self.thread = threading.Thread(
+                        target=self.run, name=self.name, daemon=True
+                    )
+                    self.thread.start()
+
+    def run_job(self, func, args, kwargs):
+        try:
+            func(*args, **kwargs)
+
+        except Exception:
+            logger.exception(f"{self.name} job {func.__name__} failed.")
+
+    def run(self):
+        while True:
+            self.run_item(self.queue.get())
+            self.queue.task_done()
+
+            # don't hold onto a database connection while we're idle
+            if self.queue.empty():
+                close_old_connections()
+
+    def drain(self, timeout=10):
+        """
+        Runs any jobs that are still in the queue, then waits (up to timeout
+        seconds) for the worker thread to finish what it's doing.
+        """
+        items = []
+
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+
+            except queue.Empty:
+                break
+
+        if items:
+            self.run_items(items)
+
+            for _ in items:
+                self.queue.task_done()
+
+        with self.queue.all_tasks_done:
+            deadline = time.monotonic() + timeout
+
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    break
+
+                self.queue.all_tasks_done.wait(remaining)
+
+    def run_item(self, item):
+        func, args, kwargs = item
+        self.run_job(func, args, kwargs)
+
+    def run_items(self, items):
+        for item in items:
+            self.run_item(item)
+
+
+class BatchingWorker(BackgroundWorker):
+    """
+    Collects items on a queue and hands them to handler(items) in batches from
+    a daemon thread. A batch is sent once `window` seconds have passed since
+    its first item arrived, or once it has `max_batch` items in it.
+    """
+
+    def __init__(
+        self,
+        name,
+        handler,
+        window=2,
+        max_batch=100,
+        max_size=1000,
+        drop_when_full=False,
+    ):
+        super().__init__(name, max_size, drop_when_full)
+        self.handler = handler
+        self.window = window
+        self.max_batch = max_batch
+        self.flushing = threading.Event()
+
+    def submit(self, item):
+        self.put(item)
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.window
+
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0 or self.flushing.is_set():
+                    break
+
+                # wait in short slices so a drain doesn't sit out the window
+                try:
+                    batch.append(self.queue.get(timeout=min(remaining, 0.5)))
+
+                except queue.Empty:
+                    continue
+
+            self.run_items(batch)
+
+            for _ in batch:
+                self.queue.task_done()
+
+            if self.queue.empty():
+                close_old_connections()
+
+    def drain(self, timeout=10):
+        self.flushing.set()
+        super().drain(timeout)
+
+    def run_item(self, item):
+        self.run_items([item])
+
+    def run_items(self, items):
+        self.run_job(self.handler, (items,), {})
@@ -1,4 +1,16 @@
 from constance.backends.database import DatabaseBackend as BaseDatabaseBackend
+from django.db import DatabaseError, transaction
+from django.db.models.signals import post_delete, post_save
+from membermatters.snapshots import Snapshot
+
+
+def load_config_values():
+    from constance.backends.database.models import Constance
+
+    return {constance.key: constance.value for constance in Constance.objects.all()}
+
+
+config_values = Snapshot("constance", load_config_values)
 
 
 class DatabaseBackend(BaseDatabaseBackend):
@@ -7,9 +19,29 @@ class DatabaseBackend(BaseDatabaseBackend):
     Overrides the `get` method to remove silencing of database failures.
     Such errors would otherwise result in unwanted resetting of parameters
     to default values.
+
+    Config values are read on almost every request, so they're kept in an
+    in-process snapshot that's reloaded when any of them change (see
+    membermatters/snapshots.py) instead of being queried one key at a time.
     """
 
+    def __init__(self):
+        super().__init__()
+        post_save.connect(self.invalidate, sender=self._model)
+        post_delete.connect(self.invalidate, sender=self._model)
+
+    def invalidate(self, sender, instance, **kwargs):
+        transaction.on_commit(config_values.invalidate)
+
     def get(self, key):
+        try:
+            return config_values.get().get(self.add_prefix(key))
+
+        except DatabaseError:
+            # ie the snapshot version table doesn't exist yet during a migration
+            return self.get_from_database(key)
+
+    def get_from_database(self, key):
         key = self.add_prefix(key)
         if self._cache:
             value = self._cache.get(key)
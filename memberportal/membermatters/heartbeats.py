@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from membermatters.background import BatchingWorker
+
+# keeps the UPDATE statements we generate to a reasonable size
+FLUSH_CHUNK_SIZE = 500
+
+
+def flush_heartbeats(heartbeats):
+    """
+    Writes the latest last_seen timestamp for each object we've had a heartbeat
+    from. Only the last_seen column is updated, with one query per model.
+    :param heartbeats: [(model, pk, datetime)]
+    """
+    latest = {}
+
+    for model, pk, when in heartbeats:
+        if (model, pk) not in latest or when > latest[(model, pk)]:
+            latest[(model, pk)] = when
+
+    by_model = {}
+
+    for (model, pk), when in latest.items():
+        by_model.setdefault(model, []).append((pk, when))
+
+    for model, seen in by_model.items():
+        for i in range(0, len(seen), FLUSH_CHUNK_SIZE):
+            chunk = seen[i : i + FLUSH_CHUNK_SIZE]
+            model.objects.filter(pk__in=[pk for pk, when in chunk]).update(
+                last_seen=Case(
+                    *[When(pk=pk, then=Value(when)) for pk, when in chunk],
+                    output_field=DateTimeField(),
+                )
+            )
+
+
+heartbeat_worker = BatchingWorker(
+    "heartbeats",
+    flush_heartbeats,
+    window=settings.HEARTBEAT_FLUSH_INTERVAL,
+    max_batch=5000,
+    max_size=10000,
+)
+
+
+def record_heartbeat(model, pk):
+    """
+    Records that we've just seen an object (ie a device checking in or a member
+    swiping). The last_seen field is updated in bulk every few seconds instead
+    of saving the whole row every time.
+    :param model: the model that has the last_seen field
+    :param pk: the primary key of the object
+    :return: the time that was recorded
+    """
+    now = timezone.now()
+    heartbeat_worker.submit((model, pk, now))
+
+    return now
@@ -1,11 +1,148 @@
-from profile.models import EventLog, UserEventLog
-
-
-def log_user_event(user, description, event_type, data=""):
-    UserEventLog(
-        description=description, logtype=event_type, user=user, data=data
-    ).save()
-
-
-def log_event(description, event_type, data=""):
-    EventLog(description=description, logtype=event_type, data=data).save()
+import base64
+import binascii
+import datetime
+import logging
+from django.db import DataError, IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from membermatters.background import BatchingWorker
+from profile.models import EventLog, UserEventLog
+
+logger = logging.getLogger(__name__)
+
+
+def write_log(model, fields):
+    try:
+        with transaction.atomic():
+            model.objects.create(**fields)
+
+    except (DataError, IntegrityError):
+        logger.exception(f"Failed to save {model.__name__}: {fields!r}")
+
+
+def write_logs(logs):
+    """
+    Saves a batch of queued log entries in a single transaction. The logs use
+    multi table inheritance, so they can't be inserted with bulk_create. A bad
+    entry (ie its user has been deleted since it was queued) is logged and
+    skipped rather than taking the rest of the batch with it.
+    :param logs: [(model, fields)]
+    """
+    try:
+        with transaction.atomic():
+            for model, fields in logs:
+                write_log(model, fields)
+
+    except (DataError, IntegrityError):
+        # a deferred foreign key check failed when the batch was committed, so
+        # save them one at a time to find out which one it was
+        for model, fields in logs:
+            write_log(model, fields)
+
+
+# log entries are queued and written in batches so they don't slow down requests
+event_log = BatchingWorker("event-log", write_logs, window=2, max_batch=200)
+
+
+def log_user_event(user, description, event_type, data=""):
+    event_log.submit(
+        (
+            UserEventLog,
+            {
+                "description": description,
+                "logtype": event_type,
+                "user_id": user.pk,
+                "data": str(data),
+                "date": timezone.now(),
+            },
+        )
+    )
+
+
+def log_event(description, event_type, data=""):
+    event_log.submit(
+        (
+            EventLog,
+            {
+                "description": description,
+                "logtype": event_type,
+                "data": str(data),
+                "date": timezone.now(),
+            },
+        )
+    )
+
+
+def parse_date_param(value, end_of_day=False):
+    """
+    Parses a date or datetime from the query string.
+    :param value: an ISO 8601 date or datetime
+    :param end_of_day: if a date should include the whole day (ie the end of a range)
+    :return: an aware datetime, or None if there's no value
+    """
+    if not value:
+        return None
+
+    parsed = parse_datetime(value)
+
+    if parsed is None:
+        day = parse_date(value)
+
+        if day is None:
+            raise ValueError(value)
+
+        if end_of_day:
+            day += datetime.timedelta(days=1)
+
+        parsed = timezone.make_aware(datetime.datetime.combine(day, datetime.time()))
+
+    elif timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+
+    return parsed
+
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def make_cursor(date, pk):
+    """
+    Makes an opaque, URL safe cursor pointing at a row of a list that's ordered
+    by (date, id). The date is stored as whole microseconds so it round trips
+    exactly.
+    """
+    micros = (date - EPOCH) // datetime.timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(f"{micros}:{pk}".encode()).decode().rstrip("=")
+
+
+def parse_cursor(cursor):
+    """
+    The opposite of make_cursor().
+    :return: (date, id), raises ValueError if the cursor is invalid
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        micros, pk = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        return EPOCH + datetime.timedelta(microseconds=int(micros)), int(pk)
+
+    except (binascii.Error, UnicodeError, OverflowError) as e:
+        raise ValueError(cursor) from e
+
+
+def get_page_params(params, default_limit=50, max_limit=200):
+    """
+    Parses the query string of a paginated list that's ordered newest first.
+    :param params: the request's query params (cursor, limit, from, to)
+    :return: {"start", "end", "before", "limit"}, raises ValueError if invalid
+    """
+    before = None
+
+    if params.get("cursor"):
+        before = parse_cursor(params.get("cursor"))
+
+    return {
+        "start": parse_date_param(params.get("from")),
+        "end": parse_date_param(params.get("to"), end_of_day=True),
+        "before": before,
+        "limit": max(min(int(params.get("limit", default_limit)), max_limit), 1),
+    }
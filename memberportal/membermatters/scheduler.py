@@ -0,0 +1,92 @@
+"""
+A small scheduler for jobs that need to run every so often (ie timing out
+interlock sessions). Tasks are registered with the @periodic_task decorator in
+an app's tasks.py and are run from a daemon thread started in wsgi.py.
+
+Every gunicorn worker has its own scheduler thread, so before a task runs its
+ScheduledTask row is moved to the next due time with a conditional update. Only
+the worker whose update succeeds runs the task.
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+logger = logging.getLogger(__name__)
+tasks = {}
+
+
+def periodic_task(interval):
+    """
+    Registers a function to be run every `interval` seconds.
+    :param interval: how often the task should run, in seconds
+    """
+
+    def decorator(func):
+        tasks[f"{func.__module__}.{func.__name__}"] = (func, interval)
+        return func
+
+    return decorator
+
+
+def claim_task(name, interval):
+    """
+    Tries to claim the next run of a task for this process.
+    :param name: the name of the task
+    :param interval: how often the task should run, in seconds
+    :return: True if the task is due and we should run it
+    """
+    from api_general.models import ScheduledTask
+
+    now = timezone.now()
+    ScheduledTask.objects.get_or_create(name=name, defaults={"next_run": now})
+
+    claimed = ScheduledTask.objects.filter(name=name, next_run__lte=now).update(
+        next_run=now + timedelta(seconds=interval), last_run=now
+    )
+
+    return claimed == 1
+
+
+def run_pending():
+    """Runs any tasks that are due."""
+    for name, (func, interval) in tasks.items():
+        try:
+            if claim_task(name, interval):
+                func()
+
+        except Exception:
+            logger.exception(f"Scheduled task {name} failed.")
+
+
+class Scheduler:
+    def __init__(self):
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        if not settings.SCHEDULER_ENABLED:
+            return
+
+        # threads don't survive a fork, so check it's still alive as well
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                autodiscover_modules("tasks")
+                self.thread = threading.Thread(
+                    target=self.run, name="scheduler", daemon=True
+                )
+                self.thread.start()
+
+    def run(self):
+        while True:
+            run_pending()
+            close_old_connections()
+            time.sleep(settings.SCHEDULER_TICK)
+
+
+scheduler = Scheduler()
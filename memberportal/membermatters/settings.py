@@ -204,6 +204,81 @@ AUTH_USER_MODEL = "profile.User"
 
 REQUEST_TIMEOUT = 0.05
 
+# Door strikes and interlocks wait on the swipe decision, so we aim to answer 99%
+# of swipes within this many seconds (excluding network time). See access/decisions.py.
+SWIPE_LATENCY_TARGET = 0.1
+
+# Vending machines wait on the debit before they vend, so we aim to answer 99% of
+# debits within this many seconds (excluding network time). See memberbucks/debits.py.
+DEBIT_LATENCY_TARGET = 0.15
+
+# The most offline sales a memberbucks device can upload in one batch.
+# See memberbucks/offline.py.
+MEMBERBUCKS_OFFLINE_BATCH_MAX = 500
+
+# How old (in seconds) a signed offline sales upload can be before we refuse it,
+# so a captured upload can't be replayed later. Devices sign each upload as they
+# send it. See memberbucks/offline.py.
+MEMBERBUCKS_OFFLINE_BATCH_MAX_AGE = 300
+
+# How long (in seconds) we remember the response to a memberbucks request with an
+# Idempotency-Key header, so a retry isn't applied twice. See memberbucks/idempotency.py.
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+
+# Debits without an Idempotency-Key header are refused if the member's last purchase
+# was less than this many seconds ago, so a retried request isn't charged twice.
+MEMBERBUCKS_DEBIT_MIN_INTERVAL = 5
+
+# How long (in seconds) each worker keeps a member's memberbucks balance for the
+# balance screens on vending machines. See memberbucks/balances.py.
+MEMBERBUCKS_BALANCE_CACHE_TTL = 5
+
+# How often (in seconds) the last_seen timestamps of devices and members are
+# written to the database. See membermatters/heartbeats.py.
+HEARTBEAT_FLUSH_INTERVAL = 10
+
+# Periodic tasks (ie timing out interlock sessions) are run by a scheduler
+# thread in each web worker, it checks for due tasks every SCHEDULER_TICK
+# seconds. See membermatters/scheduler.py.
+SCHEDULER_ENABLED = True
+SCHEDULER_TICK = 5
+
+# How often (in seconds) each worker checks if its in-process snapshots (ie the
+# device registry) are out of date. See membermatters/snapshots.py.
+SNAPSHOT_CHECK_INTERVAL = 5
+
+# How long (in days) event logs of each type are kept in the database before
+# they're moved to compressed files in LOG_ARCHIVE_LOCATION. Types that aren't
+# listed use LOG_RETENTION_DEFAULT_DAYS, None means they're kept forever. Nothing
+# is archived unless PORTAL_LOG_RETENTION_ENABLED is set to "true".
+LOG_RETENTION_ENABLED = os.environ.get("PORTAL_LOG_RETENTION_ENABLED") == "true"
+LOG_RETENTION_DAYS = {
+    "email": 30,
+    "error": 90,
+    "generic": 180,
+    "usage": 180,
+    "door": 365,
+    "interlock": 365,
+}
+LOG_RETENTION_DEFAULT_DAYS = None
+LOG_ARCHIVE_LOCATION = os.environ.get(
+    "PORTAL_LOG_ARCHIVE_LOCATION", "/usr/src/data/log_archive/"
+)
+LOG_ARCHIVE_BATCH_SIZE = 1000
+# the most days, and logs, that can be read from the archive in one request
+LOG_ARCHIVE_QUERY_MAX_DAYS = 31
+LOG_ARCHIVE_QUERY_MAX_LOGS = 1000
+
+# How many authorised tag list versions we keep changes for. Controllers that
+# are further behind than this get sent a full copy of the list instead.
+ACL_CHANGE_HISTORY = 500
+
+# Controllers can long-poll for changes to their authorised tag list. This is
+# the most we'll hold a request open for, and how often we check for changes
+# made by other workers (both in seconds).
+ACL_LONG_POLL_TIMEOUT = 25
+ACL_LONG_POLL_INTERVAL = 2
+
 # Django constance configuration
 CONSTANCE_BACKEND = "membermatters.constance_backend.DatabaseBackend"
 
@@ -477,6 +552,10 @@ CONSTANCE_CONFIG = {
         "",
         "Canvas course id for the induction.",
     ),
+    "SITE_SESSION_MAX_HOURS": (
+        0,
+        "The maximum amount of hours a member can stay signed into the site before they're automatically signed out (0 to disable).",
+    ),
     "MAX_INDUCTION_DAYS": (
         180,
         "The maximum amount of days since a member was last inducted before they have to complete another induction (0 to disable).",
@@ -639,6 +718,7 @@ CONSTANCE_CONFIG_FIELDSETS = OrderedDict(
                 "SPACE_DIRECTORY_PROJECTS",
             ),
         ),
+        ("Site Sign In", ("SITE_SESSION_MAX_HOURS",)),
         ("Theme Swipe Integration", ("THEME_SWIPE_URL",)),
         (
             "Discord Integration",
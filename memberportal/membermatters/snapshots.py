@@ -0,0 +1,99 @@
+"""
+In-process snapshots of data that is read on every request but rarely changes
+(ie the list of devices). We run several gunicorn workers, so each snapshot
+has a version number in the database (api_general.models.SnapshotVersion).
+Changing the data bumps the version, and each worker checks it at most every
+SNAPSHOT_CHECK_INTERVAL seconds and reloads its copy if it's out of date.
+"""
+
+import threading
+import time
+from django.conf import settings
+from django.db.models import F
+
+
+class Snapshot:
+    # every snapshot in this process, so we can find the ones that depend on another
+    instances = []
+
+    def __init__(self, name, loader, depends_on=()):
+        """
+        :param name: a unique name for the snapshot, used for its version number
+        :param loader: a function that builds the snapshot from the database
+        :param depends_on: names of other snapshots this one is built from, it's
+        reloaded when any of them change too
+        """
+        self.name = name
+        self.names = (name,) + tuple(depends_on)
+        self.loader = loader
+        self.lock = threading.Lock()
+        # (version, value, time of the next version check)
+        self.state = (None, None, 0)
+        Snapshot.instances.append(self)
+
+    def get_version(self):
+        from api_general.models import SnapshotVersion
+
+        versions = dict(
+            SnapshotVersion.objects.filter(name__in=self.names).values_list(
+                "name", "version"
+            )
+        )
+
+        return tuple(versions.get(name, 0) for name in self.names)
+
+    def get(self):
+        """
+        Returns the snapshot, reloading it if it's changed since we last loaded it.
+        """
+        version, value, next_check = self.state
+
+        if value is not None and time.monotonic() < next_check:
+            return value
+
+        with self.lock:
+            version, value, next_check = self.state
+
+            if value is None or time.monotonic() >= next_check:
+                current = self.get_version()
+
+                if value is None or current != version:
+                    value = self.loader()
+
+                self.state = (
+                    current,
+                    value,
+                    time.monotonic() + settings.SNAPSHOT_CHECK_INTERVAL,
+                )
+
+        return value
+
+    def refresh(self):
+        """
+        Checks if the snapshot is out of date now rather than waiting for the next
+        check, then returns it.
+        """
+        version, value, next_check = self.state
+        self.state = (version, value, 0)
+
+        return self.get()
+
+    def invalidate(self):
+        """
+        Marks the snapshot as out of date, in this process straight away and in
+        other processes the next time they check its version.
+        """
+        from api_general.models import SnapshotVersion
+
+        updated = SnapshotVersion.objects.filter(name=self.name).update(
+            version=F("version") + 1
+        )
+
+        if not updated:
+            SnapshotVersion.objects.get_or_create(
+                name=self.name, defaults={"version": 1}
+            )
+
+        for snapshot in Snapshot.instances:
+            if self.name in snapshot.names:
+                snapshot.state = (None, None, 0)
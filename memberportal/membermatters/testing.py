@@ -0,0 +1,64 @@
+"""
+Helpers shared by the test suites of each app.
+"""
+
+from unittest import mock
+from django.test import TestCase
+from membermatters.background import BackgroundWorker
+from membermatters.snapshots import Snapshot
+from profile.models import MemberTypes, Profile, User
+
+
+def reset_snapshots():
+    # snapshots live for the life of the process, but each test's data is rolled back
+    for snapshot in Snapshot.instances:
+        snapshot.state = (None, None, 0)
+
+
+def make_member(number, state="active", **fields):
+    """
+    Creates a member (a user and their profile) for a test.
+    :param number: used to give each member a unique email, name and rfid tag
+    :param state: the member's state
+    :return: Profile
+    """
+    member_type = MemberTypes.objects.first() or MemberTypes.objects.create(
+        name="Test", cost=0
+    )
+    user = User.objects.create_user(f"member{number}@example.com", "password")
+
+    return Profile.objects.create(
+        user=user,
+        member_type=member_type,
+        first_name=f"Member{number}",
+        last_name="Test",
+        screen_name=f"member{number}",
+        rfid=fields.pop("rfid", str(1000 + number)),
+        state=state,
+        **fields,
+    )
+
+
+def run_now(worker, item):
+    worker.run_item(item)
+
+
+class MemberMattersTestCase(TestCase):
+    """
+    Runs background jobs straight away instead of on a worker thread (so they
+    happen inside the test's transaction), doesn't send any emails and starts
+    every test with empty snapshots.
+    """
+
+    def setUp(self):
+        super().setUp()
+        reset_snapshots()
+
+        for patcher in (
+            mock.patch.object(BackgroundWorker, "put", run_now),
+            mock.patch.object(User, "email_notification"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.addCleanup(reset_snapshots)
@@ -0,0 +1,111 @@
+import threading
+from unittest import mock
+from django.test import SimpleTestCase
+from membermatters.background import BackgroundWorker, BatchingWorker
+from services import discord
+
+
+class BackgroundWorkerTests(SimpleTestCase):
+    def test_runs_jobs_on_its_own_thread(self):
+        worker = BackgroundWorker("test")
+        threads = []
+
+        worker.submit(lambda: threads.append(threading.current_thread()))
+        worker.queue.join()
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_a_failed_job_doesnt_stop_the_worker(self):
+        worker = BackgroundWorker("test")
+        done = []
+
+        with self.assertLogs("membermatters.background", "ERROR"):
+            worker.submit(lambda: 1 / 0)
+            worker.submit(done.append, True)
+            worker.queue.join()
+
+        self.assertEqual(done, [True])
+
+    def test_full_queue_runs_the_job_straight_away(self):
+        worker = BackgroundWorker("test", max_size=1)
+        worker.queue.put((len, ((),), {}))  # fill it without starting the thread
+        done = []
+
+        with mock.patch.object(worker, "start"), self.assertLogs(
+            "membermatters.background", "WARNING"
+        ):
+            worker.submit(done.append, threading.current_thread())
+
+        self.assertEqual(done, [threading.current_thread()])
+
+    def test_full_queue_drops_the_job_if_asked_to(self):
+        worker = BackgroundWorker("test", max_size=1, drop_when_full=True)
+        worker.queue.put((len, ((),), {}))
+        done = []
+
+        with mock.patch.object(worker, "start"), self.assertLogs(
+            "membermatters.background", "ERROR"
+        ):
+            worker.submit(done.append, True)
+
+        self.assertEqual(done, [])
+
+    def test_drain_runs_whatever_is_left(self):
+        worker = BackgroundWorker("test")
+        done = []
+
+        # queued without starting the thread, ie left over at exit
+        for item in range(2):
+            worker.queue.put((done.append, (item,), {}))
+
+        worker.drain()
+
+        self.assertEqual(done, [0, 1])
+
+
+class BatchingWorkerTests(SimpleTestCase):
+    def test_items_are_handled_in_batches(self):
+        batches = []
+        worker = BatchingWorker("test", batches.append, window=0.2, max_batch=3)
+
+        for item in range(5):
+            worker.submit(item)
+
+        worker.queue.join()
+
+        self.assertEqual(sum(batches, []), [0, 1, 2, 3, 4])
+        self.assertTrue(all(len(batch) <= 3 for batch in batches))
+        self.assertLess(len(batches), 5)
+
+
+class DiscordTests(SimpleTestCase):
+    def test_embeds_for_the_same_webhook_are_combined(self):
+        messages = [
+            ("https://a", {"embeds": [{"description": str(i)}]}) for i in range(12)
+        ] + [("https://b", {"embeds": [{"description": "b"}]})]
+
+        with mock.patch.object(discord, "send_webhook") as send_webhook:
+            discord.send_discord_messages(messages)
+
+        calls = [(url, len(embeds)) for (url, embeds), _ in send_webhook.call_args_list]
+        self.assertEqual(calls, [("https://a", 10), ("https://a", 2), ("https://b", 1)])
+
+    def test_messages_are_never_posted_from_the_request(self):
+        self.assertTrue(discord.discord_outbox.drop_when_full)
+
+        with mock.patch.object(discord.discord_outbox, "put") as put:
+            discord.queue_discord_message("https://a", {"embeds": []})
+
+        put.assert_called_once_with(("https://a", {"embeds": []}))
+
+    def test_rate_limited_webhook_is_retried(self):
+        limited = mock.Mock(status_code=429, json=lambda: {"retry_after": 0})
+        ok = mock.Mock(status_code=204, ok=True)
+
+        with mock.patch.object(
+            discord.requests, "post", side_effect=[limited, ok]
+        ) as post, mock.patch.object(discord.time, "sleep"):
+            self.assertTrue(discord.send_webhook("https://a", []))
+
+        self.assertEqual(post.call_count, 2)
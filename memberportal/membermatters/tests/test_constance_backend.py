@@ -0,0 +1,25 @@
+from constance import config
+from membermatters.testing import MemberMattersTestCase
+
+
+class ConfigSnapshotTests(MemberMattersTestCase):
+    def test_values_are_read_from_the_snapshot(self):
+        # constance saves the default the first time an unset value is read
+        with self.captureOnCommitCallbacks(execute=True):
+            config.SITE_NAME
+            config.SITE_OWNER
+
+        config.SITE_NAME
+
+        with self.assertNumQueries(0):
+            config.SITE_NAME
+            config.SITE_OWNER
+
+    def test_changed_value_is_seen_once_committed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            config.SITE_NAME = "Test Space"
+
+        self.assertEqual(config.SITE_NAME, "Test Space")
+
+    def test_unset_value_falls_back_to_the_default(self):
+        self.assertFalse(config.ENABLE_DISCORD_INTEGRATION)
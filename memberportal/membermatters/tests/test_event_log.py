@@ -0,0 +1,62 @@
+from unittest import mock
+from django.test import TransactionTestCase
+from membermatters import helpers
+from membermatters.testing import make_member
+from profile.models import EventLog, UserEventLog
+
+
+class EventLogTests(TransactionTestCase):
+    # a bad foreign key is only caught when the batch commits
+
+    def setUp(self):
+        self.user = make_member(1).user
+
+    def entry(self, model, description, **fields):
+        return (
+            model,
+            dict(description=description, logtype="generic", data="", **fields),
+        )
+
+    def test_batch_is_written(self):
+        helpers.write_logs(
+            [
+                self.entry(EventLog, "first"),
+                self.entry(UserEventLog, "second", user_id=self.user.id),
+            ]
+        )
+
+        self.assertTrue(EventLog.objects.filter(description="first").exists())
+        self.assertTrue(
+            UserEventLog.objects.filter(description="second", user=self.user).exists()
+        )
+
+    def test_one_bad_entry_doesnt_lose_the_batch(self):
+        with self.assertLogs("membermatters.helpers", "ERROR"):
+            helpers.write_logs(
+                [
+                    self.entry(EventLog, "before"),
+                    self.entry(
+                        UserEventLog, "deleted user", user_id=self.user.id + 100
+                    ),
+                    self.entry(UserEventLog, "after", user_id=self.user.id),
+                ]
+            )
+
+        self.assertEqual(
+            set(EventLog.objects.values_list("description", flat=True)),
+            {"before"},
+        )
+        self.assertEqual(
+            list(UserEventLog.objects.values_list("description", flat=True)),
+            ["after"],
+        )
+
+    def test_events_are_queued(self):
+        with mock.patch.object(helpers.event_log, "submit") as submit:
+            helpers.log_user_event(self.user, "Did something", "generic", "data")
+
+        model, fields = submit.call_args[0][0]
+        self.assertIs(model, UserEventLog)
+        self.assertEqual(fields["user_id"], self.user.id)
+        self.assertEqual(fields["description"], "Did something")
+        self.assertFalse(UserEventLog.objects.filter(description="Did something"))
@@ -0,0 +1,65 @@
+from datetime import timedelta
+from django.utils import timezone
+from access.models import AccessControlledDevice, Doors
+from api_general.models import Kiosk
+from membermatters.heartbeats import flush_heartbeats
+from membermatters.testing import MemberMattersTestCase, make_member
+from profile.models import Profile
+
+
+class HeartbeatTests(MemberMattersTestCase):
+    def test_latest_heartbeat_for_each_object_is_written(self):
+        first = Doors.objects.create(name="Front", description="Front door")
+        second = Doors.objects.create(name="Back", description="Back door")
+        member = make_member(1)
+        now = timezone.now()
+        earlier = now - timedelta(minutes=1)
+
+        # one update per model, however many objects and heartbeats
+        with self.assertNumQueries(2):
+            flush_heartbeats(
+                [
+                    (AccessControlledDevice, first.pk, now),
+                    (AccessControlledDevice, first.pk, earlier),
+                    (AccessControlledDevice, second.pk, earlier),
+                    (Profile, member.pk, now),
+                ]
+            )
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        member.refresh_from_db()
+        self.assertEqual(first.last_seen, now)
+        self.assertEqual(second.last_seen, earlier)
+        self.assertEqual(member.last_seen, now)
+
+    def test_device_checkin_only_updates_last_seen(self):
+        door = Doors.objects.create(name="Front", description="Front door")
+        Doors.objects.filter(pk=door.pk).update(description="Changed")
+
+        door.checkin()
+
+        stored = Doors.objects.get(pk=door.pk)
+        self.assertEqual(stored.last_seen, door.last_seen)
+        self.assertEqual(stored.description, "Changed")
+
+    def test_saving_a_stale_object_keeps_last_seen(self):
+        member = make_member(1)
+        kiosk = Kiosk.objects.create(name="Front", kiosk_id="front")
+        stale_member = Profile.objects.get(pk=member.pk)
+        stale_kiosk = Kiosk.objects.get(pk=kiosk.pk)
+        now = timezone.now()
+
+        flush_heartbeats([(Profile, member.pk, now), (Kiosk, kiosk.pk, now)])
+
+        stale_member.first_name = "Changed"
+        stale_member.save()
+        stale_kiosk.name = "Changed"
+        stale_kiosk.save()
+
+        member.refresh_from_db()
+        kiosk.refresh_from_db()
+        self.assertEqual(member.last_seen, now)
+        self.assertEqual(member.first_name, "Changed")
+        self.assertEqual(kiosk.last_seen, now)
+        self.assertEqual(kiosk.name, "Changed")
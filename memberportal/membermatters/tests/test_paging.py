@@ -0,0 +1,62 @@
+import datetime
+from django.http import QueryDict
+from django.test import SimpleTestCase
+from django.utils import timezone
+from membermatters.helpers import get_page_params, make_cursor, parse_cursor
+
+
+class CursorTests(SimpleTestCase):
+    def test_cursors_round_trip(self):
+        date = timezone.make_aware(datetime.datetime(2021, 3, 4, 5, 6, 7, 891011))
+        cursor = make_cursor(date, 12345)
+
+        self.assertEqual(parse_cursor(cursor), (date, 12345))
+
+    def test_cursors_are_url_safe(self):
+        for pk in range(1, 50):
+            cursor = make_cursor(timezone.now(), pk)
+            self.assertRegex(cursor, r"^[A-Za-z0-9_-]+$")
+
+    def test_bad_cursors_are_refused(self):
+        for cursor in (
+            "",
+            "!!!",
+            "bm90IGEgY3Vyc29y",
+            make_cursor(timezone.now(), 1)[:-3],
+        ):
+            with self.assertRaises(ValueError):
+                parse_cursor(cursor)
+
+
+class PageParamsTests(SimpleTestCase):
+    def params(self, query=""):
+        return get_page_params(QueryDict(query), default_limit=50, max_limit=200)
+
+    def test_defaults(self):
+        self.assertEqual(
+            self.params(), {"start": None, "end": None, "before": None, "limit": 50}
+        )
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(self.params("limit=10")["limit"], 10)
+        self.assertEqual(self.params("limit=0")["limit"], 1)
+        self.assertEqual(self.params("limit=-5")["limit"], 1)
+        self.assertEqual(self.params("limit=1000")["limit"], 200)
+
+        with self.assertRaises(ValueError):
+            self.params("limit=lots")
+
+    def test_dates_include_the_whole_end_day(self):
+        page = self.params("from=2021-01-01&to=2021-01-31")
+
+        self.assertEqual(page["start"].date(), datetime.date(2021, 1, 1))
+        self.assertEqual(page["end"].date(), datetime.date(2021, 2, 1))
+
+        with self.assertRaises(ValueError):
+            self.params("from=yesterday")
+
+    def test_cursor_is_parsed(self):
+        date = timezone.now()
+        page = self.params(f"cursor={make_cursor(date, 7)}")
+
+        self.assertEqual(page["before"], (date, 7))
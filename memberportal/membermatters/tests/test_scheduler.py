@@ -0,0 +1,47 @@
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase
+from django.utils import timezone
+from api_general.models import ScheduledTask
+from membermatters import scheduler
+
+
+class SchedulerTests(TestCase):
+    def test_a_task_is_only_claimed_once_per_interval(self):
+        self.assertTrue(scheduler.claim_task("test", 60))
+        self.assertFalse(scheduler.claim_task("test", 60))
+
+        ScheduledTask.objects.filter(name="test").update(
+            next_run=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertTrue(scheduler.claim_task("test", 60))
+
+    def test_runs_due_tasks(self):
+        ran = mock.Mock(__name__="ran")
+        tasks = {"test.ran": (ran, 60)}
+
+        with mock.patch.object(scheduler, "tasks", tasks):
+            scheduler.run_pending()
+            scheduler.run_pending()
+
+        ran.assert_called_once_with()
+
+    def test_a_failing_task_doesnt_stop_the_others(self):
+        ran = mock.Mock()
+        tasks = {
+            "test.fails": (mock.Mock(side_effect=ValueError), 60),
+            "test.ran": (ran, 60),
+        }
+
+        with mock.patch.object(scheduler, "tasks", tasks), self.assertLogs(
+            "membermatters.scheduler", "ERROR"
+        ):
+            scheduler.run_pending()
+
+        ran.assert_called_once_with()
+
+    def test_tasks_are_registered(self):
+        from access.tasks import timeout_interlock_sessions
+
+        name = "access.tasks.timeout_interlock_sessions"
+        self.assertEqual(scheduler.tasks[name], (timeout_interlock_sessions, 30))
@@ -0,0 +1,76 @@
+import threading
+from unittest import mock
+from django.db.models import F
+from django.test import TestCase, override_settings
+from api_general.models import SnapshotVersion
+from membermatters.snapshots import Snapshot
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        self.loads = 0
+        self.snapshot = self.make_snapshot("test")
+
+    def make_snapshot(self, name, depends_on=()):
+        def load():
+            self.loads += 1
+            return {"loads": self.loads}
+
+        snapshot = Snapshot(name, load, depends_on)
+        self.addCleanup(Snapshot.instances.remove, snapshot)
+
+        return snapshot
+
+    def bump_from_another_process(self, name):
+        SnapshotVersion.objects.get_or_create(name=name)
+        SnapshotVersion.objects.filter(name=name).update(version=F("version") + 1)
+
+    def test_loaded_once_then_served_from_memory(self):
+        self.assertEqual(self.snapshot.get(), {"loads": 1})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.snapshot.get(), {"loads": 1})
+
+    def test_invalidate_reloads_straight_away_in_this_process(self):
+        self.snapshot.get()
+        self.snapshot.invalidate()
+
+        self.assertEqual(self.snapshot.get(), {"loads": 2})
+
+    def test_change_in_another_process_is_seen_at_the_next_check(self):
+        self.snapshot.get()
+        self.bump_from_another_process("test")
+
+        # not until it's time to check the version again
+        self.assertEqual(self.snapshot.get(), {"loads": 1})
+        self.assertEqual(self.snapshot.refresh(), {"loads": 2})
+
+    @override_settings(SNAPSHOT_CHECK_INTERVAL=0)
+    def test_unchanged_version_isnt_reloaded(self):
+        self.snapshot.get()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.snapshot.get(), {"loads": 1})
+
+    def test_reloaded_when_a_dependency_changes(self):
+        dependant = self.make_snapshot("dependant", depends_on=["test"])
+        dependant.get()
+
+        self.snapshot.invalidate()
+        self.assertEqual(dependant.get(), {"loads": 2})
+
+        self.bump_from_another_process("test")
+        self.assertEqual(dependant.refresh(), {"loads": 3})
+
+    def test_concurrent_reads_only_load_once(self):
+        threads = [threading.Thread(target=self.snapshot.get) for _ in range(5)]
+
+        # the version check is the only query, so threads don't need the database
+        with mock.patch.object(self.snapshot, "get_version", return_value=(0,)):
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(self.loads, 1)
@@ -12,3 +12,7 @@ logging.basicConfig(stream=sys.stderr)
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "membermatters.settings")
 
 application = get_wsgi_application()
+
+from membermatters.scheduler import scheduler
+
+scheduler.start()
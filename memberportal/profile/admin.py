@@ -24,4 +24,6 @@ class MemberTypesAdmin(admin.ModelAdmin):
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
-    pass
+    # kept up to date by each memberbucks transaction, use the
+    # reconcile_memberbucks command to fix it if it's wrong
+    readonly_fields = ("memberbucks_balance",)
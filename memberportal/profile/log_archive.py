@@ -0,0 +1,207 @@
+"""
+Keeps the event log tables from growing forever. Logs older than their type's
+retention period (settings.LOG_RETENTION_DAYS) are written to gzipped JSON
+lines files under LOG_ARCHIVE_LOCATION, one file per local day (ie
+2021/10/2021-10-05.jsonl.gz), and then deleted from the database in batches
+(only if LOG_RETENTION_ENABLED is set). Archived logs can still be read back
+with read_archived_logs(), admins can do that from api/admin/logs/archive/.
+"""
+
+import datetime
+import gzip
+import json
+import logging
+import os
+import shutil
+import zlib
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Log, LOG_TYPES
+
+logger = logging.getLogger(__name__)
+
+
+def get_archive_path(date):
+    return os.path.join(
+        settings.LOG_ARCHIVE_LOCATION,
+        date.strftime("%Y"),
+        date.strftime("%m"),
+        date.strftime("%Y-%m-%d") + ".jsonl.gz",
+    )
+
+
+def get_retention_days(logtype):
+    return settings.LOG_RETENTION_DAYS.get(logtype, settings.LOG_RETENTION_DEFAULT_DAYS)
+
+
+def append_to_archive(path, lines):
+    """
+    Adds lines to an archive file as a new gzip member. The new member is
+    written to a temporary file alongside the existing contents which then
+    replaces the archive, so a crash part way through can't leave a truncated
+    member at the end of the file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        with open(temp_path, "wb") as temp:
+            if os.path.exists(path):
+                with open(path, "rb") as archive:
+                    shutil.copyfileobj(archive, temp)
+
+            # gzip reads consecutive members back as one file
+            with gzip.open(temp, "wt", encoding="utf-8") as member:
+                member.writelines(lines)
+
+            temp.flush()
+            os.fsync(temp.fileno())
+
+        os.replace(temp_path, path)
+
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def write_archive(logs):
+    """
+    Appends logs to the archive file for the (local) day they were logged on.
+    :param logs: [{}] from Log.objects.values()
+    """
+    by_day = {}
+
+    for log in logs:
+        by_day.setdefault(timezone.localtime(log["date"]).date(), []).append(log)
+
+    for day, day_logs in by_day.items():
+        append_to_archive(
+            get_archive_path(day),
+            [
+                json.dumps(
+                    {
+                        "id": log["id"],
+                        "logtype": log["logtype"],
+                        "description": log["description"],
+                        "data": log["data"],
+                        "date": log["date"].isoformat(),
+                        "user_id": log["usereventlog__user_id"],
+                    }
+                )
+                + "\n"
+                for log in day_logs
+            ],
+        )
+
+
+def archive_logs(logtype, before):
+    """
+    Archives and deletes every log of a type from before the specified date.
+    :param logtype: the type of log
+    :param before: datetime
+    :return: the number of logs archived
+    """
+    archived = 0
+
+    while True:
+        logs = list(
+            Log.objects.filter(logtype=logtype, date__lt=before)
+            .order_by("id")
+            .values(
+                "id",
+                "logtype",
+                "description",
+                "data",
+                "date",
+                "usereventlog__user_id",
+            )[: settings.LOG_ARCHIVE_BATCH_SIZE]
+        )
+
+        if not logs:
+            return archived
+
+        write_archive(logs)
+        Log.objects.filter(pk__in=[log["id"] for log in logs]).delete()
+        archived += len(logs)
+
+
+def archive_old_logs():
+    """
+    Archives every log that's older than its type's retention period.
+    :return: {logtype: number of logs archived}
+    """
+    archived = {}
+
+    if not settings.LOG_RETENTION_ENABLED:
+        return archived
+
+    for logtype, name in LOG_TYPES:
+        days = get_retention_days(logtype)
+
+        if days is not None:
+            before = timezone.now() - datetime.timedelta(days=days)
+            archived[logtype] = archive_logs(logtype, before)
+
+    return archived
+
+
+def read_archive(path):
+    """
+    Reads the logs in an archive file, skipping anything after a damaged gzip
+    member (ie if the file was cut short) rather than failing the whole read.
+    :return: generator of the logs
+    """
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            for line in archive:
+                try:
+                    yield json.loads(line)
+
+                except ValueError:
+                    logger.warning(f"Skipped a damaged line in {path}.")
+
+    except (EOFError, OSError, zlib.error):
+        logger.warning(f"Skipped the damaged end of {path}.")
+
+
+def read_archived_logs(start, end, logtype=None, user_id=None):
+    """
+    Reads logs back out of the archive.
+    :param start: the first (local) day to read (date)
+    :param end: the last (local) day to read (date)
+    :param logtype: only return logs of this type
+    :param user_id: only return logs for this user
+    :return: generator of {"id", "logtype", "description", "data", "date", "user_id"}
+    """
+    seen = set()
+    # older archives were split up by UTC day, so a log near midnight can be in
+    # the file for the day either side of its local day
+    day = start - datetime.timedelta(days=1)
+
+    while day <= end + datetime.timedelta(days=1):
+        path = get_archive_path(day)
+        day += datetime.timedelta(days=1)
+
+        if not os.path.exists(path):
+            continue
+
+        for log in read_archive(path):
+            # a log can be archived twice if we stopped before deleting it
+            if log["id"] in seen:
+                continue
+
+            seen.add(log["id"])
+
+            logged_on = timezone.localtime(parse_datetime(log["date"])).date()
+
+            if not start <= logged_on <= end:
+                continue
+
+            if logtype is not None and log["logtype"] != logtype:
+                continue
+
+            if user_id is not None and log["user_id"] != user_id:
+                continue
+
+            yield log
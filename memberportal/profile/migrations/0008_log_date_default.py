@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:24
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profile", "0007_auto_20211005_0015"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="log",
+            name="date",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profile", "0008_log_date_default"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(fields=["date"], name="profile_log_date_73837e_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(
+                fields=["logtype", "date"], name="profile_log_logtype_8751f9_idx"
+            ),
+        ),
+    ]
@@ -20,6 +20,7 @@ from profile.xerohelpers import get_xero_contact, create_membership_invoice
 from profile.xerohelpers import add_to_xero
 from constance import config
 from api_general.models import SiteSession
+from membermatters.heartbeats import record_heartbeat
 from api_admin_tools.models import MemberTier, PaymentPlan
 import json
 import uuid
@@ -47,7 +48,13 @@ class Log(models.Model):
     logtype = models.CharField("Type of action/event", choices=LOG_TYPES, max_length=30)
     description = models.CharField("Description of action/event", max_length=500)
     data = models.TextField("Extra data for debugging action/event")
-    date = models.DateTimeField(auto_now_add=True)
+    date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date"]),
+            models.Index(fields=["logtype", "date"]),
+        ]
 
 
 class UserEventLog(Log):
@@ -485,8 +492,34 @@ class Profile(models.Model):
             )
             return True
 
-    def get_logs(self):
-        return UserEventLog.objects.filter(user=self.user)
+    def get_logs(self, logtype=None, start=None, end=None, before=None, limit=None):
+        """
+        Returns the member's logs, newest first.
+        :param logtype: only return logs of this type
+        :param start: only return logs from this datetime onwards
+        :param end: only return logs from before this datetime
+        :param before: (date, id) of the last log on the previous page
+        :param limit: the most logs to return
+        :return: QuerySet<UserEventLog>
+        """
+        logs = UserEventLog.objects.filter(user=self.user).order_by("-date", "-id")
+
+        if logtype:
+            logs = logs.filter(logtype=logtype)
+
+        if start:
+            logs = logs.filter(date__gte=start)
+
+        if end:
+            logs = logs.filter(date__lt=end)
+
+        if before:
+            date, log_id = before
+            logs = logs.filter(
+                models.Q(date__lt=date) | models.Q(date=date, id__lt=log_id)
+            )
+
+        return logs[:limit] if limit else logs
 
     def __str__(self):
         return str(self.user)
@@ -498,8 +531,7 @@ class Profile(models.Model):
         return self.first_name
 
     def update_last_seen(self):
-        self.last_seen = timezone.now()
-        return self.save()
+        self.last_seen = record_heartbeat(Profile, self.pk)
 
     def update_last_induction(self):
         self.last_induction = timezone.now()
@@ -515,9 +547,7 @@ class Profile(models.Model):
         return create_membership_invoice(self.user, email_invoice)
 
     def is_signed_into_site(self):
-        sessions = SiteSession.objects.filter(user=self.user, signout_date=None)
-
-        return True if len(sessions) else False
+        return SiteSession.objects.filter(user=self.user, signout_date=None).exists()
 
     def get_basic_profile(self):
         """
@@ -633,4 +663,16 @@ class Profile(models.Model):
         if not self.id:
             self.created = timezone.now()
         self.modified = timezone.now()
+
+        # the balance is only changed by the memberbucks ledger (see
+        # memberbucks/models.py) and last_seen by the heartbeat flush, so
+        # don't overwrite them with whatever we loaded
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in ("memberbucks_balance", "last_seen")
+            ]
+
         return super(Profile, self).save(*args, **kwargs)
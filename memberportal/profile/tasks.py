@@ -0,0 +1,7 @@
+from membermatters.scheduler import periodic_task
+from .log_archive import archive_old_logs
+
+
+@periodic_task(3600)
+def archive_logs():
+    return archive_old_logs()
@@ -0,0 +1,124 @@
+import datetime
+import gzip
+import os
+import shutil
+import tempfile
+from django.test import override_settings
+from django.utils import timezone
+from membermatters.testing import MemberMattersTestCase, make_member
+from profile import log_archive
+from profile.models import EventLog, Log, UserEventLog
+
+
+class LogArchiveTestCase(MemberMattersTestCase):
+    """
+    Starts with a few logs, some of them past their retention period, and an
+    empty archive.
+    """
+
+    def setUp(self):
+        super().setUp()
+        archive = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive)
+
+        patcher = override_settings(
+            LOG_ARCHIVE_LOCATION=archive,
+            LOG_RETENTION_ENABLED=True,
+            LOG_RETENTION_DAYS={"email": 30, "door": 365},
+            LOG_ARCHIVE_BATCH_SIZE=2,
+        )
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+        self.user = make_member(1).user
+        self.now = timezone.now()
+        self.old = self.now - datetime.timedelta(days=40)
+
+        for number in range(3):
+            UserEventLog.objects.create(
+                user=self.user,
+                logtype="email",
+                description=f"old {number}",
+                date=self.old,
+            )
+
+        EventLog.objects.create(logtype="email", description="new", date=self.now)
+        EventLog.objects.create(logtype="door", description="door", date=self.old)
+        EventLog.objects.create(logtype="generic", description="kept", date=self.old)
+
+
+class LogArchiveTests(LogArchiveTestCase):
+    def test_only_logs_past_their_retention_are_archived(self):
+        self.assertEqual(log_archive.archive_old_logs(), {"email": 3, "door": 0})
+
+        self.assertEqual(
+            set(Log.objects.values_list("description", flat=True)),
+            {"new", "door", "kept"},
+        )
+
+    def test_archived_logs_can_be_read_back(self):
+        log_archive.archive_old_logs()
+        day = timezone.localtime(self.old).date()
+
+        logs = list(log_archive.read_archived_logs(day, day))
+        self.assertEqual(
+            [log["description"] for log in logs], ["old 0", "old 1", "old 2"]
+        )
+        self.assertEqual({log["user_id"] for log in logs}, {self.user.id})
+
+        self.assertEqual(list(log_archive.read_archived_logs(day, day, "door")), [])
+        self.assertEqual(
+            list(log_archive.read_archived_logs(day, day, user_id=self.user.id + 1)),
+            [],
+        )
+
+    def test_logs_archived_twice_are_only_read_once(self):
+        logs = list(
+            Log.objects.filter(logtype="email", date=self.old).values(
+                "id", "logtype", "description", "data", "date", "usereventlog__user_id"
+            )
+        )
+        log_archive.write_archive(logs)
+        log_archive.write_archive(logs)
+
+        day = timezone.localtime(self.old).date()
+        self.assertEqual(len(list(log_archive.read_archived_logs(day, day))), 3)
+
+    @override_settings(LOG_RETENTION_ENABLED=False)
+    def test_nothing_is_archived_unless_enabled(self):
+        self.assertEqual(log_archive.archive_old_logs(), {})
+        self.assertEqual(Log.objects.count(), 6)
+
+    def test_a_damaged_archive_is_read_up_to_the_damage(self):
+        log_archive.archive_old_logs()
+        day = timezone.localtime(self.old).date()
+        path = log_archive.get_archive_path(day)
+
+        # as if we crashed part way through writing another member
+        with open(path, "ab") as archive:
+            archive.write(gzip.compress(b'{"id": 999}\n')[:-10])
+
+        self.assertEqual(len(list(log_archive.read_archived_logs(day, day))), 3)
+
+    def test_logs_are_split_up_by_local_day(self):
+        # just after midnight locally is still the previous day in UTC
+        midnight = timezone.make_aware(datetime.datetime(2021, 1, 2, 0, 30))
+        EventLog.objects.create(logtype="email", description="late", date=midnight)
+
+        log_archive.archive_old_logs()
+
+        self.assertTrue(
+            os.path.exists(log_archive.get_archive_path(datetime.date(2021, 1, 2)))
+        )
+        logs = log_archive.read_archived_logs(
+            datetime.date(2021, 1, 2), datetime.date(2021, 1, 2)
+        )
+        self.assertEqual([log["description"] for log in logs], ["late"])
+        self.assertEqual(
+            list(
+                log_archive.read_archived_logs(
+                    datetime.date(2021, 1, 1), datetime.date(2021, 1, 1)
+                )
+            ),
+            [],
+        )
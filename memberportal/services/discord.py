@@ -1,6 +1,79 @@
+import logging
+import time
 import requests
-from django.conf import settings
 from constance import config
+from membermatters.background import BatchingWorker
+
+logger = logging.getLogger(__name__)
+
+# discord allows up to 10 embeds in a single webhook message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_ATTEMPTS = 3
+WEBHOOK_TIMEOUT = 5
+
+
+def send_webhook(url, embeds):
+    """
+    Posts embeds to a discord webhook, waiting and retrying if we get rate limited.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            r = requests.post(
+                url,
+                json={"description": "", "embeds": embeds},
+                timeout=WEBHOOK_TIMEOUT,
+            )
+
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Failed to post to discord webhook: {e}")
+            return False
+
+        if r.status_code != 429:
+            return r.ok
+
+        try:
+            retry_after = float(r.json().get("retry_after", 1))
+        except ValueError:
+            retry_after = float(r.headers.get("Retry-After", 1))
+
+        time.sleep(min(retry_after, 10))
+
+    logger.warning("Gave up posting to discord webhook after being rate limited.")
+    return False
+
+
+def send_discord_messages(messages):
+    """
+    Sends a batch of queued messages, combining the embeds for each webhook
+    into as few requests as possible.
+    """
+    embeds_by_url = {}
+
+    for url, json_message in messages:
+        embeds_by_url.setdefault(url, []).extend(json_message["embeds"])
+
+    for url, embeds in embeds_by_url.items():
+        for i in range(0, len(embeds), MAX_EMBEDS_PER_MESSAGE):
+            send_webhook(url, embeds[i : i + MAX_EMBEDS_PER_MESSAGE])
+
+
+# messages are dropped rather than posted from the request if we fall this far
+# behind, a swipe should never wait on discord
+discord_outbox = BatchingWorker(
+    "discord-outbox",
+    send_discord_messages,
+    window=2,
+    max_batch=50,
+    drop_when_full=True,
+)
+
+
+def queue_discord_message(url, json_message):
+    """
+    Queues a message to be posted to a discord webhook in the background so we
+    don't hold up the request (ie a door swipe) waiting on discord.
+    """
+    discord_outbox.submit((url, json_message))
 
 
 def post_door_swipe_to_discord(name, door, status):
@@ -38,10 +111,7 @@ def post_door_swipe_to_discord(name, door, status):
                 }
             )
 
-        try:
-            requests.post(url, json=json_message, timeout=settings.REQUEST_TIMEOUT)
-        except requests.exceptions.ReadTimeout:
-            return True
+        queue_discord_message(url, json_message)
 
     return True
 
@@ -109,10 +179,7 @@ def post_interlock_swipe_to_discord(name, interlock, type, time=None):
                 }
             )
 
-        try:
-            requests.post(url, json=json_message, timeout=settings.REQUEST_TIMEOUT)
-        except requests.exceptions.ReadTimeout:
-            return True
+        queue_discord_message(url, json_message)
 
     else:
         return True
@@ -131,9 +198,6 @@ def post_kiosk_swipe_to_discord(name, sign_in):
             }
         )
 
-        try:
-            requests.post(url, json=json_message, timeout=settings.REQUEST_TIMEOUT)
-        except requests.exceptions.ReadTimeout:
-            return True
+        queue_discord_message(url, json_message)
 
     return True